@@ -32,16 +32,24 @@ from app.core.database import Base  # <-- ensure this is where you defined decla
 import app.models.doctor_models
 import app.models.patient_models
 import app.models.department
+import app.models.outbox
+import app.models.doctor_counters
+import app.models.doctor_deletion
 # ... import any other model modules
 
 # tell Alembic about metadata for autogenerate
 target_metadata = Base.metadata
 
+def include_object(object, name, type_, reflected, compare_to):
+    # the FTS5 search index and its shadow tables are managed by hand
+    return not (type_ == "table" and name.startswith("patients_fts"))
+
 def run_migrations_offline() -> None:
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -55,7 +63,7 @@ def run_migrations_online() -> None:
         poolclass=pool.NullPool,
     )
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
         with context.begin_transaction():
             context.run_migrations()
 
@@ -0,0 +1,35 @@
+"""add patient doctor composite indexes
+
+Revision ID: 5d2c8e41f9a7
+Revises: ae0fc5b46f7c
+Create Date: 2026-10-18 10:12:40.218934
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2c8e41f9a7'
+down_revision: Union[str, Sequence[str], None] = 'ae0fc5b46f7c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# patients may already have been created by create_all with these indexes
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_patients_doctor_id_id', 'patients', ['doctor_id', 'id'], unique=False, if_not_exists=True)
+    op.create_index('ix_patients_doctor_id_weight', 'patients', ['doctor_id', 'weight', 'id'], unique=False, if_not_exists=True)
+    op.create_index('ix_patients_doctor_id_height', 'patients', ['doctor_id', 'height', 'id'], unique=False, if_not_exists=True)
+    op.create_index('ix_patients_doctor_id_bmi', 'patients', ['doctor_id', 'bmi', 'id'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_patients_doctor_id_bmi', table_name='patients', if_exists=True)
+    op.drop_index('ix_patients_doctor_id_height', table_name='patients', if_exists=True)
+    op.drop_index('ix_patients_doctor_id_weight', table_name='patients', if_exists=True)
+    op.drop_index('ix_patients_doctor_id_id', table_name='patients', if_exists=True)
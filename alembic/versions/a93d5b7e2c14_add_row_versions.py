@@ -0,0 +1,35 @@
+"""add row versions to doctors and patients
+
+Revision ID: a93d5b7e2c14
+Revises: f2a7c1e9d4b6
+Create Date: 2026-10-18 19:02:37.541806
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a93d5b7e2c14'
+down_revision: Union[str, Sequence[str], None] = 'f2a7c1e9d4b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # existing rows all start at 1, which keeps patient.version <= doctor.version
+    with op.batch_alter_table('doctors') as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    with op.batch_alter_table('patients') as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('patients') as batch_op:
+        batch_op.drop_column('version')
+    with op.batch_alter_table('doctors') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,30 @@
+"""add failed_at to the outbox
+
+Revision ID: b5e8f2a4c7d1
+Revises: a93d5b7e2c14
+Create Date: 2026-10-18 21:14:52.906113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e8f2a4c7d1'
+down_revision: Union[str, Sequence[str], None] = 'a93d5b7e2c14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('outbox') as batch_op:
+        batch_op.add_column(sa.Column('failed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('outbox') as batch_op:
+        batch_op.drop_column('failed_at')
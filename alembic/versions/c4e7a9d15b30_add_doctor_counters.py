@@ -0,0 +1,72 @@
+"""add doctor counters and doctor department
+
+Revision ID: c4e7a9d15b30
+Revises: 8f3a1c7d2b94
+Create Date: 2026-10-18 12:20:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e7a9d15b30'
+down_revision: Union[str, Sequence[str], None] = '8f3a1c7d2b94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _columns(table: str) -> set:
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('doctor_counters',
+    sa.Column('doctor_id', sa.Integer(), nullable=False),
+    sa.Column('patients', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('underweight', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('normal', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('obese', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['doctor_id'], ['doctors.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('doctor_id'),
+    if_not_exists=True
+    )
+    # the model had No_of_doctors long before a migration added it
+    if 'No_of_doctors' not in _columns('departments'):
+        op.add_column('departments', sa.Column('No_of_doctors', sa.Integer(), server_default='0', nullable=False))
+    if 'department_id' not in _columns('doctors'):
+        with op.batch_alter_table('doctors') as batch_op:
+            batch_op.add_column(sa.Column('department_id', sa.Integer(), nullable=True))
+            batch_op.create_index(batch_op.f('ix_doctors_department_id'), ['department_id'], unique=False)
+            batch_op.create_foreign_key('fk_doctors_department_id', 'departments', ['department_id'], ['id'])
+
+    # backfill, same statements as counter_service.reconcile
+    op.execute(
+        "DELETE FROM doctor_counters"
+    )
+    op.execute(
+        "INSERT INTO doctor_counters (doctor_id, patients, underweight, normal, obese) "
+        "SELECT doctors.id, count(patients.id), "
+        "count(CASE WHEN patients.verdict = 'Underweight' THEN 1 END), "
+        "count(CASE WHEN patients.verdict = 'Normal' THEN 1 END), "
+        "count(CASE WHEN patients.verdict = 'Obese' THEN 1 END) "
+        "FROM doctors LEFT OUTER JOIN patients ON patients.doctor_id = doctors.id "
+        "GROUP BY doctors.id"
+    )
+    op.execute(
+        'UPDATE departments SET "No_of_doctors" = '
+        "(SELECT count(doctors.id) FROM doctors WHERE doctors.department_id = departments.id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('doctors') as batch_op:
+        batch_op.drop_constraint('fk_doctors_department_id', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_doctors_department_id'))
+        batch_op.drop_column('department_id')
+    op.drop_column('departments', 'No_of_doctors')
+    op.drop_table('doctor_counters')
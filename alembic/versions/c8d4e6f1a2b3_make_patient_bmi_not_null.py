@@ -0,0 +1,66 @@
+"""make patients.bmi not null
+
+Revision ID: c8d4e6f1a2b3
+Revises: b5e8f2a4c7d1
+Create Date: 2026-10-18 22:41:09.318274
+
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8d4e6f1a2b3'
+down_revision: Union[str, Sequence[str], None] = 'b5e8f2a4c7d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of the term format of app.services.search_index at this
+# revision (see e1b6f0a3c852).
+_WORD = re.compile(r"[^\W_]+", re.UNICODE)
+BACKFILL_BATCH_SIZE = 10_000
+
+
+def _terms(doctor_id, value) -> str:
+    if doctor_id is None or not value:
+        return ""
+    return " ".join(f"d{doctor_id}x{word.lower()}" for word in _WORD.findall(value))
+
+
+def _rebuild_search_index(bind) -> None:
+    bind.execute(sa.text("INSERT INTO patients_fts (patients_fts) VALUES ('delete-all')"))
+    insert = sa.text("INSERT INTO patients_fts (rowid, name, city) VALUES (:rowid, :name, :city)")
+    rows = bind.execute(
+        sa.text("SELECT rowid, name, city, doctor_id FROM patients").execution_options(yield_per=BACKFILL_BATCH_SIZE)
+    )
+    for batch in rows.partitions():
+        bind.execute(insert, [
+            {"rowid": rowid, "name": _terms(doctor_id, name), "city": _terms(doctor_id, city)}
+            for rowid, name, city, doctor_id in batch
+        ])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # rows written before bmi was always stored; height was not validated then
+    op.execute(
+        "UPDATE patients SET bmi = CASE WHEN height > 0 "
+        "THEN ROUND(CAST(weight / (height * height) AS NUMERIC), 2) ELSE 0 END "
+        "WHERE bmi IS NULL"
+    )
+    with op.batch_alter_table('patients') as batch_op:
+        batch_op.alter_column('bmi', existing_type=sa.Float(), nullable=False)
+    if op.get_bind().dialect.name == 'sqlite':
+        # the batch copy of patients renumbers its rowids, which key the FTS5 index
+        _rebuild_search_index(op.get_bind())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('patients') as batch_op:
+        batch_op.alter_column('bmi', existing_type=sa.Float(), nullable=True)
+    if op.get_bind().dialect.name == 'sqlite':
+        _rebuild_search_index(op.get_bind())
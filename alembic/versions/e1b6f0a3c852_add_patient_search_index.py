@@ -0,0 +1,67 @@
+"""add patient search index
+
+Revision ID: e1b6f0a3c852
+Revises: c4e7a9d15b30
+Create Date: 2026-10-18 13:02:15.704119
+
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1b6f0a3c852'
+down_revision: Union[str, Sequence[str], None] = 'c4e7a9d15b30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of the term format of app.services.search_index at this
+# revision: each word is indexed scoped to its doctor ('Ali' of doctor 7
+# becomes 'd7xali'); letters and digits only.
+_WORD = re.compile(r"[^\W_]+", re.UNICODE)
+BACKFILL_BATCH_SIZE = 10_000
+
+
+def _terms(doctor_id, value) -> str:
+    if doctor_id is None or not value:
+        return ""
+    return " ".join(f"d{doctor_id}x{word.lower()}" for word in _WORD.findall(value))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS patients_fts USING fts5("
+            "name, city, content='', tokenize='unicode61 remove_diacritics 2')"
+        )
+        # the terms are built in Python (doctor-scoped words) and inserted in batches
+        bind = op.get_bind()
+        bind.execute(sa.text("INSERT INTO patients_fts (patients_fts) VALUES ('delete-all')"))
+        insert = sa.text("INSERT INTO patients_fts (rowid, name, city) VALUES (:rowid, :name, :city)")
+        rows = bind.execute(
+            sa.text("SELECT rowid, name, city, doctor_id FROM patients").execution_options(yield_per=BACKFILL_BATCH_SIZE)
+        )
+        for batch in rows.partitions():
+            bind.execute(insert, [
+                {"rowid": rowid, "name": _terms(doctor_id, name), "city": _terms(doctor_id, city)}
+                for rowid, name, city, doctor_id in batch
+            ])
+    elif dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_patients_name_trgm ON patients USING gin (name gin_trgm_ops)")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_patients_city_trgm ON patients USING gin (city gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS patients_fts")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_patients_city_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_patients_name_trgm")
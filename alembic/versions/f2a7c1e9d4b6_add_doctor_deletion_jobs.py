@@ -0,0 +1,43 @@
+"""add doctor deletion jobs
+
+Revision ID: f2a7c1e9d4b6
+Revises: e1b6f0a3c852
+Create Date: 2026-10-18 16:41:09.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a7c1e9d4b6'
+down_revision: Union[str, Sequence[str], None] = 'e1b6f0a3c852'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('doctor_deletion_jobs',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('doctor_id', sa.Integer(), nullable=False),
+    sa.Column('mode', sa.String(), nullable=False),
+    sa.Column('reassign_to', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=True),
+    sa.Column('processed', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_index(op.f('ix_doctor_deletion_jobs_doctor_id'), 'doctor_deletion_jobs', ['doctor_id'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_doctor_deletion_jobs_doctor_id'), table_name='doctor_deletion_jobs')
+    op.drop_table('doctor_deletion_jobs')
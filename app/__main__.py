@@ -0,0 +1,98 @@
+"""
+Production server: `python -m app`.
+
+Runs uvicorn with WEB_WORKERS processes (one per CPU core by default), each
+serving `app.main:app` in STARTUP_MODE=production unless set otherwise.
+Every option defaults to its WEB_* setting and can be overridden on the
+command line (`python -m app --help`).
+
+On SIGTERM (or Ctrl+C) each worker stops accepting connections, lets the
+requests in flight finish for up to WEB_GRACEFUL_TIMEOUT seconds, so a
+`create_patient` transaction is committed or rolled back rather than cut
+off, and then runs the lifespan shutdown, which flushes the outbox to
+Celery before the process exits. Give the container a longer stop grace
+period than WEB_GRACEFUL_TIMEOUT.
+
+What is shared between workers and what is not:
+
+- Prometheus metrics are aggregated over the workers through files in
+  PROMETHEUS_MULTIPROC_DIR (a fresh temporary directory unless set; a set
+  one is emptied at start).
+- Token revocations, the response cache and replica stickiness go
+  through Redis; the token cache and the slow request log
+  (GET /admin/slow-requests) are per worker.
+- SQLITE_PROFILE=performance serializes writes through one connection per
+  process, which only holds with a single worker, so on SQLite that
+  profile runs one worker and refuses --workers above 1.
+"""
+import argparse
+import glob
+import importlib.util
+import os
+import tempfile
+
+os.environ.setdefault("STARTUP_MODE", "production")
+
+import uvicorn # type: ignore
+from sqlalchemy.engine import make_url # type: ignore
+from app.core.config import settings
+
+def _check_installed(parser: argparse.ArgumentParser, option: str, module: str):
+    if importlib.util.find_spec(module) is None:
+        parser.error(f"{option} {module} needs the {module} package (pip install {module})")
+
+def _single_sqlite_writer() -> bool:
+    """Whether the SQLite performance profile (one writer connection per process) is in use."""
+    return settings.SQLITE_PROFILE == "performance" and make_url(settings.DATABASE_URL).get_backend_name() == "sqlite"
+
+def _prepare_metrics_dir():
+    """Point every worker at one empty multiprocess metrics directory."""
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for stale in glob.glob(os.path.join(directory, "*.db")):  # files of a previous run
+            os.remove(stale)
+    else:
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="prometheus-")
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m app", description="Run the API with multiple uvicorn workers.")
+    parser.add_argument("--host", default=settings.WEB_HOST)
+    parser.add_argument("--port", type=int, default=settings.WEB_PORT)
+    parser.add_argument("--workers", type=int, default=settings.WEB_WORKERS, help="processes, 0 = one per CPU core")
+    parser.add_argument("--loop", choices=["auto", "asyncio", "uvloop"], default=settings.WEB_LOOP)
+    parser.add_argument("--http", choices=["auto", "h11", "httptools"], default=settings.WEB_HTTP)
+    parser.add_argument("--keep-alive", type=int, default=settings.WEB_KEEP_ALIVE, help="seconds")
+    parser.add_argument("--backlog", type=int, default=settings.WEB_BACKLOG)
+    parser.add_argument("--graceful-timeout", type=int, default=settings.WEB_GRACEFUL_TIMEOUT, help="seconds")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    if args.loop == "uvloop":
+        _check_installed(parser, "--loop", "uvloop")
+    if args.http == "httptools":
+        _check_installed(parser, "--http", "httptools")
+
+    workers = args.workers or os.cpu_count() or 1
+    if _single_sqlite_writer():
+        if args.workers > 1:
+            parser.error("SQLITE_PROFILE=performance has one writer connection per process: use --workers 1 on SQLite")
+        workers = 1
+    if workers > 1 and settings.METRICS_ENABLED:
+        _prepare_metrics_dir()
+
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        loop=args.loop,
+        http=args.http,
+        timeout_keep_alive=args.keep_alive,
+        backlog=args.backlog,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        log_level=args.log_level,
+    )
+
+if __name__ == "__main__":
+    main()
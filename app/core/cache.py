@@ -0,0 +1,215 @@
+"""
+Two-tier read-through cache for serialized API payloads.
+
+L1 is a small in-process LRU with a short TTL, L2 is the Redis instance
+already deployed for Celery. Keys embed a per-doctor version number, so a
+write drops every cached entry of that doctor in O(1) by incrementing the
+version; stale entries simply expire. Concurrent misses on the same key in
+one process share a single load (single-flight).
+
+Redis is optional at runtime: when it is unreachable the cache backs off for
+a few seconds and reads fall through to L1 and the database.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+import redis # type: ignore
+from redis import asyncio as aioredis # type: ignore
+from redis.exceptions import RedisError # type: ignore
+from app.core import replicas
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+REDIS_BACKOFF_SECONDS = 5
+
+class LocalCache:
+    """Bounded in-process LRU whose entries expire after `ttl` seconds."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: str, value):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+_l1 = LocalCache(settings.CACHE_L1_MAX_SIZE, settings.CACHE_L1_TTL)
+_inflight: dict = {}        # key -> Future of the load in progress, None if it was abandoned
+_redis = None
+_redis_down_until = 0.0
+_sync_redis = None  # invalidate_doctor_sync
+
+def _get_redis():
+    """Return the Redis client, or None while Redis is disabled or backing off."""
+    global _redis
+    if not settings.CACHE_ENABLED or time.monotonic() < _redis_down_until:
+        return None
+    if _redis is None:
+        _redis = aioredis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=0.5,
+            socket_timeout=0.5,
+        )
+    return _redis
+
+def _mark_redis_down(exc: Exception):
+    global _redis_down_until
+    logger.warning("Redis cache unavailable, bypassing for %ss: %s", REDIS_BACKOFF_SECONDS, exc)
+    _redis_down_until = time.monotonic() + REDIS_BACKOFF_SECONDS
+
+def _version_key(doctor_id: int) -> str:
+    return f"cache:doctor:{doctor_id}:version"
+
+async def doctor_version(doctor_id: int) -> int:
+    """
+    Current cache version of a doctor's data.
+
+    Args:
+        doctor_id (int): Doctor whose version is read.
+
+    Returns:
+        int: Version number, 0 if the doctor was never invalidated.
+    """
+    key = _version_key(doctor_id)
+    version = _l1.get(key)
+    if version is not None:
+        return version
+    version = 0
+    client = _get_redis()
+    if client is not None:
+        try:
+            version = int(await client.get(key) or 0)
+        except (RedisError, OSError) as exc:
+            _mark_redis_down(exc)
+    _l1.set(key, version)
+    return version
+
+async def invalidate_doctor(doctor_id: int):
+    """
+    Drop every cached entry of a doctor by bumping their version.
+
+    Other processes notice the new version once their L1 copy of it expires
+    (CACHE_L1_TTL); this process sees it immediately. With read replicas the
+    doctor's reads are also pinned to the primary for a short while.
+
+    Args:
+        doctor_id (int): Doctor whose cached data changed.
+    """
+    await replicas.mark_written(doctor_id)  # the doctor's next reads must see this write
+    key = _version_key(doctor_id)
+    version = (_l1.get(key) or 0) + 1
+    client = _get_redis()
+    if client is not None:
+        try:
+            version = max(version, int(await client.incr(key)))
+        except (RedisError, OSError) as exc:
+            _mark_redis_down(exc)
+    _l1.set(key, version)
+
+def invalidate_doctor_sync(doctor_id: int):
+    """
+    `invalidate_doctor` for synchronous code outside the API, e.g. Celery jobs.
+
+    Only Redis is bumped; API processes pick the new version up within
+    CACHE_L1_TTL.
+    """
+    global _sync_redis
+    if not settings.CACHE_ENABLED:
+        return
+    if _sync_redis is None:
+        _sync_redis = redis.Redis.from_url(settings.REDIS_URL, socket_connect_timeout=0.5, socket_timeout=0.5)
+    try:
+        _sync_redis.incr(_version_key(doctor_id))
+    except (RedisError, OSError) as exc:
+        logger.warning("Redis cache unavailable, doctor %s not invalidated: %s", doctor_id, exc)
+
+def doctor_key(doctor_id: int, version: int, *parts) -> str:
+    """Build a versioned cache key for data owned by a doctor."""
+    return ":".join(["cache:doctor", str(doctor_id), f"v{version}", *map(str, parts)])
+
+async def _load_through(key: str, loader: Callable[[], Awaitable[str]]) -> str:
+    client = _get_redis()
+    if client is not None:
+        try:
+            cached = await client.get(key)
+            if cached is not None:
+                return cached.decode()
+        except (RedisError, OSError) as exc:
+            _mark_redis_down(exc)
+            client = None
+
+    payload = await loader()
+    if client is not None:
+        try:
+            await client.set(key, payload, ex=settings.CACHE_TTL)
+        except (RedisError, OSError) as exc:
+            _mark_redis_down(exc)
+    return payload
+
+async def get_or_load(key: str, loader: Callable[[], Awaitable[str]]) -> str:
+    """
+    Return the payload cached under `key`, loading it on a miss.
+
+    Lookup order is L1, Redis, then `loader`; a loaded payload is written
+    back to both tiers. Exceptions raised by `loader` (e.g. a 404) are not
+    cached and are re-raised to every caller waiting on the same key. If the
+    caller doing the load is cancelled (its client went away), the callers
+    waiting on it load the payload themselves instead.
+
+    Args:
+        key (str): Versioned cache key, see `doctor_key`.
+        loader (Callable): Coroutine function returning the serialized payload.
+
+    Returns:
+        str: Serialized payload.
+    """
+    if not settings.CACHE_ENABLED:
+        return await loader()
+
+    while True:
+        payload = _l1.get(key)
+        if payload is not None:
+            return payload
+        pending: Optional[asyncio.Future] = _inflight.get(key)
+        if pending is None:
+            break
+        payload = await asyncio.shield(pending)
+        if payload is not None:
+            return payload
+        # None: the load was abandoned, try again (one of the waiters takes it over)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        payload = await _load_through(key, loader)
+    except asyncio.CancelledError:
+        future.set_result(None)  # wake the waiters without failing them
+        raise
+    except Exception as exc:
+        future.set_exception(exc)
+        future.exception()  # retrieved: no "never retrieved" warning when nobody waits
+        raise
+    finally:
+        _inflight.pop(key, None)
+    _l1.set(key, payload)
+    future.set_result(payload)
+    return payload
@@ -1,13 +1,52 @@
-from dotenv import load_dotenv
+"""
+Celery application.
+
+Tasks are routed to two queues so heavy work never sits in front of
+notifications:
+
+- `notifications` (default): the email tasks, short and I/O bound;
+- `jobs`: counter reconciliation, doctor deletion and other long jobs.
+
+docker-compose runs one worker per queue; the pool, concurrency and prefetch
+of each come from Settings (CELERY_*), i.e. from the worker's environment.
+Messages are acknowledged after the task ran (acks_late), so a worker that
+dies mid-task gets its messages redelivered instead of losing them; tasks
+already have to tolerate that since the outbox delivers at least once.
+"""
 from celery import Celery
-import os
+from kombu import Exchange, Queue # type: ignore
+from app.core.config import settings
 
-load_dotenv()
-REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+NOTIFICATIONS_QUEUE = "notifications"
+JOBS_QUEUE = "jobs"
+
+def _queue(name: str) -> Queue:
+    # own exchange and routing key; a bare Queue(name) is bound to the default queue's
+    return Queue(name, Exchange(name, type="direct"), routing_key=name)
 
 celery_app = Celery(
     "backend_worker",
-    broker=REDIS_URL,
-    #backend=REDIS_URL,   # optional result backend
+    broker=settings.REDIS_URL,
+    #backend=settings.REDIS_URL,   # optional result backend
+)
+celery_app.conf.update(
+    task_queues=(_queue(NOTIFICATIONS_QUEUE), _queue(JOBS_QUEUE)),
+    task_default_queue=NOTIFICATIONS_QUEUE,
+    task_routes={
+        "app.services.celery_task.reconcile_counters": {"queue": JOBS_QUEUE},
+        "app.services.celery_task.delete_doctor": {"queue": JOBS_QUEUE},
+    },
+    task_ignore_result=True,             # no result backend, nothing reads results
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,     # requeue, not drop, when a prefork child is killed
+    worker_pool=settings.CELERY_POOL,
+    worker_concurrency=settings.CELERY_CONCURRENCY,
+    worker_prefetch_multiplier=settings.CELERY_PREFETCH_MULTIPLIER,
 )
 celery_app.autodiscover_tasks(["app.services.celery_task"])
+
+if settings.METRICS_ENABLED:
+    # the API imports this module lazily (first outbox publish), so the publish
+    # metrics are hooked up here rather than when app.core.metrics loads
+    from app.core.metrics import instrument_celery
+    instrument_celery()
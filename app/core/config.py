@@ -4,6 +4,7 @@ Application configuration using environment variables.
 Defines the Settings class to load configuration values (e.g., DATABASE_URL)
 from a .env file or system environment for flexible deployment.
 """
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -11,6 +12,99 @@ class Settings(BaseSettings):
     REDIS_URL: str
     SMTP_USER: str
     SMTP_PASS: str
+
+    # "production": skip create_all when Alembic is at head
+    STARTUP_MODE: Literal["development", "production"] = "development"
+    STARTUP_WARM_UP: bool = False        # open the DB pools and bcrypt workers before serving
+
+    # Production server (`python -m app`)
+    WEB_HOST: str = "0.0.0.0"
+    WEB_PORT: int = 8000
+    WEB_WORKERS: int = 0                 # processes, 0 = one per CPU core
+    WEB_LOOP: Literal["auto", "asyncio", "uvloop"] = "auto"     # auto = uvloop when installed
+    WEB_HTTP: Literal["auto", "h11", "httptools"] = "auto"      # auto = httptools when installed
+    WEB_KEEP_ALIVE: int = 5              # seconds an idle keep-alive connection stays open
+    WEB_BACKLOG: int = 2048              # pending connections queued by the listening socket
+    WEB_GRACEFUL_TIMEOUT: int = 30       # seconds in-flight requests get to finish on SIGTERM
+    THREADPOOL_SIZE: int = 40            # threads for sync dependencies (token checks) and run_in_threadpool
+
+    # Async engine (defaults to DATABASE_URL with its async driver)
+    ASYNC_DATABASE_URL: Optional[str] = None
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30        # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800      # seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+
+    # Read replicas for the GET endpoints (comma-separated URLs, empty = everything on the primary)
+    DATABASE_REPLICA_URLS: str = ""
+    REPLICA_STICKY_SECONDS: float = 5.0  # a doctor's reads stay on the primary this long after a write
+    REPLICA_HEALTH_INTERVAL: float = 5.0 # seconds between replica health checks
+    REPLICA_MAX_LAG: float = 10.0        # seconds of replay lag before a PostgreSQL replica is skipped
+
+    # SQLite tuning: "performance" enables WAL pragmas and a single writer connection
+    SQLITE_PROFILE: Literal["default", "performance"] = "default"
+    SQLITE_MMAP_SIZE: int = 268435456   # bytes
+    SQLITE_CACHE_SIZE: int = -65536      # negative = KiB
+    SQLITE_BUSY_TIMEOUT: int = 5000      # milliseconds
+    SQLITE_READ_POOL_SIZE: int = 4
+
+    # Password hashing (bcrypt runs in a dedicated process pool)
+    BCRYPT_ROUNDS: int = 12              # stored hashes with another cost are rehashed on login
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32  # queued hash/verify calls before answering 503
+    PASSWORD_HASH_RETRY_AFTER: int = 1   # seconds, sent in Retry-After
+    TOKEN_REVOCATION_CHECK_TTL: float = 2.0  # seconds a worker reuses its last lookup of a doctor's revocation
+
+    # Read-through cache (in-process L1 in front of Redis)
+    CACHE_ENABLED: bool = True
+    CACHE_TTL: int = 300                 # seconds, Redis entries
+    CACHE_L1_TTL: float = 2.0            # seconds, bounds cross-process staleness
+    CACHE_L1_MAX_SIZE: int = 1024
+
+    # Email delivery (Celery worker)
+    SMTP_TRANSPORT: Literal["smtp", "console"] = "smtp"
+    SMTP_HOST: str = "smtp.gmail.com"
+    SMTP_PORT: int = 587
+    SMTP_STARTTLS: bool = True
+    SMTP_TIMEOUT: float = 10
+    SMTP_IDLE_TIMEOUT: float = 60        # seconds idle before a pooled connection is probed
+    SMTP_POOL_SIZE: int = 2              # connections per worker process
+    NOTIFY_DIGEST_WINDOW: int = 30       # seconds to coalesce per-doctor notifications, 0 = send each
+    EMAIL_RATE_LIMIT: Optional[str] = "10/s"  # per email task and worker ("10/s", "300/m"), unset = none
+    EMAIL_MAX_RETRIES: int = 5           # retries of a temporary SMTP failure
+    EMAIL_RETRY_BACKOFF_MAX: int = 600   # seconds, cap of the exponential retry delay
+
+    # Celery workers (one per queue in docker-compose, tuned through their environment)
+    CELERY_POOL: Literal["prefork", "threads", "solo"] = "threads"  # threads suit the I/O-bound email tasks
+    CELERY_CONCURRENCY: int = 8
+    CELERY_PREFETCH_MULTIPLIER: int = 1  # messages reserved per slot; 1 stops long tasks hoarding the queue
+
+    # Idempotency-Key support for retried writes (stored in Redis)
+    IDEMPOTENCY_TTL: int = 86400         # seconds a stored response can be replayed
+    IDEMPOTENCY_LOCK_TTL: int = 30       # seconds a key stays claimed by an in-flight request
+
+    # Transactional outbox relay (Celery dispatch after commit)
+    OUTBOX_RELAY_ENABLED: bool = True
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL: float = 1.0    # seconds between polls when idle
+    OUTBOX_CLAIM_TIMEOUT: int = 30       # seconds before an unacknowledged claim is retried
+    OUTBOX_MAX_ATTEMPTS: int = 10        # claims before a message is marked failed
+
+    # Doctor account deletion (background job)
+    DOCTOR_DELETE_CHUNK_SIZE: int = 1000  # patients reassigned/deleted per transaction
+    DOCTOR_DELETE_STALE_AFTER: int = 300  # seconds without a chunk before a running job is taken over
+
+    # Instrumentation
+    METRICS_ENABLED: bool = True         # request/DB/Celery metrics and GET /metrics
+    SERVER_TIMING: bool = False          # add a Server-Timing header (app and db time) to responses
+
+    # Slow request log (GET /admin/slow-requests)
+    SLOW_REQUEST_MS: float = 0           # requests slower than this are logged with their SQL, 0 = off
+    SLOW_REQUEST_LOG_SIZE: int = 100     # entries kept in memory per process
+    SLOW_REQUEST_MAX_STATEMENTS: int = 50  # SQL statements captured per request
+    SLOW_REQUEST_PROFILE_RATE: float = 0.0  # fraction of requests run under cProfile
+    ADMIN_TOKEN: Optional[str] = None    # X-Admin-Token for the /admin endpoints, unset = disabled
     class Config:
         env_file = ".env"
 
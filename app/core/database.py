@@ -3,10 +3,26 @@ Database configuration and session management.
 
 Creates the SQLAlchemy engine, session factory, and base model class,
 and provides a dependency to yield a database session per request.
+The async engine and `get_async_db` dependency are used by the routes,
+so requests waiting on the database do not hold a threadpool slot.
+
+With `SQLITE_PROFILE=performance` on a SQLite file, connections are tuned
+with WAL pragmas, reads go through a pool of read-only connections and
+writes (`get_async_write_db`) through a single serialized writer
+connection, so writers never fight each other for the database lock.
+
+`schema_at_head` and `warm_up_pools` serve the production startup mode;
+`dispose_pools` closes the connections when the server drains.
 """
-from sqlalchemy import create_engine # type: ignore
+import asyncio
+from typing import Optional
+from sqlalchemy import create_engine, event, text # type: ignore
+from sqlalchemy.engine import make_url # type: ignore
+from sqlalchemy.exc import DBAPIError # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine # type: ignore
 from sqlalchemy.orm import sessionmaker, declarative_base # type: ignore
 from app.core.config import settings
+from app.core.schema_head import ALEMBIC_HEAD
 
 engine = create_engine(
     settings.DATABASE_URL,
@@ -20,4 +36,174 @@ def get_db():
     try:
         yield db   
     finally:
-        db.close()  
\ No newline at end of file
+        db.close()  
+
+# Sync driver -> asyncio driver used when ASYNC_DATABASE_URL is not set
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+}
+
+def async_database_url(database_url: Optional[str] = None):
+    """
+    Resolve the URL of the async engine.
+
+    Uses `database_url` (e.g. a replica) when given, else `ASYNC_DATABASE_URL`
+    when set, otherwise `DATABASE_URL`, with its driver swapped for the
+    matching asyncio driver.
+
+    Returns:
+        URL: SQLAlchemy URL with an asyncio driver.
+    """
+    url = make_url(database_url or settings.ASYNC_DATABASE_URL or settings.DATABASE_URL)
+    if url.drivername in ASYNC_DRIVERS:
+        url = url.set(drivername=ASYNC_DRIVERS[url.drivername])
+    return url
+
+def _is_sqlite_memory(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+def pool_kwargs(url) -> dict:
+    """Pool settings for the async engine; in-memory SQLite uses a single static connection."""
+    kwargs = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    if _is_sqlite_memory(url):
+        return kwargs
+    kwargs.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+    return kwargs
+
+def sqlite_performance_enabled(url) -> bool:
+    """True when the SQLite performance profile applies to `url`."""
+    return (
+        settings.SQLITE_PROFILE == "performance"
+        and url.get_backend_name() == "sqlite"
+        and not _is_sqlite_memory(url)
+    )
+
+def sqlite_pragmas(read_only: bool):
+    """
+    Build a `connect` listener applying the performance pragmas.
+
+    Args:
+        read_only (bool): Also set `query_only` so the connection can never write.
+    """
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")   # persistent, readers no longer block on writers
+        cursor.execute("PRAGMA synchronous=NORMAL") # fsync on checkpoint only, safe with WAL
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.execute(f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT)}")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+    return on_connect
+
+def _use_immediate_transactions(sync_engine):
+    """
+    Start every writer transaction with BEGIN IMMEDIATE.
+
+    The write lock is taken up front instead of being upgraded from a read
+    lock mid-transaction, which SQLite cannot retry and reports as
+    "database is locked".
+    """
+    @event.listens_for(sync_engine, "connect")
+    def disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(sync_engine, "begin")
+    def begin_immediate(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+if sqlite_performance_enabled(engine.url):
+    event.listen(engine, "connect", sqlite_pragmas(read_only=False))
+
+_async_url = async_database_url()
+if sqlite_performance_enabled(_async_url):
+    async_engine = create_async_engine(
+        _async_url,
+        pool_size=settings.SQLITE_READ_POOL_SIZE,
+        max_overflow=0,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    event.listen(async_engine.sync_engine, "connect", sqlite_pragmas(read_only=True))
+
+    # one connection: writes queue on the pool instead of on the file lock
+    async_write_engine = create_async_engine(
+        _async_url,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    event.listen(async_write_engine.sync_engine, "connect", sqlite_pragmas(read_only=False))
+    _use_immediate_transactions(async_write_engine.sync_engine)
+else:
+    async_engine = create_async_engine(_async_url, **pool_kwargs(_async_url))
+    async_write_engine = async_engine
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,  # no implicit IO when a committed object is serialized
+)
+AsyncWriteSessionLocal = async_sessionmaker(
+    bind=async_write_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+def schema_at_head() -> bool:
+    """
+    Whether the database is at the latest Alembic revision.
+
+    One read of the `alembic_version` table, compared with the head
+    recorded in `app.core.schema_head`; neither Alembic nor the migration
+    scripts are loaded.
+    """
+    try:
+        with engine.connect() as conn:
+            versions = conn.execute(text("SELECT version_num FROM alembic_version")).scalars().all()
+    except DBAPIError:  # no alembic_version table: never migrated
+        return False
+    return versions == [ALEMBIC_HEAD]
+
+async def warm_up_pools():
+    """Open the async pools' connections now rather than on the first requests."""
+    async def touch(async_eng):
+        async with async_eng.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    engines = {async_engine, async_write_engine}
+    for async_eng in engines:
+        size = async_eng.pool.size() if hasattr(async_eng.pool, "size") else 1
+        # held concurrently, so each one is a separate connection
+        await asyncio.gather(*(touch(async_eng) for _ in range(size)))
+
+async def dispose_pools():
+    """Close the pooled connections (at shutdown, once the last request is done)."""
+    for async_eng in {async_engine, async_write_engine}:
+        await async_eng.dispose()
+    engine.dispose()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_write_db():
+    async with AsyncWriteSessionLocal() as db:
+        yield db
@@ -0,0 +1,111 @@
+"""
+Idempotency-Key support for write endpoints.
+
+The first request with a given key claims it (a short-lived Redis lock),
+runs, and stores its status and body under the key for IDEMPOTENCY_TTL;
+a retry with the same key and the same request gets the stored response
+back instead of running again. Keys are scoped per doctor, reusing a key
+for a different request is rejected with 422, and a retry that arrives
+while the first attempt is still running gets 409.
+
+Without Redis the endpoints still work, just without replay protection.
+"""
+import hashlib
+import json
+import logging
+import time
+from typing import Optional
+from fastapi import HTTPException
+from redis import asyncio as aioredis # type: ignore
+from redis.exceptions import RedisError # type: ignore
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+REDIS_BACKOFF_SECONDS = 5
+
+_redis = None
+_redis_down_until = 0.0
+
+def _get_redis():
+    global _redis
+    if time.monotonic() < _redis_down_until:
+        return None
+    if _redis is None:
+        _redis = aioredis.from_url(settings.REDIS_URL, socket_connect_timeout=0.5, socket_timeout=0.5)
+    return _redis
+
+def _mark_redis_down(exc: Exception):
+    global _redis_down_until
+    logger.warning("Redis unavailable, Idempotency-Key not enforced for %ss: %s", REDIS_BACKOFF_SECONDS, exc)
+    _redis_down_until = time.monotonic() + REDIS_BACKOFF_SECONDS
+
+def fingerprint(*parts: str) -> str:
+    """Hash identifying a request, e.g. its path and canonical body."""
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+def _key(doctor_id: int, idempotency_key: str) -> str:
+    return f"idempotency:{doctor_id}:{idempotency_key}"
+
+async def begin(doctor_id: int, idempotency_key: str, request_fingerprint: str) -> Optional[dict]:
+    """
+    Claim `idempotency_key` or return the response stored under it.
+
+    Args:
+        doctor_id (int): Doctor the key belongs to.
+        idempotency_key (str): Value of the Idempotency-Key header.
+        request_fingerprint (str): `fingerprint` of the request.
+
+    Returns:
+        dict | None: Stored `status` and `body` to replay, or None if the caller
+        claimed the key and must run the request, then call `complete` or `release`.
+
+    Raises:
+        HTTPException: 422 if the key was used for another request, 409 if a
+        request with the key is still running.
+    """
+    client = _get_redis()
+    if client is None:
+        return None
+    key = _key(doctor_id, idempotency_key)
+    try:
+        stored = await client.get(key)
+        if stored is None:
+            if not await client.set(f"{key}:lock", 1, nx=True, ex=settings.IDEMPOTENCY_LOCK_TTL):
+                raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is in progress")
+            # it may have completed between the GET and the lock
+            stored = await client.get(key)
+            if stored is not None:
+                await client.delete(f"{key}:lock")
+    except (RedisError, OSError) as exc:
+        _mark_redis_down(exc)
+        return None
+    if stored is None:
+        return None
+    response = json.loads(stored)
+    if response["fingerprint"] != request_fingerprint:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+    return response
+
+async def complete(doctor_id: int, idempotency_key: str, request_fingerprint: str, status: int, body: str):
+    """Store the response of a claimed key and release the claim."""
+    client = _get_redis()
+    if client is None:
+        return
+    key = _key(doctor_id, idempotency_key)
+    payload = json.dumps({"fingerprint": request_fingerprint, "status": status, "body": body})
+    try:
+        await client.set(key, payload, ex=settings.IDEMPOTENCY_TTL)
+        await client.delete(f"{key}:lock")
+    except (RedisError, OSError) as exc:
+        _mark_redis_down(exc)
+
+async def release(doctor_id: int, idempotency_key: str):
+    """Release a claimed key without storing a response (the request failed)."""
+    client = _get_redis()
+    if client is None:
+        return
+    try:
+        await client.delete(f"{_key(doctor_id, idempotency_key)}:lock")
+    except (RedisError, OSError) as exc:
+        _mark_redis_down(exc)
@@ -0,0 +1,215 @@
+"""
+Prometheus instrumentation.
+
+- MetricsMiddleware (pure ASGI) records a latency histogram per route
+  template and status, the number of in-flight requests and, when
+  SERVER_TIMING is on, a `Server-Timing` header with app and DB time.
+- SQLAlchemy cursor events count the queries of each request and their
+  time; the per-request totals land in histograms, so an N+1 shows up as
+  a route whose query count grows with its result size.
+- Celery publish signals time every task enqueue (outbox relay included);
+  they are connected by `app.core.celery` when Celery is first imported.
+- The threadpool, password pool and token cache are sampled at scrape time.
+
+With several worker processes (`python -m app`), the launcher sets
+PROMETHEUS_MULTIPROC_DIR: every worker then writes its metrics to files in
+that directory and `render()` aggregates all of them, so a scrape sees the
+whole server whichever worker answers it. The scrape-time samples are
+per process and labelled with the pid of the worker that took them.
+
+Per-request numbers live in a RequestStats object held in a context
+variable; SQLAlchemy's async greenlets and Starlette's threadpool both run
+with the request's context, so queries are attributed to the right request.
+`render()` produces the text served on GET /metrics.
+"""
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+import anyio.to_thread
+from prometheus_client import ( # type: ignore
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily # type: ignore
+from sqlalchemy import event # type: ignore
+from sqlalchemy.engine import Engine # type: ignore
+
+__all__ = [
+    "CONTENT_TYPE_LATEST", "MetricsMiddleware", "RequestStats", "current_stats", "instrument_celery",
+    "mark_process_dead", "render",
+]
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being processed", multiprocess_mode="livesum")
+REQUEST_QUERIES = Histogram(
+    "db_queries_per_request", "SQL statements executed per HTTP request", ["route"], buckets=QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_TIME = Histogram(
+    "db_time_per_request_seconds", "Time spent in SQL statements per HTTP request", ["route"], buckets=LATENCY_BUCKETS
+)
+QUERY_LATENCY = Histogram("db_query_duration_seconds", "SQL statement latency", buckets=LATENCY_BUCKETS)
+CELERY_PUBLISH_LATENCY = Histogram(
+    "celery_publish_duration_seconds", "Time to publish a task to the broker", ["task"], buckets=LATENCY_BUCKETS
+)
+CELERY_PUBLISHED = Counter("celery_tasks_published", "Tasks published to the broker", ["task"])
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_time: float = 0.0
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def current_stats() -> Optional[RequestStats]:
+    """Stats of the request being handled, None outside a request."""
+    return _request_stats.get()
+
+# SQLAlchemy: count and time every statement of every engine
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    QUERY_LATENCY.observe(elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += elapsed
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+# Celery: publish latency, paired by task id (both signals run in the publishing thread)
+
+_publish_started: dict = {}
+
+def _before_publish(sender=None, headers=None, **kwargs):
+    if headers and "id" in headers:
+        if len(_publish_started) > 10_000:
+            _publish_started.clear()  # publishes that raised never reach after_task_publish
+        _publish_started[headers["id"]] = time.perf_counter()
+
+def _after_publish(sender=None, headers=None, **kwargs):
+    started = _publish_started.pop(headers.get("id"), None) if headers else None
+    if started is not None:
+        CELERY_PUBLISH_LATENCY.labels(sender).observe(time.perf_counter() - started)
+    CELERY_PUBLISHED.labels(sender).inc()
+
+def instrument_celery():
+    """Connect the publish signals (importing celery.signals costs ~40 ms, so not at import time)."""
+    from celery.signals import after_task_publish, before_task_publish
+
+    before_task_publish.connect(_before_publish, weak=False, dispatch_uid="metrics.before_publish")
+    after_task_publish.connect(_after_publish, weak=False, dispatch_uid="metrics.after_publish")
+
+# Scrape-time gauges
+
+def _sample(family, name: str, documentation: str, value):
+    """A metric family of one sample, labelled with the pid when several workers share the metrics."""
+    if not MULTIPROCESS:
+        return family(name, documentation, value=value)
+    metric = family(name, documentation, labels=["pid"])
+    metric.add_metric([str(os.getpid())], value)
+    return metric
+
+class _RuntimeCollector:
+    """Samples the password pool and the token cache when /metrics is scraped."""
+
+    def collect(self):
+        from app.core import security
+
+        yield _sample(
+            GaugeMetricFamily, "password_hash_pending", "bcrypt hash/verify calls queued or running",
+            security._password_pending,
+        )
+        stats = security.token_cache_stats()
+        yield _sample(CounterMetricFamily, "token_cache_hits", "Verified JWT cache hits", stats["hits"])
+        yield _sample(CounterMetricFamily, "token_cache_misses", "Verified JWT cache misses", stats["misses"])
+        yield _sample(GaugeMetricFamily, "token_cache_size", "Verified JWTs cached", stats["size"])
+
+_runtime_collector = _RuntimeCollector()
+REGISTRY.register(_runtime_collector)
+
+# per worker (pid label) in multiprocess mode, dropped when the worker exits
+THREADPOOL_IN_USE = Gauge(
+    "threadpool_in_use", "Worker threads busy with sync routes and run_in_threadpool", multiprocess_mode="liveall"
+)
+THREADPOOL_SIZE = Gauge("threadpool_size", "Worker thread limit of the default threadpool", multiprocess_mode="liveall")
+THREADPOOL_WAITING = Gauge("threadpool_waiting", "Tasks waiting for a worker thread", multiprocess_mode="liveall")
+
+def _sample_threadpool():
+    # must run on the event loop: the limiter is per loop
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    statistics = limiter.statistics()
+    THREADPOOL_IN_USE.set(statistics.borrowed_tokens)
+    THREADPOOL_SIZE.set(statistics.total_tokens)
+    THREADPOOL_WAITING.set(statistics.tasks_waiting)
+
+def render() -> bytes:
+    """Prometheus text exposition of every metric (of every worker); call from the event loop."""
+    _sample_threadpool()
+    if not MULTIPROCESS:
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(_runtime_collector)
+    return generate_latest(registry)
+
+def mark_process_dead():
+    """Drop this worker's live gauges from the shared metrics (at shutdown)."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+class MetricsMiddleware:
+    """ASGI middleware recording request metrics and the optional Server-Timing header."""
+
+    def __init__(self, app, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    elapsed = (time.perf_counter() - start) * 1000
+                    value = (f'app;dur={elapsed:.1f}, db;dur={stats.db_time * 1000:.1f};'
+                             f'desc="{stats.queries} queries"')
+                    message["headers"] = [*message.get("headers", []), (b"server-timing", value.encode())]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            _request_stats.reset(token)
+            route = scope.get("route")
+            template = route.path if route is not None else "unmatched"
+            REQUEST_LATENCY.labels(scope["method"], template, str(status)).observe(time.perf_counter() - start)
+            REQUEST_QUERIES.labels(template).observe(stats.queries)
+            REQUEST_DB_TIME.labels(template).observe(stats.db_time)
@@ -0,0 +1,197 @@
+"""
+Read-replica routing.
+
+With DATABASE_REPLICA_URLS set, the read-only GET endpoints get their session
+from `get_async_replica_db` / `get_doctor_replica_db`, bound to one of the
+replicas instead of the primary; writes keep going through
+`get_async_write_db`. Replicas are picked round-robin among the healthy ones
+and the primary is used when none is.
+
+Health: a background task started in the app lifespan runs `SELECT 1` on
+every replica each REPLICA_HEALTH_INTERVAL seconds (on PostgreSQL it also
+reads the replay lag and drops replicas behind by more than REPLICA_MAX_LAG);
+a connection error seen by a request takes the replica out of rotation until
+the next successful check.
+
+Read-your-writes: `mark_written` is called when a doctor's data changes, and
+for REPLICA_STICKY_SECONDS afterwards that doctor's reads stay on the
+primary. The marker is kept in this process and in Redis, so it holds across
+workers; without Redis it only holds within the process.
+"""
+import asyncio
+import itertools
+import logging
+import time
+from typing import Optional
+from fastapi import Depends, Request
+from redis import asyncio as aioredis # type: ignore
+from redis.exceptions import RedisError # type: ignore
+from sqlalchemy import event, text # type: ignore
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine # type: ignore
+from app.core.config import settings
+from app.core.database import (
+    AsyncSessionLocal, async_database_url, pool_kwargs, sqlite_performance_enabled, sqlite_pragmas,
+)
+from app.core.security import get_current_doctor_id
+
+logger = logging.getLogger(__name__)
+
+REDIS_BACKOFF_SECONDS = 5
+HEALTH_CHECK_TIMEOUT = 2.0   # seconds
+
+class Replica:
+    """One replica engine and its health."""
+
+    def __init__(self, url: str):
+        async_url = async_database_url(url)
+        self.name = async_url.render_as_string(hide_password=True)
+        self.engine: AsyncEngine = create_async_engine(async_url, **pool_kwargs(async_url))
+        if sqlite_performance_enabled(async_url):
+            event.listen(self.engine.sync_engine, "connect", sqlite_pragmas(read_only=True))
+        event.listen(self.engine.sync_engine, "handle_error", self._on_error)
+        self.healthy = True
+
+    def _on_error(self, context):
+        if context.is_disconnect or context.connection is None:
+            self.mark_down(context.original_exception)
+
+    def mark_down(self, reason):
+        if self.healthy:
+            logger.warning("Replica %s out of rotation: %s", self.name, reason)
+        self.healthy = False
+
+    async def check(self):
+        """Probe the replica and update `healthy`."""
+        try:
+            async with self.engine.connect() as conn:
+                if self.engine.dialect.name == "postgresql":
+                    lag = await conn.scalar(text(
+                        "SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+                    ))
+                    if lag > settings.REPLICA_MAX_LAG:
+                        self.mark_down(f"{lag:.1f}s behind")
+                        return
+                else:
+                    await conn.execute(text("SELECT 1"))
+        except Exception as exc:
+            self.mark_down(exc)
+            return
+        if not self.healthy:
+            logger.info("Replica %s back in rotation", self.name)
+        self.healthy = True
+
+_replicas = [Replica(url.strip()) for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+_round_robin = itertools.count()
+_sticky_until: dict = {}     # doctor_id -> monotonic deadline, this process
+_redis = None
+_redis_down_until = 0.0
+_health_task: Optional[asyncio.Task] = None
+
+def _get_redis():
+    global _redis
+    if time.monotonic() < _redis_down_until:
+        return None
+    if _redis is None:
+        _redis = aioredis.from_url(settings.REDIS_URL, socket_connect_timeout=0.5, socket_timeout=0.5)
+    return _redis
+
+def _mark_redis_down(exc: Exception):
+    global _redis_down_until
+    logger.warning("Redis unavailable, replica stickiness is per process for %ss: %s", REDIS_BACKOFF_SECONDS, exc)
+    _redis_down_until = time.monotonic() + REDIS_BACKOFF_SECONDS
+
+def _sticky_key(doctor_id: int) -> str:
+    return f"replica:sticky:{doctor_id}"
+
+async def mark_written(doctor_id: int):
+    """Keep `doctor_id`'s reads on the primary for REPLICA_STICKY_SECONDS."""
+    if not _replicas:
+        return
+    window = settings.REPLICA_STICKY_SECONDS
+    _sticky_until[doctor_id] = time.monotonic() + window
+    client = _get_redis()
+    if client is not None:
+        try:
+            await client.set(_sticky_key(doctor_id), 1, px=int(window * 1000))
+        except (RedisError, OSError) as exc:
+            _mark_redis_down(exc)
+
+async def _is_sticky(doctor_id: int) -> bool:
+    until = _sticky_until.get(doctor_id)
+    if until is not None:
+        if until > time.monotonic():
+            return True
+        del _sticky_until[doctor_id]
+    client = _get_redis()
+    if client is None:
+        return False
+    try:
+        return bool(await client.exists(_sticky_key(doctor_id)))
+    except (RedisError, OSError) as exc:
+        _mark_redis_down(exc)
+        return False
+
+def _pick() -> Optional[Replica]:
+    healthy = [replica for replica in _replicas if replica.healthy]
+    if not healthy:
+        return None
+    return healthy[next(_round_robin) % len(healthy)]
+
+async def read_engine(doctor_id: Optional[int] = None) -> Optional[AsyncEngine]:
+    """
+    Engine for a read on behalf of `doctor_id`.
+
+    Returns:
+        AsyncEngine | None: A healthy replica, or None for the primary (no
+        replica configured or healthy, or the doctor wrote recently).
+    """
+    if not _replicas:
+        return None
+    if doctor_id is not None and await _is_sticky(doctor_id):
+        return None
+    replica = _pick()
+    return replica.engine if replica is not None else None
+
+async def _open_session(doctor_id: Optional[int]):
+    engine = await read_engine(doctor_id)
+    return AsyncSessionLocal(bind=engine) if engine is not None else AsyncSessionLocal()
+
+async def get_async_replica_db(request: Request):
+    """Read-only session for the doctor in the path (`{doctor_id}`), if any."""
+    doctor_id = request.path_params.get("doctor_id")
+    async with await _open_session(int(doctor_id) if doctor_id is not None else None) as db:
+        yield db
+
+async def get_doctor_replica_db(doctor_id: int = Depends(get_current_doctor_id)):
+    """Read-only session for the authenticated doctor."""
+    async with await _open_session(doctor_id) as db:
+        yield db
+
+async def _health_loop():
+    while True:
+        results = await asyncio.gather(
+            *(asyncio.wait_for(replica.check(), HEALTH_CHECK_TIMEOUT) for replica in _replicas),
+            return_exceptions=True,
+        )
+        for replica, result in zip(_replicas, results):
+            if isinstance(result, asyncio.TimeoutError):
+                replica.mark_down("health check timed out")
+        await asyncio.sleep(settings.REPLICA_HEALTH_INTERVAL)
+
+def start_health_checks():
+    """Start probing the replicas as a background task of the running event loop."""
+    global _health_task
+    if _replicas and _health_task is None:
+        _health_task = asyncio.create_task(_health_loop())
+
+async def stop_health_checks():
+    global _health_task
+    if _health_task is not None:
+        _health_task.cancel()
+        try:
+            await _health_task
+        except asyncio.CancelledError:
+            pass
+        _health_task = None
+    for replica in _replicas:
+        await replica.engine.dispose()
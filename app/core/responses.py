@@ -0,0 +1,43 @@
+"""
+Response classes for the JSON fast path.
+
+ORJSONResponse is the application's default response class, so plain dict
+and list results are encoded by orjson instead of the stdlib json module.
+RawJSONResponse sends a body that is already serialized JSON (e.g. a cached
+payload) as-is: returning a Response makes FastAPI skip response_model
+validation and encoding entirely.
+
+`etag`, `etag_matches` and `not_modified` implement conditional GETs: a
+response carries a strong ETag built from row versions, and a request whose
+If-None-Match still matches gets an empty 304.
+"""
+from typing import Optional
+import orjson # type: ignore
+from fastapi.responses import ORJSONResponse, Response
+
+__all__ = ["ORJSONResponse", "RawJSONResponse", "dumps", "etag", "etag_matches", "not_modified", "ETAG_CACHE_CONTROL"]
+
+# responses hold a doctor's own data: clients may keep them but must revalidate
+ETAG_CACHE_CONTROL = "private, no-cache"
+
+class RawJSONResponse(Response):
+    media_type = "application/json"
+
+def dumps(content) -> str:
+    """Serialize `content` with orjson (datetimes, enums and dataclasses included)."""
+    return orjson.dumps(content).decode()
+
+def etag(*parts) -> str:
+    """Strong ETag from the given parts, e.g. etag(7, 42) -> '"7-42"'."""
+    return '"' + "-".join(map(str, parts)) + '"'
+
+def etag_matches(if_none_match: Optional[str], tag: str) -> bool:
+    """Whether an If-None-Match header matches `tag` (weak comparison, as RFC 9110 asks for GET)."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == tag for candidate in candidates)
+
+def not_modified(tag: str) -> Response:
+    """Empty 304 Not Modified for `tag`."""
+    return Response(status_code=304, headers={"ETag": tag, "Cache-Control": ETAG_CACHE_CONTROL})
@@ -0,0 +1,32 @@
+"""
+Latest Alembic revision, known without loading the migration scripts.
+
+The production startup mode compares the `alembic_version` row with
+ALEMBIC_HEAD instead of parsing alembic/versions on every start. The
+constant is rewritten by `python -m app.core.schema_head`, which runs as an
+Alembic post-write hook after `alembic revision` (see alembic.ini) and in
+the Docker build, so it follows the migrations.
+"""
+import os
+import re
+
+ALEMBIC_HEAD = "c8d4e6f1a2b3"
+
+PACKAGE_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+def main():
+    """Write the current head of alembic/versions into this module."""
+    from alembic.script import ScriptDirectory
+
+    heads = ScriptDirectory(os.path.join(PACKAGE_ROOT, "alembic")).get_heads()
+    if len(heads) != 1:
+        raise SystemExit(f"expected one Alembic head, found {sorted(heads)}: merge them first")
+    with open(__file__) as source:
+        code = source.read()
+    code = re.sub(r'^ALEMBIC_HEAD = ".*"$', f'ALEMBIC_HEAD = "{heads[0]}"', code, count=1, flags=re.M)
+    with open(__file__, "w") as source:
+        source.write(code)
+    print(f"ALEMBIC_HEAD = {heads[0]}")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,37 @@
 from passlib.context import CryptContext # type: ignore
 from jose import jwt, JWTError # type: ignore
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+from typing import Optional
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
+from redis import asyncio as aioredis # type: ignore
+from redis.exceptions import RedisError # type: ignore
+from app.core.config import settings
+import asyncio
+import hashlib
+import logging
+import os
+import redis # type: ignore
+import threading
+import time
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min == max == default, so needs_update() flags hashes made with any other cost
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 SECRET_KEY = "supersecret"    # env se lena better
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+TOKEN_CACHE_MAX_SIZE = 10_000
+REDIS_BACKOFF_SECONDS = 5
+
+logger = logging.getLogger(__name__)
 
 def hash_password(password: str):
     """
@@ -19,8 +43,6 @@ def hash_password(password: str):
     Returns:
         str: Secure bcrypt hash of the password.
     """
-    print("Password received:", repr(password))
-
     return pwd_context.hash(password)
 
 def verify_password(plain: str, hashed: str):
@@ -36,6 +58,80 @@ def verify_password(plain: str, hashed: str):
     """
     return pwd_context.verify(plain, hashed)
 
+def verify_and_update_password(plain: str, hashed: str):
+    """
+    Verify a password and rehash it if the stored hash is outdated.
+
+    Args:
+        plain (str): Plain password provided by the user.
+        hashed (str): Previously stored bcrypt hash.
+
+    Returns:
+        tuple: (is_valid, new_hash), where new_hash is None unless the
+               stored hash uses a different cost factor and must be replaced.
+    """
+    return pwd_context.verify_and_update(plain, hashed)
+
+# bcrypt is CPU bound: run it in its own processes so it neither blocks the
+# event loop nor starves the threadpool shared by the sync routes
+_password_pool = None
+_password_pending = 0
+
+def _get_password_pool() -> ProcessPoolExecutor:
+    global _password_pool
+    if _password_pool is None:
+        _password_pool = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+    return _password_pool
+
+async def _run_in_password_pool(func, *args):
+    """
+    Run a hashing function in the password pool with backpressure.
+
+    Raises:
+        HTTPException: 503 with Retry-After when too many calls are already queued.
+    """
+    global _password_pending
+    if _password_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many concurrent password operations, retry later",
+            headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER)},
+        )
+    _password_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_password_pool(), func, *args)
+    finally:
+        _password_pending -= 1
+
+async def hash_password_async(password: str) -> str:
+    """Async `hash_password` running in the password process pool."""
+    return await _run_in_password_pool(hash_password, password)
+
+async def verify_and_update_password_async(plain: str, hashed: str):
+    """Async `verify_and_update_password` running in the password process pool."""
+    return await _run_in_password_pool(verify_and_update_password, plain, hashed)
+
+def _load_bcrypt_backend() -> int:
+    pwd_context.handler("bcrypt").get_backend()
+    return os.getpid()
+
+async def warm_password_pool():
+    """Start every password worker and load bcrypt in it, ahead of the first login."""
+    _load_bcrypt_backend()  # forked workers inherit it
+    loop = asyncio.get_running_loop()
+    pool = _get_password_pool()
+    await asyncio.gather(*(
+        loop.run_in_executor(pool, _load_bcrypt_backend) for _ in range(settings.PASSWORD_HASH_WORKERS)
+    ))
+
+def shutdown_password_pool():
+    """Stop the password pool's worker processes."""
+    global _password_pool
+    if _password_pool is not None:
+        _password_pool.shutdown(wait=True, cancel_futures=True)
+        _password_pool = None
+
 def create_access_token(data: dict):
     """
     Create a signed JWT access token.
@@ -52,9 +148,192 @@ def create_access_token(data: dict):
     """
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": time.time()})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+class VerifiedTokenCache:
+    """
+    Bounded LRU cache of tokens whose signature has already been verified.
+
+    Entries are keyed by the SHA-256 digest of the token (the raw token is
+    never stored) and expire at the token's own `exp` claim. The cache is per
+    process; revocation is checked on every request against `revocations`.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # digest -> (doctor_id, exp, iat)
+        self._by_doctor = {}           # doctor_id -> set of digests
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, digest: str):
+        """Return the cached (doctor ID, iat) for `digest`, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and entry[1] > time.time():
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return entry[0], entry[2]
+            if entry is not None:
+                self._discard(digest)
+            self.misses += 1
+            return None
+
+    def put(self, digest: str, doctor_id: int, exp: float, issued_at=None):
+        with self._lock:
+            self._entries[digest] = (doctor_id, exp, issued_at)
+            self._entries.move_to_end(digest)
+            self._by_doctor.setdefault(doctor_id, set()).add(digest)
+            while len(self._entries) > self.max_size:
+                self._discard(next(iter(self._entries)))
+
+    def evict(self, doctor_id: int):
+        """Drop the doctor's cached tokens."""
+        with self._lock:
+            for digest in self._by_doctor.pop(doctor_id, set()):
+                self._entries.pop(digest, None)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_doctor.clear()
+
+    def _discard(self, digest: str):
+        doctor_id, _, _ = self._entries.pop(digest)
+        digests = self._by_doctor.get(doctor_id)
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                del self._by_doctor[doctor_id]
+
+_redis = None          # lookups, from the threadpool
+_async_redis = None    # revocations, from the event loop
+_redis_down_until = 0.0
+
+def _get_redis():
+    global _redis
+    if time.monotonic() < _redis_down_until:
+        return None
+    if _redis is None:
+        _redis = redis.Redis.from_url(settings.REDIS_URL, socket_connect_timeout=0.5, socket_timeout=0.5)
+    return _redis
+
+def _get_async_redis():
+    global _async_redis
+    if time.monotonic() < _redis_down_until:
+        return None
+    if _async_redis is None:
+        _async_redis = aioredis.from_url(settings.REDIS_URL, socket_connect_timeout=0.5, socket_timeout=0.5)
+    return _async_redis
+
+def _mark_redis_down(exc: Exception):
+    global _redis_down_until
+    logger.warning("Redis unavailable, token revocations are per process for %ss: %s", REDIS_BACKOFF_SECONDS, exc)
+    _redis_down_until = time.monotonic() + REDIS_BACKOFF_SECONDS
+
+class RevocationList:
+    """
+    Per-doctor "tokens issued before this are revoked" timestamps.
+
+    The timestamp is stored in Redis for as long as a token lives, so a
+    logout or a doctor deletion applies to every worker and survives
+    restarts. Each process caches its lookups for `check_ttl` seconds,
+    which bounds how long another worker may still accept a revoked token.
+    While Redis is unreachable a revocation only holds in the process that
+    made it.
+    """
+
+    def __init__(self, check_ttl: float, max_size: int = TOKEN_CACHE_MAX_SIZE):
+        self.check_ttl = check_ttl
+        self.max_size = max_size
+        self._checked = {}  # doctor_id -> (revoked_at or None, monotonic deadline of the lookup)
+        self._local = {}    # doctor_id -> revoked_at, revocations made by this process
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(doctor_id: int) -> str:
+        return f"auth:revoked:{doctor_id}"
+
+    def _remember(self, doctor_id: int, revoked_at: Optional[float]):
+        with self._lock:
+            if len(self._checked) >= self.max_size:
+                self._checked.clear()
+            self._checked[doctor_id] = (revoked_at, time.monotonic() + self.check_ttl)
+
+    def revoked_at(self, doctor_id: int) -> Optional[float]:
+        """Time before which the doctor's tokens are revoked, None if they never were."""
+        checked = self._checked.get(doctor_id)
+        if checked is not None and checked[1] > time.monotonic():
+            return checked[0]
+        revoked_at = self._local.get(doctor_id)
+        client = _get_redis()
+        if client is not None:
+            try:
+                stored = client.get(self.key(doctor_id))
+            except (RedisError, OSError) as exc:
+                _mark_redis_down(exc)
+            else:
+                if stored is not None:
+                    revoked_at = max(revoked_at or 0.0, float(stored))
+        self._remember(doctor_id, revoked_at)
+        return revoked_at
+
+    def is_revoked(self, doctor_id: int, issued_at) -> bool:
+        revoked_at = self.revoked_at(doctor_id)
+        return revoked_at is not None and (issued_at is None or float(issued_at) <= revoked_at)
+
+    async def revoke(self, doctor_id: int):
+        """Reject the doctor's tokens issued before now, in every worker."""
+        now = time.time()
+        lifetime = ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        with self._lock:
+            # older revocations only cover tokens that have expired by now
+            self._local = {d: t for d, t in self._local.items() if t > now - lifetime}
+        self._local[doctor_id] = now
+        self._remember(doctor_id, now)
+        client = _get_async_redis()
+        if client is not None:
+            try:
+                await client.set(self.key(doctor_id), repr(now), ex=lifetime)
+            except (RedisError, OSError) as exc:
+                _mark_redis_down(exc)
+
+    def clear(self):
+        with self._lock:
+            self._checked.clear()
+            self._local.clear()
+
+token_cache = VerifiedTokenCache()
+revocations = RevocationList(settings.TOKEN_REVOCATION_CHECK_TTL)
+
+async def revoke_doctor_tokens(doctor_id: int):
+    """
+    Revocation hook for logout and doctor deletion.
+
+    Args:
+        doctor_id (int): Doctor whose tokens must stop being accepted.
+    """
+    token_cache.evict(doctor_id)
+    await revocations.revoke(doctor_id)
+
+def token_cache_stats() -> dict:
+    """
+    Hit/miss counters of the verified token cache.
+
+    Returns:
+        dict: `hits`, `misses` and current `size`.
+    """
+    return token_cache.stats()
+
 # Token dependency
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
@@ -64,7 +343,9 @@ def get_current_doctor_id(token: str = Depends(oauth2_scheme)):
 
     This function is used as a FastAPI dependency to protect routes.
     It decodes the incoming Bearer token, retrieves the `"sub"` claim,
-    and returns it as an integer.
+    and returns it as an integer. Verified tokens are cached until their
+    `exp`, so repeated requests skip the signature check; revocation is
+    checked every time (through a short-lived per-process cache of Redis).
 
     Args:
         token (str): Automatically provided OAuth2 Bearer token.
@@ -76,11 +357,22 @@ def get_current_doctor_id(token: str = Depends(oauth2_scheme)):
     Returns:
         int: Doctor's unique ID contained in the token.
     """
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        doctor_id = payload.get("sub")
-        if doctor_id is None:
+    digest = token_cache.digest(token)
+    cached = token_cache.get(digest)
+    if cached is not None:
+        doctor_id, issued_at = cached
+    else:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            doctor_id = payload.get("sub")
+            if doctor_id is None:
+                raise HTTPException(status_code=401, detail="Invalid token")
+            doctor_id = int(doctor_id)
+        except (JWTError, ValueError):
             raise HTTPException(status_code=401, detail="Invalid token")
-        return int(doctor_id)
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+        issued_at = payload.get("iat")
+    if revocations.is_revoked(doctor_id, issued_at):
+        raise HTTPException(status_code=401, detail="Token revoked")
+    if cached is None and payload.get("exp") is not None:
+        token_cache.put(digest, doctor_id, float(payload["exp"]), issued_at)
+    return doctor_id
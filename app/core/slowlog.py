@@ -0,0 +1,157 @@
+"""
+Slow request log.
+
+SlowRequestMiddleware captures the SQL statements (text and duration, no
+parameters) of every request through engine-wide SQLAlchemy events, and
+runs a sampled fraction of requests under cProfile. Requests slower than
+SLOW_REQUEST_MS are logged and kept, with their statements and profile, in
+a bounded in-memory ring buffer read by GET /admin/slow-requests.
+
+cProfile profiles the event loop thread, so a profile also contains other
+requests that ran concurrently; only one request is profiled at a time.
+"""
+import cProfile
+import io
+import logging
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import event # type: ignore
+from sqlalchemy.engine import Engine # type: ignore
+
+logger = logging.getLogger(__name__)
+
+PROFILE_LINES = 30
+
+class _Capture:
+    __slots__ = ("statements", "dropped", "max_statements")
+
+    def __init__(self, max_statements: int):
+        self.statements: list = []
+        self.dropped = 0
+        self.max_statements = max_statements
+
+    def add(self, statement: str, elapsed: float):
+        if len(self.statements) < self.max_statements:
+            self.statements.append({"sql": statement, "ms": round(elapsed * 1000, 3)})
+        else:
+            self.dropped += 1
+
+_capture: ContextVar[Optional[_Capture]] = ContextVar("slow_request_capture", default=None)
+
+class SlowRequestLog:
+    """Thread-safe ring buffer of slow request entries."""
+
+    def __init__(self, size: int):
+        self._entries: deque = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, entry: dict):
+        with self._lock:
+            self._entries.append(entry)
+
+    def entries(self, limit: Optional[int] = None) -> list:
+        """Newest first."""
+        with self._lock:
+            entries = list(reversed(self._entries))
+        return entries[:limit] if limit else entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+slow_log: Optional[SlowRequestLog] = None
+
+def _install_sql_hooks():
+    @event.listens_for(Engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _capture.get() is not None:
+            conn.info.setdefault("slowlog_start", []).append(time.perf_counter())
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        capture = _capture.get()
+        starts = conn.info.get("slowlog_start")
+        if capture is not None and starts:
+            capture.add(statement, time.perf_counter() - starts.pop())
+
+    @event.listens_for(Engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        starts = conn.info.get("slowlog_start") if conn is not None else None
+        if starts:
+            starts.pop()
+
+def _profile_text(profiler: cProfile.Profile) -> str:
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+    return out.getvalue()
+
+class SlowRequestMiddleware:
+    """ASGI middleware recording requests slower than `threshold_ms` into the slow log."""
+
+    def __init__(self, app, threshold_ms: float, log_size: int = 100,
+                 max_statements: int = 50, profile_rate: float = 0.0):
+        global slow_log
+        self.app = app
+        self.threshold = threshold_ms / 1000
+        self.max_statements = max_statements
+        self.profile_rate = profile_rate
+        self._profiling = threading.Lock()
+        slow_log = SlowRequestLog(log_size)
+        _install_sql_hooks()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        capture = _Capture(self.max_statements)
+        token = _capture.set(capture)
+        profiler = None
+        if self.profile_rate and random.random() < self.profile_rate and self._profiling.acquire(blocking=False):
+            profiler = cProfile.Profile()
+            profiler.enable()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _capture.reset(token)
+            if profiler is not None:
+                profiler.disable()
+                self._profiling.release()
+            if elapsed >= self.threshold:
+                self._record(scope, status, elapsed, capture, profiler)
+
+    def _record(self, scope, status: int, elapsed: float, capture: _Capture, profiler):
+        route = scope.get("route")
+        entry = {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": route.path if route is not None else None,
+            "status": status,
+            "duration_ms": round(elapsed * 1000, 3),
+            "queries": len(capture.statements) + capture.dropped,
+            "db_ms": round(sum(s["ms"] for s in capture.statements), 3),
+            "statements": capture.statements,
+            "statements_dropped": capture.dropped,
+            "profile": _profile_text(profiler) if profiler is not None else None,
+        }
+        slow_log.add(entry)
+        logger.warning("Slow request %s %s: %.1f ms, %d queries (%.1f ms in SQL)",
+                       entry["method"], entry["path"], entry["duration_ms"], entry["queries"], entry["db_ms"])
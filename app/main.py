@@ -1,25 +1,82 @@
 """
 FastAPI application entry point.
 
-Initializes the app, creates database tables at startup using the lifespan
-context, and registers the patient, doctor, and auth routers.
+Initializes the app, creates database tables and starts the outbox relay at
+startup using the lifespan context, registers the patient, doctor, auth
+and stats routers and encodes responses with orjson by default. With
+STARTUP_MODE=production, tables are only created when Alembic is not at
+head; with STARTUP_WARM_UP, the DB pools and bcrypt workers are warmed up
+before serving. With
+METRICS_ENABLED, requests are instrumented and exposed on GET /metrics;
+with SLOW_REQUEST_MS, slow requests are kept for GET /admin/slow-requests.
+With DATABASE_REPLICA_URLS, the listing endpoints read from replicas.
+On shutdown, requests still running have already finished (the server
+drains them first); the outbox is then flushed to Celery and the DB
+connections closed. `python -m app` runs the production server.
 """
+import logging
+import anyio.to_thread
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.core.database import Base, engine
+from app.core import replicas
+from app.core.config import settings
+from app.core.database import Base, dispose_pools, engine, schema_at_head, warm_up_pools
+from app.core.responses import ORJSONResponse
+from app.core.security import shutdown_password_pool, warm_password_pool
+from app.services import outbox_service
 from app.routers.patient_router import router as patient_router
 from app.routers.doctor_router import router as doctor_router
 from app.routers.auth import router as authrouter 
+from app.routers.stats_router import router as stats_router
+from app.routers.admin_router import router as admin_router
 # from app.models.doctor_models import Doctor
 # from app.models.patient_models import Patient
 
 
+logger = logging.getLogger(__name__)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    Base.metadata.create_all(bind=engine)
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+    if settings.STARTUP_MODE == "production":
+        if not schema_at_head():
+            logger.warning("Database is not at the latest migration (run `alembic upgrade head`), creating missing tables")
+            Base.metadata.create_all(bind=engine)
+    else:
+        Base.metadata.create_all(bind=engine)
+    if settings.STARTUP_WARM_UP:
+        await warm_up_pools()
+        await warm_password_pool()
+    outbox_service.start_relay()
+    replicas.start_health_checks()
     yield  
+    await replicas.stop_health_checks()
+    await outbox_service.stop_relay()
+    shutdown_password_pool()
+    await dispose_pools()
+    if settings.METRICS_ENABLED:
+        from app.core.metrics import mark_process_dead
+        mark_process_dead()
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 app.include_router(patient_router)
 app.include_router(doctor_router)
 app.include_router(authrouter)
+app.include_router(stats_router)
+app.include_router(admin_router)
+
+if settings.METRICS_ENABLED:
+    from app.core.metrics import MetricsMiddleware
+    from app.routers.metrics_router import router as metrics_router
+    app.add_middleware(MetricsMiddleware, server_timing=settings.SERVER_TIMING)
+    app.include_router(metrics_router)
+
+if settings.SLOW_REQUEST_MS > 0:
+    from app.core.slowlog import SlowRequestMiddleware
+    app.add_middleware(
+        SlowRequestMiddleware,
+        threshold_ms=settings.SLOW_REQUEST_MS,
+        log_size=settings.SLOW_REQUEST_LOG_SIZE,
+        max_statements=settings.SLOW_REQUEST_MAX_STATEMENTS,
+        profile_rate=settings.SLOW_REQUEST_PROFILE_RATE,
+    )
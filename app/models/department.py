@@ -2,7 +2,9 @@
 Database models for department records.
 
 Defines the department ORM model representing the 'departments' table,
-including columns for department_name, location and no_of_doctors
+including columns for department_name, location and no_of_doctors.
+No_of_doctors is maintained by the doctor write paths and rebuilt by
+`counter_service.reconcile`.
 """
 from sqlalchemy import Column, Integer, String # type: ignore
 from sqlalchemy.orm import relationship # type: ignore
@@ -14,5 +16,5 @@ class Department(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     location = Column(String, nullable=True)
-    No_of_doctors = Column(Integer, nullable = False)
+    No_of_doctors = Column(Integer, nullable = False, default=0, server_default="0")
 
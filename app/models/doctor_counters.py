@@ -0,0 +1,19 @@
+"""
+Database model for materialized per-doctor counters.
+
+Defines the DoctorCounters ORM model representing the 'doctor_counters'
+table: one row per doctor with the number of patients and the number of
+patients per BMI verdict. The rows are kept up to date by the patient write
+paths and can be rebuilt in bulk by `counter_service.reconcile`.
+"""
+from sqlalchemy import Column, ForeignKey, Integer # type: ignore
+from app.core.database import Base
+
+class DoctorCounters(Base):
+    __tablename__ = "doctor_counters"
+
+    doctor_id = Column(Integer, ForeignKey("doctors.id", ondelete="CASCADE"), primary_key=True)
+    patients = Column(Integer, nullable=False, default=0, server_default="0")
+    underweight = Column(Integer, nullable=False, default=0, server_default="0")
+    normal = Column(Integer, nullable=False, default=0, server_default="0")
+    obese = Column(Integer, nullable=False, default=0, server_default="0")
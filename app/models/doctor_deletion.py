@@ -0,0 +1,25 @@
+"""
+Database model for doctor deletion jobs.
+
+Defines the DoctorDeletionJob ORM model representing the
+'doctor_deletion_jobs' table. A row is written when a doctor account is
+scheduled for deletion and is updated by the background job after every
+chunk of patients it reassigns or deletes, so its progress survives the
+doctor row itself.
+"""
+from sqlalchemy import Column, DateTime, Integer, String, Text, func # type: ignore
+from app.core.database import Base
+
+class DoctorDeletionJob(Base):
+    __tablename__ = "doctor_deletion_jobs"
+
+    id = Column(String, primary_key=True)                 # random hex, also the status URL
+    doctor_id = Column(Integer, nullable=False, index=True)  # no foreign key: outlives the doctor
+    mode = Column(String, nullable=False)                 # "delete" or "reassign"
+    reassign_to = Column(Integer, nullable=True)
+    status = Column(String, nullable=False, default="queued")  # queued, running, done, failed
+    total = Column(Integer, nullable=True)                # patients when the job started
+    processed = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+    updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
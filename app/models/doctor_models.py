@@ -2,11 +2,14 @@
 Database models for doctor records.
 
 Defines the Doctor ORM model representing the 'doctor/users' table,
-including columns for personal info, email and password.
+including columns for personal info, email, password and department.
+`version` goes up with every change to the doctor's patients (see
+version_service) and backs the ETags of /view and /doctor/{id}.
 """
 from sqlalchemy import Column, Integer, String, ForeignKey # pyright: ignore[reportMissingImports]
 from sqlalchemy.orm import relationship  # type: ignore
 from app.core.database import Base
+import app.models.department  # registers 'departments' for the foreign key
 
 class Doctor(Base):
     __tablename__ = "doctors"
@@ -14,5 +17,7 @@ class Doctor(Base):
     name = Column(String, nullable=False)
     email = Column(String, unique=True, nullable=False)
     password = Column(String, nullable=False)
+    department_id = Column(Integer, ForeignKey("departments.id"), nullable=True, index=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     patients = relationship("Patient", back_populates="doctor")
@@ -0,0 +1,21 @@
+"""
+Database model for the transactional outbox.
+
+Defines the OutboxMessage ORM model representing the 'outbox' table. A row is
+written in the same transaction as the change that triggers a Celery task,
+and the outbox relay publishes it to the broker after commit. Rows with
+`failed_at` set ran out of attempts and are no longer claimed.
+"""
+from sqlalchemy import Column, DateTime, Integer, String, Text, func # type: ignore
+from app.core.database import Base
+
+class OutboxMessage(Base):
+    __tablename__ = "outbox"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    task = Column(String, nullable=False)          # registered Celery task name
+    payload = Column(Text, nullable=False)         # JSON list of positional args
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+    attempts = Column(Integer, nullable=False, default=0)
+    locked_until = Column(DateTime, nullable=True, index=True)  # claimed by a relay until then
+    failed_at = Column(DateTime, nullable=True)    # set after OUTBOX_MAX_ATTEMPTS claims without a publish
@@ -3,8 +3,12 @@ Database models for patient records.
 
 Defines the Patient ORM model representing the 'patients' table,
 including columns for personal info, physical measurements, and BMI verdict.
+Composite indexes lead with doctor_id because every patient query is scoped
+to one doctor; the sort indexes end with id to match the keyset cursor.
+`version` is the doctor's version at the patient's last write (see
+version_service) and backs the ETag of GET /patient/{id}.
 """
-from sqlalchemy import Column, String, Integer, Float, Enum, ForeignKey # type: ignore
+from sqlalchemy import Column, String, Integer, Float, Enum, ForeignKey, Index # type: ignore
 from sqlalchemy.orm import relationship # type: ignore
 from app.core.database import Base
 import enum
@@ -25,8 +29,16 @@ class Patient(Base):
     gender = Column(Enum(GenderEnum), nullable=False)
     height = Column(Float, nullable=False)   # meters
     weight = Column(Float, nullable=False)   # kgs
-    bmi = Column(Float, nullable=True)
+    bmi = Column(Float, nullable=False)   # stored by every write path, a keyset sort column
     verdict = Column(String, nullable=True)
     doctor_id = Column(Integer, ForeignKey("doctors.id")) 
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     doctor = relationship("Doctor", back_populates="patients")
+
+    __table_args__ = (
+        Index("ix_patients_doctor_id_id", "doctor_id", "id"),
+        Index("ix_patients_doctor_id_weight", "doctor_id", "weight", "id"),
+        Index("ix_patients_doctor_id_height", "doctor_id", "height", "id"),
+        Index("ix_patients_doctor_id_bmi", "doctor_id", "bmi", "id"),
+    )
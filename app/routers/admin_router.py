@@ -0,0 +1,39 @@
+import secrets
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import Response
+from app.core import slowlog
+from app.core.config import settings
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Allow the request only with the configured X-Admin-Token; 404 when none is configured."""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+@router.get("/slow-requests")
+async def slow_requests(limit: int = Query(20, ge=1, le=1000, description="Maximum number of entries, newest first")):
+    """
+    Endpoint: GET /admin/slow-requests
+    Returns the requests slower than SLOW_REQUEST_MS recorded by this process,
+    with their SQL statements and, when sampled, a cProfile snapshot.
+
+    Args:
+        limit (int): Maximum number of entries.
+    """
+    if slowlog.slow_log is None:
+        raise HTTPException(status_code=404, detail="Slow request log is disabled (SLOW_REQUEST_MS=0)")
+    return slowlog.slow_log.entries(limit)
+
+@router.delete("/slow-requests", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_slow_requests():
+    """
+    Endpoint: DELETE /admin/slow-requests
+    Empties the slow request log of this process.
+    """
+    if slowlog.slow_log is not None:
+        slowlog.slow_log.clear()
+    return Response(status_code=204)
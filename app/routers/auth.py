@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session # type: ignore
-from app.core.database import get_db
+from sqlalchemy import select # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession # type: ignore
+from app.core.database import get_async_db, get_async_write_db
 from app.models.doctor_models import Doctor
-from app.core.security import verify_password, create_access_token
-from app.services.doctor_service import create_doctor
+from app.core.security import verify_and_update_password_async, create_access_token, get_current_doctor_id, revoke_doctor_tokens
+from app.services.doctor_service import create_doctor, update_password_hash
 from app.schemas.doctor import DoctorCreate,DoctorLogin
 
 from fastapi.security import OAuth2PasswordRequestForm
@@ -11,7 +12,7 @@ from fastapi.security import OAuth2PasswordRequestForm
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 @router.post("/signup")
-def signup(doctor : DoctorCreate,db: Session = Depends(get_db) ):
+async def signup(doctor : DoctorCreate,db: AsyncSession = Depends(get_async_write_db) ):
     """
     Register a new doctor account.
 
@@ -21,7 +22,7 @@ def signup(doctor : DoctorCreate,db: Session = Depends(get_db) ):
     Args:
         doctor (DoctorCreate): Pydantic schema containing
             name, email, and password for the new doctor.
-        db (Session): SQLAlchemy database session (provided by dependency).
+        db (AsyncSession): SQLAlchemy database session (provided by dependency).
 
     Raises:
         HTTPException (400): If the email is already in use.
@@ -30,29 +31,31 @@ def signup(doctor : DoctorCreate,db: Session = Depends(get_db) ):
         dict: Confirmation message after successful creation.
               Example: {"msg": "Doctor created"}
     """
-    if db.query(Doctor).filter(Doctor.email == doctor.email).first():
+    if (await db.scalars(select(Doctor).where(Doctor.email == doctor.email))).first():
         raise HTTPException(status_code=400, detail="Email already registered")
-    doctor = create_doctor(db, doctor) 
+    doctor = await create_doctor(db, doctor) 
     return {"msg": "Doctor created"}
 
 
 @router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     """
     Authenticate a doctor and return a JWT access token.
 
     Uses OAuth2 password flow.  
     Validates the provided email (received as `username`) and password.
+    A stored hash made with an outdated bcrypt cost is transparently rehashed.
     On success, generates a signed JWT containing the doctor's ID
     in the `"sub"` (subject) claim.
 
     Args:
         form_data (OAuth2PasswordRequestForm): Parsed login form with
             `username` (doctor email) and `password`.
-        db (Session): SQLAlchemy database session.
+        db (AsyncSession): SQLAlchemy database session.
 
     Raises:
         HTTPException (401): If email does not exist or password is invalid.
+        HTTPException (503): If the password hashing pool is saturated.
 
     Returns:
         dict: Access token and token type for Bearer authentication.
@@ -63,11 +66,31 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
               }
     """
     # form_data.username will contain the email
-    doctor = db.query(Doctor).filter(Doctor.email == form_data.username).first()
-    if not doctor or not verify_password(form_data.password, doctor.password):
+    doctor = (await db.scalars(select(Doctor).where(Doctor.email == form_data.username))).first()
+    if not doctor:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    valid, new_hash = await verify_and_update_password_async(form_data.password, doctor.password)
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        await update_password_hash(doctor.id, new_hash)
     token = create_access_token({"sub": str(doctor.id)})
     return {"access_token": token, "token_type": "bearer"}
+
+@router.post("/logout")
+async def logout(doctor_id: int = Depends(get_current_doctor_id)):
+    """
+    Revoke every token issued to the current doctor so far.
+
+    Args:
+        doctor_id (int): ID of the authenticated doctor.
+
+    Returns:
+        dict: Confirmation message.
+              Example: {"msg": "Logged out"}
+    """
+    await revoke_doctor_tokens(doctor_id)
+    return {"msg": "Logged out"}
 # @router.post("/login")
 # def login(payload: DoctorLogin, db: Session = Depends(get_db)):
 #     doctor = db.query(Doctor).filter(Doctor.email == payload.email).first()
@@ -1,39 +1,90 @@
 # app/routers/doctors.py
-from fastapi import APIRouter, Depends, HTTPException,Path
-from sqlalchemy.orm import Session # type: ignore
-from app.schemas.doctor import DoctorBase,DoctorCreate,DoctorResponse
+from typing import Literal, Optional, Union
+from fastapi import APIRouter, Depends, Header, HTTPException,Path,Query,Response,status
+from sqlalchemy.ext.asyncio import AsyncSession # type: ignore
+from app.schemas.doctor import DoctorBase,DoctorCreate,DoctorResponse,DoctorSummary,DoctorDeletionStatus
 from app.services import doctor_service
-from app.core.database import get_db
+from app.core.database import get_async_db, get_async_write_db
+from app.core.replicas import get_async_replica_db
+from app.core.security import get_current_doctor_id
 
 router = APIRouter(tags=["Doctors"])
 
-@router.get("/doctor", response_model=list[DoctorResponse])
-def get_all_doctors(db: Session = Depends(get_db)):
-    return doctor_service.get(db)
+@router.get("/doctor", response_model=Union[list[DoctorResponse], list[DoctorSummary]])
+async def get_all_doctors(
+    include: Optional[Literal["patients"]] = Query(None, description="Set to 'patients' to embed each doctor's patients"),
+    db: AsyncSession = Depends(get_async_replica_db)
+):
+    """
+    Endpoint: GET /doctor
+    Returns the doctor directory (id, name, email, patient_count), or the
+    doctors with their patients when `include=patients`.
 
-@router.get("/doctor/{doctor_id}",response_model=DoctorResponse)
-def view_doctor(
+    Args:
+        include (str): Optional relation to embed.
+        db (AsyncSession): Database session.
+    """
+    return await doctor_service.get(db, include_patients=include == "patients")
+
+@router.get("/doctor/{doctor_id}",response_model=Union[DoctorResponse, DoctorSummary])
+async def view_doctor(
     doctor_id: int = Path(..., description="ID of the doctor", example="1"),
-    db: Session = Depends(get_db)
+    include: Optional[Literal["patients"]] = Query(None, description="Set to 'patients' to embed the doctor's patients"),
+    if_none_match: Optional[str] = Header(None, description="ETag of a previous response; 304 if unchanged"),
+    db: AsyncSession = Depends(get_async_replica_db)
 ):
     """
     Endpoint: GET /doctor/{doctor_id}
     Recieves a single doctor ID and passes the query to the service layer.
+    Responses carry an ETag; send it back in If-None-Match to get a 304 while
+    the doctor and their patients are unchanged.
 
     Args:
         doctor_id (int): Unique ID of the doctor.
-        db (Session): Database session.
+        include (str): Optional relation to embed.
+        if_none_match (str): Optional If-None-Match header.
+        db (AsyncSession): Database session.
     """
-    return doctor_service.view_doctor(db, doctor_id)
+    return await doctor_service.view_doctor(db, doctor_id, include_patients=include == "patients",
+                                            if_none_match=if_none_match)
 
-@router.delete("/delete/{doctor_id}")
-def delete(doctor_id: int, db: Session = Depends(get_db)):
+@router.delete("/doctor/{doctor_id}", status_code=status.HTTP_202_ACCEPTED, response_model=DoctorDeletionStatus)
+async def delete(
+    response: Response,
+    doctor_id: int = Path(..., description="ID of the doctor", example="1"),
+    patients: Literal["delete", "reassign"] = Query("delete", description="Delete the doctor's patients or reassign them"),
+    reassign_to: Optional[int] = Query(None, gt=0, description="Doctor receiving the patients with patients=reassign"),
+    db: AsyncSession = Depends(get_async_write_db),
+    current_doctor_id: int = Depends(get_current_doctor_id)
+):
     """
-    Endpoint: DELETE /delete/{doctor_id}
-    Receives follwoing arguments and pass them to doctor_delete() method in service layer.
+    Endpoint: DELETE /doctor/{doctor_id}
+    Schedules the deletion of the authenticated doctor's account. The patients
+    are deleted or reassigned in the background; poll the returned job at
+    GET /doctor/deletions/{job_id} (also in the Location header).
 
     Args:
         doctor_id (int): ID of the doctor to delete.
-        db (Session): Database session.
+        patients (str): What happens to the doctor's patients.
+        reassign_to (int): Doctor receiving the patients.
+        db (AsyncSession): Database session.
+    """
+    job = await doctor_service.start_deletion(db, doctor_id, current_doctor_id, patients, reassign_to)
+    response.headers["Location"] = f"/doctor/deletions/{job.id}"
+    return job
+
+@router.get("/doctor/deletions/{job_id}", response_model=DoctorDeletionStatus)
+async def deletion_status(
+    job_id: str = Path(..., description="ID of the deletion job"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Endpoint: GET /doctor/deletions/{job_id}
+    Returns the progress of a doctor deletion. Works without a token, which the
+    deletion revokes; the job ID is random and only known to the requester.
+
+    Args:
+        job_id (str): ID returned by DELETE /doctor/{doctor_id}.
+        db (AsyncSession): Database session.
     """
-    return doctor_service.doctor_delete(db, doctor_id)
+    return await doctor_service.deletion_status(db, job_id)
@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from app.core import metrics
+
+router = APIRouter(tags=["Metrics"])
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """
+    Endpoint: GET /metrics
+    Returns request, database, Celery and runtime metrics in the Prometheus text format.
+    """
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE_LATEST)
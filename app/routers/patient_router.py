@@ -1,14 +1,18 @@
-from fastapi import APIRouter, Depends, Path, Query, status
-from sqlalchemy.orm import Session # type: ignore
-from app.schemas.patients import PatientUpdate,PatientCreate,PatientResponse  #  create ke liye alag schema
-from app.services import patient_service
-from app.core.database import get_db  # DB dependency
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, Path, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession # type: ignore
+from app.schemas.patients import PatientUpdate,PatientCreate,PatientUpsert,PatientResponse,PatientPage,BulkImportResult,BulkDeleteRequest,BulkDeleteResult  #  create ke liye alag schema
+from app.services import patient_service, import_service
+from app.core.database import get_async_db, get_async_write_db  # DB dependency
+from app.core.replicas import get_doctor_replica_db
+from app.core.responses import RawJSONResponse
 from app.core.security import get_current_doctor_id
 
 router = APIRouter(tags=['Patients'])
 
 @router.get("/")
-def hello():
+async def hello():
     """
     Endpoint: GET /
     Returns a welcome message for the Patient Management API.
@@ -16,58 +20,105 @@ def hello():
     return {"message": "Patient Management System API"}
 
 @router.get("/about")
-def about():
+async def about():
     """
     Endpoint: GET /about
     Returns basic information about the API.
     """
     return {"message": "Fully functional API for managing your patients"}
 
-@router.get("/view")
-def view(db: Session = Depends(get_db),doctor_id: int = Depends(get_current_doctor_id)):   # DB session inject
+@router.get("/view", response_model=PatientPage)
+async def view(
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of patients per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    stream: bool = Query(False, description="Stream every patient as NDJSON instead of a page"),
+    if_none_match: Optional[str] = Header(None, description="ETag of a previous page; 304 if unchanged"),
+    db: AsyncSession = Depends(get_doctor_replica_db),doctor_id: int = Depends(get_current_doctor_id)
+):   # DB session inject
     """
     Endpoint: GET /view
-    Fetches all patients from the database by calling the service layer.
+    Fetches one page of patients from the database by calling the service layer,
+    or streams all of them as NDJSON when `stream` is set. Pages carry an ETag;
+    send it back in If-None-Match to get a 304 while no patient changed.
     
     Args:
-        db (Session): Database session injected via dependency.
-    """
-    return patient_service.view(db,doctor_id)
+        limit (int): Page size.
+        cursor (str): Cursor returned by the previous page.
+        stream (bool): Return an NDJSON stream instead of a page.
+        if_none_match (str): Optional If-None-Match header.
+        db (AsyncSession): Database session injected via dependency.
+    """
+    if stream:
+        return StreamingResponse(patient_service.stream_patients(doctor_id), media_type="application/x-ndjson")
+    return await patient_service.view(db,doctor_id,limit,cursor,if_none_match)
 
 @router.get("/patient/{patient_id}",response_model=PatientResponse)
-def view_patient(
+async def view_patient(
     patient_id: str = Path(..., description="ID of the patient", example="P001"),
-    db: Session = Depends(get_db),doctor_id: int = Depends(get_current_doctor_id)
+    if_none_match: Optional[str] = Header(None, description="ETag of a previous response; 304 if unchanged"),
+    db: AsyncSession = Depends(get_doctor_replica_db),doctor_id: int = Depends(get_current_doctor_id)
 ):
     """
     Endpoint: GET /patient/{patient_id}
     Recieves a single patient by ID and passes the query to the service layer.
+    Responses carry an ETag; send it back in If-None-Match to get a 304 while
+    the patient is unchanged.
 
     Args:
         patient_id (str): Unique ID of the patient.
-        db (Session): Database session.
+        if_none_match (str): Optional If-None-Match header.
+        db (AsyncSession): Database session.
     """
-    return patient_service.view_patient(db, patient_id,doctor_id)
+    return await patient_service.view_patient(db, patient_id,doctor_id,if_none_match)
 
-@router.get("/sort",response_model=PatientResponse)
-def sorted_patients(
+@router.get("/sort",response_model=PatientPage)
+async def sorted_patients(
     sort_by: str = Query("weight", description="Sort by weight, height or bmi"),
     order: str = Query("asc", description="asc or desc"),
-    db: Session = Depends(get_db), doctor_id: int = Depends(get_current_doctor_id)
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of patients per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    stream: bool = Query(False, description="Stream every patient as NDJSON instead of a page"),
+    db: AsyncSession = Depends(get_doctor_replica_db), doctor_id: int = Depends(get_current_doctor_id)
 ):
     """
     Endpoint: GET /sort
-    Returns patients sorted by the specified field and order.
+    Returns one page of patients sorted by the specified field and order,
+    or streams all of them as NDJSON when `stream` is set.
 
     Args:
         sort_by (str): Field to sort by (weight, height, bmi).
         order (str): Sort order (asc or desc).
-        db (Session): Database session.
+        limit (int): Page size.
+        cursor (str): Cursor returned by the previous page.
+        stream (bool): Return an NDJSON stream instead of a page.
+        db (AsyncSession): Database session.
+    """
+    if stream:
+        return StreamingResponse(patient_service.stream_patients(doctor_id, sort_by, order), media_type="application/x-ndjson")
+    return RawJSONResponse(await patient_service.sorted_patients(db, sort_by, order,doctor_id,limit,cursor))
+
+@router.get("/patients/search", response_model=PatientPage)
+async def search(
+    q: str = Query(..., min_length=1, max_length=100, description="Words to look for in the name or city, e.g. 'ali lah'"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of patients per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    db: AsyncSession = Depends(get_async_db), doctor_id: int = Depends(get_current_doctor_id)
+):
     """
-    return patient_service.sorted_patients(db, sort_by, order,doctor_id)
+    Endpoint: GET /patients/search
+    Returns one page of the doctor's patients whose name or city matches
+    every word of `q` (prefix match), best matches first.
+
+    Args:
+        q (str): Search text.
+        limit (int): Page size.
+        cursor (str): Cursor returned by the previous page.
+        db (AsyncSession): Database session.
+    """
+    return RawJSONResponse(await patient_service.search_patients(db, q, doctor_id, limit, cursor))
 
 @router.post("/create",status_code = status.HTTP_201_CREATED)
-def create(patient: PatientCreate, db: Session = Depends(get_db),doctor_id: int = Depends(get_current_doctor_id)):
+async def create(patient: PatientCreate, db: AsyncSession = Depends(get_async_write_db),doctor_id: int = Depends(get_current_doctor_id)):
     
     """
     Endpoint: POST /create
@@ -75,15 +126,72 @@ def create(patient: PatientCreate, db: Session = Depends(get_db),doctor_id: int
 
     Args:
         patient (Patient): Pydantic model containing patient data.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
+    """
+    return await patient_service.create_patient(db, patient,doctor_id)
+
+@router.post("/patients/bulk", response_model=BulkImportResult)
+async def bulk_create(
+    request: Request,
+    db: AsyncSession = Depends(get_async_write_db),
+    doctor_id: int = Depends(get_current_doctor_id)
+):
+    """
+    Endpoint: POST /patients/bulk
+    Imports many patients at once from a JSON array (application/json),
+    NDJSON (application/x-ndjson) or CSV with a header row (text/csv).
+    NDJSON and CSV bodies are processed while they stream in.
+
+    Args:
+        request (Request): Raw request whose body holds the patients.
+        db (AsyncSession): Database session.
+    """
+    rows = import_service.parse_rows(request.headers.get("content-type", "application/json"), request.stream())
+    return await import_service.bulk_create_patients(db, rows, doctor_id)
+
+@router.post("/patients/bulk-delete", response_model=BulkDeleteResult)
+async def bulk_delete(
+    body: BulkDeleteRequest,
+    db: AsyncSession = Depends(get_async_write_db),
+    doctor_id: int = Depends(get_current_doctor_id)
+):
+    """
+    Endpoint: POST /patients/bulk-delete
+    Deletes up to 1000 of the doctor's patients in one statement and reports
+    the IDs that were not found.
+
+    Args:
+        body (BulkDeleteRequest): IDs of the patients to delete.
+        db (AsyncSession): Database session.
+    """
+    return await patient_service.bulk_delete_patients(db, body.ids, doctor_id)
+
+@router.put("/patients/{patient_id}", response_model=PatientResponse, responses={201: {"model": PatientResponse}})
+async def upsert(
+    patient: PatientUpsert,
+    patient_id: str = Path(..., description="ID of the patient", example="P001"),
+    idempotency_key: Optional[str] = Header(None, max_length=255, description="Replays the first response on retries"),
+    db: AsyncSession = Depends(get_async_write_db),
+    doctor_id: int = Depends(get_current_doctor_id)
+):
+    """
+    Endpoint: PUT /patients/{patient_id}
+    Creates the patient (201) or replaces all of its fields (200) in one statement.
+    Safe to retry; with an Idempotency-Key header a retry gets the original response.
+
+    Args:
+        patient (PatientUpsert): Full patient data.
+        patient_id (str): ID of the patient.
+        idempotency_key (str): Optional Idempotency-Key header.
+        db (AsyncSession): Database session.
     """
-    return patient_service.create_patient(db, patient,doctor_id)
+    return await patient_service.upsert_patient(db, patient_id, patient, doctor_id, idempotency_key)
 
 @router.put("/edit/{patient_id}",status_code=status.HTTP_204_NO_CONTENT)
-def update(
+async def update(
     patient_id: str,
     patient: PatientUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_write_db),
     doctor_id: int = Depends(get_current_doctor_id)
 ):
     """
@@ -93,18 +201,18 @@ def update(
     Args:
         patient_id (str): ID of the patient to update.
         patient (PatientUpdate): Partial patient update data.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
     """
-    return patient_service.update_patient(db, patient_id, patient,doctor_id)
+    return await patient_service.update_patient(db, patient_id, patient,doctor_id)
 
 @router.delete("/delete/{patient_id}")
-def delete(patient_id: str, db: Session = Depends(get_db),doctor_id: int = Depends(get_current_doctor_id)):
+async def delete(patient_id: str, db: AsyncSession = Depends(get_async_write_db),doctor_id: int = Depends(get_current_doctor_id)):
     """
     Endpoint: DELETE /delete/{patient_id}
     Receives follwoing arguments and pass them to patient_delete() method in service layer.
 
     Args:
         patient_id (str): ID of the patient to delete.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
     """
-    return patient_service.patient_delete(db, patient_id,doctor_id)
+    return await patient_service.patient_delete(db, patient_id,doctor_id)
@@ -0,0 +1,56 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession # type: ignore
+from app.schemas.stats import GroupedStats, Histogram, StatsSummary
+from app.services import stats_service
+from app.core.database import get_async_db
+from app.core.security import get_current_doctor_id
+
+router = APIRouter(prefix="/stats", tags=["Stats"])
+
+@router.get("/summary", response_model=StatsSummary)
+async def summary(db: AsyncSession = Depends(get_async_db), doctor_id: int = Depends(get_current_doctor_id)):
+    """
+    Endpoint: GET /stats/summary
+    Returns patient count, verdict and gender counts, and BMI/age statistics.
+
+    Args:
+        db (AsyncSession): Database session.
+    """
+    return await stats_service.summary(db, doctor_id)
+
+@router.get("/histogram", response_model=Histogram)
+async def histogram(
+    field: str = Query("bmi", description="bmi, age, weight or height"),
+    bins: int = Query(10, ge=1, le=200, description="Number of buckets"),
+    lower: Optional[float] = Query(None, alias="min", description="Lower bound, defaults to the smallest value"),
+    upper: Optional[float] = Query(None, alias="max", description="Upper bound, defaults to the largest value"),
+    db: AsyncSession = Depends(get_async_db), doctor_id: int = Depends(get_current_doctor_id)
+):
+    """
+    Endpoint: GET /stats/histogram
+    Returns a fixed-width histogram of the chosen field.
+
+    Args:
+        field (str): Field to bucket.
+        bins (int): Number of buckets.
+        lower (float): Lower bound (`min` query parameter).
+        upper (float): Upper bound (`max` query parameter).
+        db (AsyncSession): Database session.
+    """
+    return await stats_service.histogram(db, doctor_id, field, bins, lower, upper)
+
+@router.get("/groups", response_model=GroupedStats)
+async def groups(
+    by: str = Query("city", description="city, gender or verdict"),
+    db: AsyncSession = Depends(get_async_db), doctor_id: int = Depends(get_current_doctor_id)
+):
+    """
+    Endpoint: GET /stats/groups
+    Returns the count and mean BMI, age, weight and height per group.
+
+    Args:
+        by (str): Grouping field.
+        db (AsyncSession): Database session.
+    """
+    return await stats_service.grouped(db, doctor_id, by)
@@ -6,13 +6,15 @@ This module defines:
 - DoctorCreate: Schema for creating doctor records.
 - DoctorLogin: Schema for login doctor
 - DoctorResponse: Schema for response which tells the API to in which form to response.
+- DoctorSummary: Directory projection of a doctor with the number of patients instead of the patients.
+- DoctorDeletionStatus: Progress of a background doctor deletion.
 
 These models ensure strict type checking, input validation, and automatic 
 calculation of derived attributes when used in FastAPI endpoints.
 """
 from pydantic import BaseModel, EmailStr, field_validator
-from .patients import PatientBase
-from typing import List
+from .patients import PatientRecord
+from typing import List, Literal, Optional
 
 class DoctorBase(BaseModel):
     name: str
@@ -28,6 +30,7 @@ class DoctorBase(BaseModel):
 
 class DoctorCreate(DoctorBase):
     password: str  # plain password for creation
+    department_id: Optional[int] = None
 
 class DoctorLogin(BaseModel):
     username: EmailStr
@@ -35,6 +38,25 @@ class DoctorLogin(BaseModel):
 
 class DoctorResponse(DoctorBase):
     id: int
-    patients: List[PatientBase] = []
+    patients: List[PatientRecord] = []
     class Config:
-        orm_mode = True
+        from_attributes = True
+
+class DoctorSummary(DoctorBase):
+    id: int
+    patient_count: int
+    class Config:
+        from_attributes = True
+
+
+class DoctorDeletionStatus(BaseModel):
+    id: str
+    doctor_id: int
+    mode: Literal['delete', 'reassign']
+    reassign_to: Optional[int] = None
+    status: Literal['queued', 'running', 'done', 'failed']
+    total: Optional[int] = None      # patients when the job started
+    processed: int
+    error: Optional[str] = None
+    class Config:
+        from_attributes = True
@@ -5,13 +5,20 @@ This module defines:
 - Patient: Full patient schema with validation, example values, and computed fields 
   (BMI and health verdict) derived automatically from height and weight.
 - PatientUpdate: Partial schema for updating existing patient records with optional fields.
-- PatientResponse: Schema for api to mold the response accordingly.
+- PatientUpsert: Full patient for PUT /patients/{id}, with the ID taken from the path.
+- PatientRecord: Patient as stored, reading the persisted bmi/verdict instead of recomputing them.
+- PatientResponse: Schema for api to mold the response accordingly (a PatientRecord with its doctor).
+- serialize_patient: Pre-built serializer turning a Patient row into the PatientResponse shape
+  without going through validation.
+- PatientPage: Keyset-paginated list of PatientResponse with the cursor of the next page.
+- BulkRowError / BulkImportResult: Outcome of a bulk patient import with per-row errors.
+- BulkDeleteRequest / BulkDeleteResult: IDs to delete at once and what was deleted.
 
 These models ensure strict type checking, input validation, and automatic 
 calculation of derived attributes when used in FastAPI endpoints.
 """
 from pydantic import BaseModel, Field, computed_field
-from typing import Annotated, Literal, Optional
+from typing import Annotated, List, Literal, Optional
 
 class PatientBase(BaseModel):
     id: Annotated[str,Field(...,description='Id of the patient',example='P001')]
@@ -19,8 +26,8 @@ class PatientBase(BaseModel):
     city:Annotated[str,Field(...,description='City where the patient is living')]
     age:Annotated[int,Field(...,gt=0,lt=120,description='Age of the patient')]
     gender:Annotated[Literal['male','female','other'],Field(...,description='Gender of teh patient')]
-    height:Annotated[float,Field(...,description='Heightof teh patient in meters')]
-    weight:Annotated[float,Field(...,description='Weight of  the patient in Kgs')]
+    height:Annotated[float,Field(...,gt=0,description='Heightof teh patient in meters')]
+    weight:Annotated[float,Field(...,gt=0,description='Weight of  the patient in Kgs')]
 
     @computed_field
     @property
@@ -39,15 +46,65 @@ class PatientBase(BaseModel):
             return 'Obese'
         
 
+class PatientRecord(BaseModel):
+    id: str
+    name: str
+    city: str
+    age: int
+    gender: Literal['male','female','other']
+    height: float
+    weight: float
+    bmi: Optional[float] = None
+    verdict: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
 class PatientCreate(PatientBase):
     pass
 
-class PatientResponse(PatientBase):
+class PatientUpsert(PatientBase):
+    id: Annotated[Optional[str], Field(default=None, description='Optional, must match the ID in the path')]
+
+class PatientResponse(PatientRecord):
     doctor_id: int
 
     class Config:
         from_attributes = True   
 
+PATIENT_RESPONSE_FIELDS = tuple(PatientResponse.model_fields)
+
+def serialize_patient(patient) -> dict:
+    """
+    Build the PatientResponse dict of a Patient row by reading its columns.
+
+    bmi and verdict are the values stored at write time; nothing is
+    recomputed or re-validated. The result is meant for orjson, which
+    encodes the gender enum itself.
+    """
+    return {field: getattr(patient, field) for field in PATIENT_RESPONSE_FIELDS}
+
+class PatientPage(BaseModel):
+    items: List[PatientResponse]
+    next_cursor: Annotated[Optional[str], Field(default=None, description='Cursor of the next page, null on the last page')]
+
+class BulkRowError(BaseModel):
+    row: Annotated[int, Field(..., description='1-based position of the row in the upload')]
+    id: Annotated[Optional[str], Field(default=None, description='Patient ID of the row, if present')]
+    detail: str
+
+class BulkImportResult(BaseModel):
+    created: int
+    failed: int
+    errors: List[BulkRowError] = []
+
+class BulkDeleteRequest(BaseModel):
+    ids: Annotated[List[str], Field(..., min_length=1, max_length=1000, description='IDs of the patients to delete')]
+
+class BulkDeleteResult(BaseModel):
+    deleted: int
+    not_found: Annotated[List[str], Field(default=[], description='Requested IDs that are not patients of the doctor')]
+
 class PatientUpdate(BaseModel):
     name: Annotated[Optional[str], Field(default=None)]
     city: Annotated[Optional[str], Field(default=None)]
@@ -0,0 +1,45 @@
+"""
+Pydantic models for the patient statistics endpoints.
+
+This module defines:
+- NumericStats: Mean, range and percentiles of a numeric patient column.
+- StatsSummary: Patient count, verdict/gender distributions and BMI/age statistics.
+- HistogramBin / Histogram: Fixed-width histogram of a numeric column.
+- GroupStats / GroupedStats: Aggregates per city, gender or verdict.
+"""
+from pydantic import BaseModel, Field
+from typing import Annotated, Dict, List, Optional
+
+class NumericStats(BaseModel):
+    mean: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    percentiles: Annotated[Dict[str, float], Field(default_factory=dict, description='Nearest-rank percentiles, e.g. {"p50": 22.4}')]
+
+class StatsSummary(BaseModel):
+    count: int
+    verdicts: Dict[str, int]
+    genders: Dict[str, int]
+    bmi: NumericStats
+    age: NumericStats
+
+class HistogramBin(BaseModel):
+    lower: float
+    upper: float
+    count: int
+
+class Histogram(BaseModel):
+    field: str
+    bins: List[HistogramBin]
+
+class GroupStats(BaseModel):
+    key: Optional[str]
+    count: int
+    mean_bmi: Optional[float] = None
+    mean_age: Optional[float] = None
+    mean_weight: Optional[float] = None
+    mean_height: Optional[float] = None
+
+class GroupedStats(BaseModel):
+    by: str
+    groups: List[GroupStats]
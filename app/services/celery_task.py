@@ -1,17 +1,133 @@
 from app.core.celery import celery_app
-import smtplib
+from app.core.config import settings
+from app.services.mailer import get_mail_pool, close_mail_pool
+from celery.signals import worker_process_shutdown, worker_shutdown
+from celery.utils.log import get_task_logger
 from email.mime.text import MIMEText
-import os
+import redis # type: ignore
+import smtplib
 
-@celery_app.task
-def send_patient_created_email(doctor_email: str, patient_id: str):
-    print("invoking celery task email sending function")
-    msg = MIMEText(f"A new patient (ID: {patient_id}) was created.")
-    msg["Subject"] = "New Patient Created"
-    msg["From"] = os.getenv("SMTP_USER")
+logger = get_task_logger(__name__)  # worker log lines carry the task name and id
+
+DIGEST_KEY = "notify:digest:{}"
+DIGEST_SCHEDULED_KEY = "notify:digest:{}:scheduled"
+
+_redis = None
+
+class TransientDeliveryError(Exception):
+    """An email could not be sent for a reason that may go away (connection trouble, 4xx reply)."""
+
+# Email tasks: throttled per worker to stay under the SMTP provider's limits,
+# retried with exponential backoff and jitter on temporary failures only
+EMAIL_TASK_OPTIONS = dict(
+    rate_limit=settings.EMAIL_RATE_LIMIT,
+    autoretry_for=(TransientDeliveryError,),
+    max_retries=settings.EMAIL_MAX_RETRIES,
+    retry_backoff=True,
+    retry_backoff_max=settings.EMAIL_RETRY_BACKOFF_MAX,
+    retry_jitter=True,
+)
+
+def _get_redis():
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis.from_url(settings.REDIS_URL)
+    return _redis
+
+def _send(doctor_email: str, subject: str, body: str):
+    msg = MIMEText(body)
+    msg["Subject"] = subject
+    msg["From"] = settings.SMTP_USER
     msg["To"] = doctor_email
+    try:
+        get_mail_pool().send(msg)
+    except smtplib.SMTPResponseException as exc:
+        if 400 <= exc.smtp_code < 500:
+            raise TransientDeliveryError(f"{exc.smtp_code} {exc.smtp_error!r}") from exc
+        raise
+    except smtplib.SMTPRecipientsRefused:
+        raise
+    except OSError as exc:  # refused/dropped connections and timeouts
+        raise TransientDeliveryError(str(exc)) from exc
+
+@worker_process_shutdown.connect  # prefork children
+@worker_shutdown.connect          # threads/solo pools run the tasks in the worker itself
+def _close_smtp_connections(**kwargs):
+    close_mail_pool()
+
+@celery_app.task(**EMAIL_TASK_OPTIONS)
+def send_patient_created_email(doctor_email: str, patient_id: str):
+    """
+    Notify a doctor that a patient was created.
+
+    With NOTIFY_DIGEST_WINDOW > 0 the notification is buffered in Redis and
+    the first one of a window schedules `send_patient_digest`, so a burst of
+    creates produces one email per doctor instead of one per patient.
+    """
+    logger.info("Patient %s created, notifying %s", patient_id, doctor_email)
+    window = settings.NOTIFY_DIGEST_WINDOW
+    if window <= 0:
+        _send(doctor_email, "New Patient Created", f"A new patient (ID: {patient_id}) was created.")
+        return
+
+    client = _get_redis()
+    client.rpush(DIGEST_KEY.format(doctor_email), patient_id)
+    # the flag outlives the window so a delayed digest is not scheduled twice
+    if client.set(DIGEST_SCHEDULED_KEY.format(doctor_email), 1, nx=True, ex=window * 10):
+        send_patient_digest.apply_async((doctor_email,), countdown=window)
+
+@celery_app.task(**EMAIL_TASK_OPTIONS)
+def send_patient_digest(doctor_email: str):
+    """Send one email listing every patient buffered for a doctor since the last digest."""
+    logger.info("Sending patient digest to %s", doctor_email)
+    client = _get_redis()
+    pipe = client.pipeline()  # MULTI: take the buffer and reopen the window atomically
+    pipe.lrange(DIGEST_KEY.format(doctor_email), 0, -1)
+    pipe.delete(DIGEST_KEY.format(doctor_email))
+    pipe.delete(DIGEST_SCHEDULED_KEY.format(doctor_email))
+    patient_ids = [pid.decode() for pid in pipe.execute()[0]]
+    if not patient_ids:
+        return
+
+    if len(patient_ids) == 1:
+        subject, body = "New Patient Created", f"A new patient (ID: {patient_ids[0]}) was created."
+    else:
+        subject = f"{len(patient_ids)} New Patients Created"
+        body = f"{len(patient_ids)} new patients were created:\n" + "\n".join(patient_ids)
+    try:
+        _send(doctor_email, subject, body)
+    except Exception:
+        # put them back so the next digest for this doctor delivers them
+        client.rpush(DIGEST_KEY.format(doctor_email), *patient_ids)
+        raise
+
+@celery_app.task(**EMAIL_TASK_OPTIONS)
+def send_bulk_import_summary_email(doctor_email: str, created: int, failed: int):
+    logger.info("Sending bulk import summary to %s (%s created, %s failed)", doctor_email, created, failed)
+    _send(
+        doctor_email,
+        "Patient Import Summary",
+        f"Bulk import finished: {created} patients created, {failed} rows rejected.",
+    )
+
+@celery_app.task
+def reconcile_counters():
+    """Rebuild the materialized doctor and department counters from the source tables."""
+    from app.core.database import SessionLocal
+    from app.services.counter_service import reconcile
+
+    with SessionLocal() as db:
+        return reconcile(db)
+
+@celery_app.task(bind=True, max_retries=None)
+def delete_doctor(self, job_id: str):
+    """Run a scheduled doctor deletion (see app.services.doctor_deletion)."""
+    from app.core.database import SessionLocal
+    from app.services.doctor_deletion import JobInProgress, run
 
-    with smtplib.SMTP("smtp.gmail.com", 587) as smtp:
-        smtp.starttls()
-        smtp.login(os.getenv("SMTP_USER"), os.getenv("SMTP_PASS"))
-        smtp.send_message(msg)
+    with SessionLocal() as db:
+        try:
+            return run(db, job_id)
+        except JobInProgress as exc:
+            # another worker is on it; look again once its heartbeat could be stale
+            raise self.retry(exc=exc, countdown=settings.DOCTOR_DELETE_STALE_AFTER)
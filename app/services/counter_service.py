@@ -0,0 +1,164 @@
+"""
+Materialized counters.
+
+Keeps per-doctor patient and verdict counts (`doctor_counters`) and
+`Department.No_of_doctors` up to date incrementally, in the same transaction
+as the write that changes them, so reading a count is a primary-key lookup
+instead of a COUNT over the patients table. `reconcile` rebuilds every
+counter from the source tables and repairs any drift.
+"""
+from typing import Optional
+from sqlalchemy import case, delete, func, insert, select, update # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+from app.models.department import Department
+from app.models.doctor_counters import DoctorCounters
+from app.models.doctor_models import Doctor as DoctorDB
+from app.models.patient_models import Patient as PatientDB
+
+# verdict stored on the patient -> DoctorCounters column
+VERDICT_COLUMNS = {"Underweight": "underweight", "Normal": "normal", "Obese": "obese"}
+
+def _counts_query(doctor_id: Optional[int] = None):
+    """Per-doctor counts aggregated from the patients table."""
+    query = (
+        select(
+            DoctorDB.id,
+            func.count(PatientDB.id),
+            *(func.count(case((PatientDB.verdict == verdict, 1))) for verdict in VERDICT_COLUMNS),
+        )
+        .outerjoin(PatientDB, PatientDB.doctor_id == DoctorDB.id)
+        .group_by(DoctorDB.id)
+    )
+    if doctor_id is not None:
+        query = query.where(DoctorDB.id == doctor_id)
+    return query
+
+def _rebuild_statements(doctor_id: int) -> tuple:
+    return (
+        delete(DoctorCounters).where(DoctorCounters.doctor_id == doctor_id),
+        insert(DoctorCounters).from_select(["doctor_id", "patients", *VERDICT_COLUMNS.values()], _counts_query(doctor_id)),
+    )
+
+async def _rebuild_doctor(db: AsyncSession, doctor_id: int):
+    """Recount one doctor from the (flushed) patients table."""
+    for statement in _rebuild_statements(doctor_id):
+        await db.execute(statement)
+
+def _many_statement(doctor_id: int, verdicts: list, sign: int):
+    """UPDATE adding (sign=1) or removing (sign=-1) patients with `verdicts` to a doctor's row."""
+    values = {"patients": DoctorCounters.patients + sign * len(verdicts)}
+    for verdict, column in VERDICT_COLUMNS.items():
+        changed = verdicts.count(verdict)
+        if changed:
+            values[column] = getattr(DoctorCounters, column) + sign * changed
+    return update(DoctorCounters).where(DoctorCounters.doctor_id == doctor_id).values(**values)
+
+async def adjust(db: AsyncSession, doctor_id: Optional[int], verdict: Optional[str], delta: int):
+    """
+    Add `delta` patients with `verdict` to a doctor's counters.
+
+    Must run after the patient change is flushed: a doctor without a counter
+    row yet is recounted from the patients table, which then already
+    includes the change.
+    """
+    if doctor_id is None or delta == 0:
+        return
+    values = {"patients": DoctorCounters.patients + delta}
+    column = VERDICT_COLUMNS.get(verdict)
+    if column:
+        values[column] = getattr(DoctorCounters, column) + delta
+    result = await db.execute(update(DoctorCounters).where(DoctorCounters.doctor_id == doctor_id).values(**values))
+    if result.rowcount == 0:
+        await _rebuild_doctor(db, doctor_id)
+
+async def adjust_many(db: AsyncSession, doctor_id: int, verdicts: list, sign: int = 1):
+    """Count a batch of new (or, with sign=-1, deleted) patients, given their verdicts, with one UPDATE."""
+    if not verdicts:
+        return
+    result = await db.execute(_many_statement(doctor_id, verdicts, sign))
+    if result.rowcount == 0:
+        await _rebuild_doctor(db, doctor_id)
+
+def transfer(db: Session, doctor_id: int, to_doctor_id: Optional[int], verdicts: list):
+    """
+    Move a batch of patients, given their verdicts, from one doctor's counters to another's.
+
+    Synchronous, for jobs running outside the event loop. With
+    `to_doctor_id` None the patients are only removed (they were deleted).
+    """
+    if not verdicts:
+        return
+    for target, sign in ((doctor_id, -1), (to_doctor_id, 1)):
+        if target is None:
+            continue
+        if db.execute(_many_statement(target, verdicts, sign)).rowcount == 0:
+            for statement in _rebuild_statements(target):
+                db.execute(statement)
+
+async def move(db: AsyncSession, old_doctor_id: Optional[int], old_verdict: Optional[str],
+               new_doctor_id: Optional[int], new_verdict: Optional[str]):
+    """Move one patient between doctors and/or verdicts."""
+    if old_doctor_id == new_doctor_id and old_verdict == new_verdict:
+        return
+    await adjust(db, old_doctor_id, old_verdict, -1)
+    await adjust(db, new_doctor_id, new_verdict, 1)
+
+def _department_statement(department_id: int, delta: int):
+    return (
+        update(Department)
+        .where(Department.id == department_id)
+        .values(No_of_doctors=func.coalesce(Department.No_of_doctors, 0) + delta)
+    )
+
+async def adjust_department(db: AsyncSession, department_id: Optional[int], delta: int):
+    """Add `delta` to a department's number of doctors."""
+    if department_id is None:
+        return
+    await db.execute(_department_statement(department_id, delta))
+
+def adjust_department_sync(db: Session, department_id: Optional[int], delta: int):
+    """Synchronous `adjust_department`."""
+    if department_id is None:
+        return
+    db.execute(_department_statement(department_id, delta))
+
+async def doctor_counts(db: AsyncSession, doctor_id: int) -> Optional[DoctorCounters]:
+    """Return the counters row of a doctor, or None if it has none yet."""
+    return await db.get(DoctorCounters, doctor_id)
+
+def verdict_counts(counters: Optional[DoctorCounters]) -> dict:
+    """Non-zero verdict counts of a counters row, keyed by verdict."""
+    if counters is None:
+        return {}
+    counts = {verdict: getattr(counters, column) for verdict, column in VERDICT_COLUMNS.items()}
+    return {verdict: count for verdict, count in counts.items() if count}
+
+def reconcile(db: Session) -> dict:
+    """
+    Rebuild all counters from the source tables in one transaction.
+
+    Runs on a synchronous session so it can be called from Celery, Alembic
+    or a shell.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+
+    Returns:
+        dict: Number of doctor counter rows and departments rebuilt.
+    """
+    db.execute(delete(DoctorCounters))
+    doctors = db.execute(
+        insert(DoctorCounters).from_select(["doctor_id", "patients", *VERDICT_COLUMNS.values()], _counts_query())
+    ).rowcount
+    doctors_in_department = (
+        select(func.count(DoctorDB.id)).where(DoctorDB.department_id == Department.id).scalar_subquery()
+    )
+    departments = db.execute(update(Department).values(No_of_doctors=doctors_in_department)).rowcount
+    db.commit()
+    return {"doctors": doctors, "departments": departments}
+
+if __name__ == "__main__":
+    from app.core.database import SessionLocal
+    with SessionLocal() as session:
+        print(reconcile(session))
@@ -0,0 +1,146 @@
+"""
+Background deletion of doctor accounts.
+
+The request that deletes a doctor only records a DoctorDeletionJob and stages
+the `delete_doctor` Celery task in the outbox. The job then reassigns the
+doctor's patients to another doctor, or deletes them, in chunks of
+DOCTOR_DELETE_CHUNK_SIZE: one short transaction per chunk, each a single
+set-based UPDATE/DELETE ... RETURNING whose rows feed the counters and the
+search index, with the progress stored on the job row in the same commit.
+Other writers wait for one chunk at most instead of the whole account.
+
+The last transaction also catches patients added while the job ran, then
+removes the doctor. Runs on a synchronous session, like the other
+worker-side jobs.
+
+Every chunk commit also stamps `updated_at`, a heartbeat: a `running` job
+whose heartbeat is older than DOCTOR_DELETE_STALE_AFTER belongs to a worker
+that died, and the redelivered task takes it over and carries on (the
+chunks only ever touch patients the doctor still owns). A delivery that
+finds the job running with a fresh heartbeat raises JobInProgress so the
+task is retried once the heartbeat could have gone stale.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import and_, delete, func, or_, select, update # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+from app.core import cache
+from app.core.config import settings
+from app.models.doctor_counters import DoctorCounters
+from app.models.doctor_deletion import DoctorDeletionJob
+from app.models.doctor_models import Doctor as DoctorDB
+from app.models.patient_models import Patient as PatientDB
+from app.services import counter_service, search_index, version_service
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+class JobInProgress(Exception):
+    """The job is running in another worker that still reports progress."""
+
+def _process_chunk(db: Session, job: DoctorDeletionJob, limit: Optional[int]) -> int:
+    """Reassign or delete up to `limit` (None = all) of the doctor's patients; the caller commits."""
+    owned = PatientDB.doctor_id == job.doctor_id
+    ids = select(PatientDB.id).where(owned)
+    if limit is not None:
+        ids = ids.order_by(PatientDB.id).limit(limit)
+    # `owned` again outside the subquery: a concurrent run can never take the same rows twice
+    if job.mode == "reassign":
+        version = version_service.bump_sync(db, job.reassign_to)
+        statement = update(PatientDB).values(doctor_id=job.reassign_to, version=version)
+    else:
+        statement = delete(PatientDB)
+    rows = db.execute(
+        statement.where(owned, PatientDB.id.in_(ids.scalar_subquery()))
+        .returning(PatientDB.verdict, *search_index.returning_columns(db))
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not rows:
+        return 0
+
+    version_service.bump_sync(db, job.doctor_id)
+    terms = [row[1:] for row in rows]
+    search_index.remove_rows(db, job.doctor_id, terms)
+    if job.mode == "reassign":
+        search_index.add_rows(db, job.reassign_to, terms)
+    counter_service.transfer(db, job.doctor_id, job.reassign_to, [row.verdict for row in rows])
+    job.processed += len(rows)
+    job.updated_at = datetime.utcnow()
+    return len(rows)
+
+def _invalidate(job: DoctorDeletionJob):
+    cache.invalidate_doctor_sync(job.doctor_id)
+    if job.reassign_to is not None:
+        cache.invalidate_doctor_sync(job.reassign_to)
+
+def run(db: Session, job_id: str) -> Optional[dict]:
+    """
+    Run a queued deletion job, or take over a stale running one, to completion.
+
+    A job that is done or failed is left alone. On failure the chunks
+    committed so far stay done and the job is marked failed with the error;
+    starting a new job for the doctor continues with the patients that are
+    left.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        job_id (str): ID of the DoctorDeletionJob.
+
+    Returns:
+        dict | None: Final `status` and `processed` count, None if the job was not run.
+
+    Raises:
+        JobInProgress: The job is running elsewhere with a fresh heartbeat.
+    """
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=settings.DOCTOR_DELETE_STALE_AFTER)
+    claimed = db.execute(
+        update(DoctorDeletionJob)
+        .where(
+            DoctorDeletionJob.id == job_id,
+            or_(
+                DoctorDeletionJob.status == "queued",
+                and_(DoctorDeletionJob.status == "running", DoctorDeletionJob.updated_at < stale),
+            ),
+        )
+        .values(status="running", updated_at=now)
+    ).rowcount
+    if not claimed:
+        db.rollback()
+        if db.scalar(select(DoctorDeletionJob.status).where(DoctorDeletionJob.id == job_id)) == "running":
+            raise JobInProgress(job_id)
+        return None
+    job = db.get(DoctorDeletionJob, job_id)
+    if job.total is None:
+        job.total = db.scalar(select(func.count(PatientDB.id)).where(PatientDB.doctor_id == job.doctor_id))
+    else:
+        logger.warning("Resuming deletion job %s of doctor %s after %s patients", job.id, job.doctor_id, job.processed)
+    db.commit()
+
+    chunk_size = settings.DOCTOR_DELETE_CHUNK_SIZE
+    try:
+        while _process_chunk(db, job, chunk_size) == chunk_size:
+            db.commit()
+            _invalidate(job)
+
+        _process_chunk(db, job, None)  # added since the last chunk
+        doctor = db.get(DoctorDB, job.doctor_id)
+        if doctor is not None:
+            counter_service.adjust_department_sync(db, doctor.department_id, -1)
+        db.execute(delete(DoctorCounters).where(DoctorCounters.doctor_id == job.doctor_id))
+        # a Core-style delete: session.delete() would walk Doctor.patients
+        db.execute(delete(DoctorDB).where(DoctorDB.id == job.doctor_id).execution_options(synchronize_session=False))
+        job.status = "done"
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        logger.exception("Deletion of doctor %s failed", job.doctor_id)
+        job.status = "failed"
+        job.error = str(exc)[:1000]
+        db.commit()
+        raise
+    finally:
+        _invalidate(job)
+    return {"status": job.status, "processed": job.processed}
@@ -1,73 +1,161 @@
+import uuid
+from typing import Optional
 from fastapi import HTTPException
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session # type: ignore
+from fastapi.responses import Response
+from sqlalchemy import func, select, update # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession # type: ignore
+from sqlalchemy.orm import selectinload # type: ignore
 from app.models.doctor_models import Doctor as doctordb  # SQLAlchemy model
-from app.schemas.doctor import DoctorCreate
-from app.core.security import hash_password
+from app.models.department import Department
+from app.models.doctor_counters import DoctorCounters
+from app.models.doctor_deletion import DoctorDeletionJob
+from app.schemas.doctor import DoctorCreate, DoctorResponse, DoctorSummary
+from app.core import cache
+from app.core.database import AsyncWriteSessionLocal
+from app.core.responses import ETAG_CACHE_CONTROL, RawJSONResponse, etag, etag_matches, not_modified
+from app.core.security import hash_password_async, revoke_doctor_tokens
+from app.services import counter_service, outbox_service, version_service
+from app.services.doctor_deletion import ACTIVE_STATUSES
 
-def get(db: Session):
+DELETE_DOCTOR_TASK = "app.services.celery_task.delete_doctor"  # by name, see outbox_service.enqueue
+
+def _summary_query():
+    """Build the doctor directory projection with the patient count read from the counters table."""
+    return (
+        select(
+            doctordb.id,
+            doctordb.name,
+            doctordb.email,
+            func.coalesce(DoctorCounters.patients, 0).label("patient_count"),
+        )
+        .outerjoin(DoctorCounters, DoctorCounters.doctor_id == doctordb.id)
+    )
+
+async def get(db: AsyncSession, include_patients: bool = False):
     """Return a list of all doctors from the database.
 
+    Without `include_patients` a single query returns the directory
+    projection (id, name, email, patient_count), with the count read from
+    the materialized doctor counters. With it, the
+    patients of every doctor are fetched by one extra `selectinload`
+    query instead of one lazy load per doctor.
+
     Args:
-        db (Session): SQLAlchemy database session.
+        db (AsyncSession): SQLAlchemy database session.
+        include_patients (bool): Embed each doctor's patients.
 
     Returns:
-        PatientDB: Patients record if found.
+        list: doctordb records with patients, or DoctorSummary projections.
     """
-    return db.query(doctordb).all()
+    if include_patients:
+        result = await db.scalars(select(doctordb).options(selectinload(doctordb.patients)))
+        return result.all()
+    result = await db.execute(_summary_query().order_by(doctordb.id))
+    return [DoctorSummary.model_validate(row) for row in result]
 
-def view_doctor(db: Session, doctor_id: int):
+async def view_doctor(db: AsyncSession, doctor_id: int, include_patients: bool = False,
+                      if_none_match: Optional[str] = None) -> Response:
     
     """
     Retrieve a single dcotor's details by their unique ID.
 
+    The doctor's row version, bumped by every change to their patients, is
+    the ETag; a matching If-None-Match gets a 304 after that primary-key
+    lookup alone. Otherwise served through the read-through cache, which
+    patient writes invalidate, and sent as the cached JSON.
+
     Args:
         doctor_id (int): Doctor ID to look up (e.g., 1,2,3).
-        db (Session): SQLAlchemy database session.
+        db (AsyncSession): SQLAlchemy database session.
+        include_patients (bool): Embed the doctor's patients instead of their count.
+        if_none_match (str, optional): If-None-Match header of the request.
 
     Returns:
-        doctordb: doctor record if found.
+        Response: DoctorResponse or DoctorSummary JSON if found, or 304.
 
     Raises:
         HTTPException: 404 if patient is not found.
     """
-    doctor = db.query(doctordb).filter(doctordb.id == doctor_id).first()
-    if not doctor:
+    row_version = await version_service.doctor_version(db, doctor_id)
+    if row_version is None:
         raise HTTPException(status_code=404, detail="Doctor not found!")
-    return doctor
+    tag = etag(doctor_id, row_version)
+    if etag_matches(if_none_match, tag):
+        return not_modified(tag)
+    schema = DoctorResponse if include_patients else DoctorSummary
+
+    async def load():
+        if include_patients:
+            result = await db.scalars(
+                select(doctordb)
+                .options(selectinload(doctordb.patients))
+                .where(doctordb.id == doctor_id)
+            )
+        else:
+            result = await db.execute(_summary_query().where(doctordb.id == doctor_id))
+        doctor = result.first()
+        if not doctor:
+            raise HTTPException(status_code=404, detail="Doctor not found!")
+        return schema.model_validate(doctor).model_dump_json()
 
-def create_doctor(db: Session, doctor: DoctorCreate)->dict:
+    version = await cache.doctor_version(doctor_id)
+    key = cache.doctor_key(doctor_id, version, "doctor", "patients" if include_patients else "summary", row_version)
+    return RawJSONResponse(
+        await cache.get_or_load(key, load), headers={"ETag": tag, "Cache-Control": ETAG_CACHE_CONTROL}
+    )
+
+async def create_doctor(db: AsyncSession, doctor: DoctorCreate)->dict:
     """
     Create a new doctor record.
 
     Args:
         doctor (DoctorCreate): Request body validated using Pydantic with
                            all required doctor details.
-        db (Session): SQLAlchemy database session.
+        db (AsyncSession): SQLAlchemy database session.
 
     Returns:
         dict: Success message if creation is successful.
 
     Raises:
         HTTPException: 400 if a doctor with the same ID already exists.
+        HTTPException: 404 if the department does not exist.
     """
     # Check if patient already exists
-    existing = db.query(doctordb).filter(doctordb.email == doctor.email).first()
+    existing = (await db.scalars(select(doctordb).where(doctordb.email == doctor.email))).first()
     if existing:
         raise HTTPException(status_code=400, detail="Doctor already exists!")
+    if doctor.department_id is not None and not await db.get(Department, doctor.department_id):
+        raise HTTPException(status_code=404, detail="Department not found!")
     
-    hashed_pw = hash_password(doctor.password)
+    hashed_pw = await hash_password_async(doctor.password)
 
     db_doctor = doctordb(
          name = doctor.name,
          email = doctor.email,
-         password = hashed_pw
+         password = hashed_pw,
+         department_id = doctor.department_id
     )
     db.add(db_doctor)
-    db.commit()
-    db.refresh(db_doctor)
+    await db.flush()
+    db.add(DoctorCounters(doctor_id=db_doctor.id, patients=0, underweight=0, normal=0, obese=0))
+    await counter_service.adjust_department(db, db_doctor.department_id, 1)
+    await db.commit()
     return {"message": "Patient created successfully"}
 
+async def update_password_hash(doctor_id: int, hashed: str):
+    """
+    Store a rehashed password, e.g. after the bcrypt cost factor changed.
+
+    Runs on its own write session so callers can stay on a read-only one.
+
+    Args:
+        doctor_id (int): Doctor whose hash is replaced.
+        hashed (str): New bcrypt hash.
+    """
+    async with AsyncWriteSessionLocal() as db:
+        await db.execute(update(doctordb).where(doctordb.id == doctor_id).values(password=hashed))
+        await db.commit()
+
 # def update_patient(db: Session, patient_id: str, patient: PatientUpdate)->dict:
 #     """
 #     Update an existing patient's details.
@@ -106,23 +194,69 @@ def create_doctor(db: Session, doctor: DoctorCreate)->dict:
 #     db.refresh(db_patient)
 #     return {"message": "Patient updated successfully"}
 
-def doctor_delete(db: Session, doctor_id: int)->JSONResponse:
+async def start_deletion(db: AsyncSession, doctor_id: int, current_doctor_id: int,
+                         mode: str = "delete", reassign_to: Optional[int] = None) -> DoctorDeletionJob:
     """
-    Delete a doctor record by ID.
+    Schedule the deletion of a doctor account.
+
+    The doctor's patients are deleted, or reassigned to `reassign_to`, by a
+    background job in chunks (see `doctor_deletion`); the job is staged in
+    the outbox with its DoctorDeletionJob row, and the doctor's tokens stop
+    being accepted right away.
 
     Args:
-        dcotor_id (int): ID of the doctor to delete.
-        db (Session): SQLAlchemy database session.
+        doctor_id (int): ID of the doctor to delete.
+        current_doctor_id (int): Authenticated doctor; only their own account can be deleted.
+        mode (str): "delete" or "reassign" the patients.
+        reassign_to (int, optional): Doctor receiving the patients in "reassign" mode.
+        db (AsyncSession): SQLAlchemy database session.
 
     Returns:
-        JSONResponse: 204 No Content on successful deletion.
+        DoctorDeletionJob: The queued job.
+
+    Raises:
+        HTTPException: 403 for another doctor's account, 404 if a doctor is not found,
+        400 for an invalid reassignment, 409 if the doctor is already being deleted.
+    """
+    if doctor_id != current_doctor_id:
+        raise HTTPException(status_code=403, detail="You can only delete your own account")
+    if not await db.get(doctordb, doctor_id):
+        raise HTTPException(status_code=404, detail="Doctor not found!")
+    if mode == "reassign":
+        if reassign_to is None or reassign_to == doctor_id:
+            raise HTTPException(status_code=400, detail="reassign_to must be the ID of another doctor")
+        if not await db.get(doctordb, reassign_to):
+            raise HTTPException(status_code=404, detail="Doctor to reassign patients to not found!")
+    elif reassign_to is not None:
+        raise HTTPException(status_code=400, detail="reassign_to is only used with patients=reassign")
+
+    active = await db.scalar(
+        select(DoctorDeletionJob.id).where(
+            DoctorDeletionJob.doctor_id == doctor_id,
+            DoctorDeletionJob.status.in_(ACTIVE_STATUSES),
+        )
+    )
+    if active:
+        raise HTTPException(status_code=409, detail=f"Doctor is already being deleted (job {active})")
+
+    job = DoctorDeletionJob(
+        id=uuid.uuid4().hex, doctor_id=doctor_id, mode=mode, reassign_to=reassign_to, status="queued", processed=0
+    )
+    db.add(job)
+    outbox_service.enqueue(db, DELETE_DOCTOR_TASK, job.id)
+    await db.commit()
+    outbox_service.notify()
+    await revoke_doctor_tokens(doctor_id)
+    return job
+
+async def deletion_status(db: AsyncSession, job_id: str) -> DoctorDeletionJob:
+    """
+    Return a doctor deletion job.
 
     Raises:
-        HTTPException: 404 if doctor is not found.
+        HTTPException: 404 if there is no such job.
     """
-    db_doctor = db.query(doctordb).filter(doctordb.id == doctor_id).first()
-    if not db_doctor:
-        raise HTTPException(status_code=404, detail="Patient not found!")
-    db.delete(db_doctor)
-    db.commit()
-    return JSONResponse(status_code=204)
+    job = await db.get(DoctorDeletionJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Deletion job not found!")
+    return job
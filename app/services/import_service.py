@@ -0,0 +1,242 @@
+"""
+Bulk patient import.
+
+Parses a JSON array, NDJSON or CSV upload into rows, validates them through
+PatientCreate, computes BMI/verdict for a whole chunk in one columnar pass and
+writes each chunk with a single executemany INSERT in its own transaction.
+One summary email is queued at the end instead of one email per patient.
+"""
+import csv
+import json
+from bisect import bisect_right
+from typing import AsyncIterator, Optional, Union
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import insert, select # type: ignore
+from sqlalchemy.exc import IntegrityError # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession # type: ignore
+from app.core import cache
+from app.models.patient_models import Patient as PatientDB
+from app.models.doctor_models import Doctor as DoctorDB
+from app.schemas.patients import PatientCreate, BulkImportResult, BulkRowError
+from app.services import counter_service, outbox_service, search_index, version_service
+
+BULK_CHUNK_SIZE = 1000
+IMPORT_SUMMARY_TASK = "app.services.celery_task.send_bulk_import_summary_email"  # by name, see outbox_service.enqueue
+PATIENT_FIELDS = ["id", "name", "city", "age", "gender", "height", "weight"]
+CSV_MAX_RECORD_LINES = 100  # physical lines one quoted CSV record may span
+
+# Same thresholds as PatientBase.verdict
+VERDICT_BOUNDS = [18.5, 28]
+VERDICTS = ["Underweight", "Normal", "Obese"]
+
+def _decode(line: bytes) -> Union[str, ValueError]:
+    try:
+        return line.decode("utf-8-sig").rstrip("\r")
+    except UnicodeDecodeError as exc:
+        return ValueError(f"Not valid UTF-8: {exc.reason} at byte {exc.start}")
+
+async def _lines(stream: AsyncIterator[bytes]) -> AsyncIterator[Union[str, ValueError]]:
+    """
+    Split a streamed request body into text lines, blank ones included.
+
+    A line that is not valid UTF-8 is yielded as the ValueError describing
+    it, so it fails its own row rather than the whole import.
+    """
+    buffer = b""
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield _decode(line)
+    if buffer:
+        yield _decode(buffer)
+
+class _IncompleteRecord(Exception):
+    """The csv reader wants a line past the end of those buffered."""
+
+def _parse_record(lines: list[str]) -> Optional[list[str]]:
+    """Parse one CSV record from `lines`, None if a quoted field is still open."""
+    def feed():
+        yield from lines
+        raise _IncompleteRecord
+    try:
+        return next(csv.reader(feed()))
+    except _IncompleteRecord:
+        return None
+
+async def _csv_records(stream: AsyncIterator[bytes]) -> AsyncIterator[Union[list[str], ValueError]]:
+    """
+    Yield the records of a CSV body as lists of values.
+
+    A quoted field may span lines: the lines of a record are buffered until
+    the csv reader can close it, up to CSV_MAX_RECORD_LINES, after which
+    the record is rejected and parsing restarts on the next line.
+    """
+    record: list[str] = []
+    async for line in _lines(stream):
+        if isinstance(line, ValueError):
+            record = []  # the rest of a broken record is not worth guessing at
+            yield line
+            continue
+        if not record and not line.strip():
+            continue
+        record.append(line + "\n")
+        values = _parse_record(record)
+        if values is not None:
+            record = []
+            yield values
+        elif len(record) >= CSV_MAX_RECORD_LINES:
+            record = []
+            yield ValueError(f"Quoted field not closed within {CSV_MAX_RECORD_LINES} lines")
+    if record:
+        yield ValueError("Quoted field not closed at the end of the body")
+
+async def parse_rows(content_type: str, stream: AsyncIterator[bytes]) -> AsyncIterator[object]:
+    """
+    Yield raw rows from an upload according to its content type.
+
+    NDJSON and CSV are parsed line by line as the body streams in (a quoted
+    CSV field may span lines); a JSON array has to be read whole. A row that
+    cannot be decoded, invalid UTF-8 included, is yielded as the ValueError
+    describing it so it is reported with its position.
+
+    Args:
+        content_type (str): Request Content-Type.
+        stream (AsyncIterator[bytes]): Request body.
+
+    Raises:
+        HTTPException: 415 for an unsupported content type, 400 for a JSON body that is not an array
+        or an undecodable CSV header.
+    """
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type == "application/json":
+        body = b"".join([chunk async for chunk in stream])
+        try:
+            rows = json.loads(body or b"[]")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array of patients")
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array of patients")
+        for row in rows:
+            yield row
+    elif media_type in ("application/x-ndjson", "application/ndjson"):
+        async for line in _lines(stream):
+            if isinstance(line, ValueError):
+                yield line
+                continue
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as exc:
+                yield ValueError(f"Invalid JSON: {exc}")
+    elif media_type == "text/csv":
+        header = None
+        async for values in _csv_records(stream):
+            if header is None:
+                if isinstance(values, ValueError):
+                    raise HTTPException(status_code=400, detail=f"Invalid CSV header: {values}")
+                header = [name.strip() for name in values]
+                continue
+            if isinstance(values, ValueError):
+                yield values
+            elif len(values) != len(header):
+                yield ValueError(f"Expected {len(header)} columns, got {len(values)}")
+            else:
+                yield dict(zip(header, values))
+    else:
+        raise HTTPException(status_code=415, detail="Use application/json, application/x-ndjson or text/csv")
+
+def _error_detail(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in exc.errors())
+    return str(exc)
+
+def _with_bmi(patients: list[PatientCreate], doctor_id: int, version: int) -> list[dict]:
+    """Build insert rows for a chunk, computing BMI and verdict column-wise."""
+    heights = [p.height for p in patients]
+    weights = [p.weight for p in patients]
+    bmis = [round(w / (h * h), 2) for h, w in zip(heights, weights)]
+    verdicts = [VERDICTS[bisect_right(VERDICT_BOUNDS, bmi)] for bmi in bmis]
+    return [
+        {**p.model_dump(include=set(PATIENT_FIELDS)), "bmi": bmi, "verdict": verdict,
+         "doctor_id": doctor_id, "version": version}
+        for p, bmi, verdict in zip(patients, bmis, verdicts)
+    ]
+
+async def _flush_chunk(db: AsyncSession, chunk: list[tuple[int, PatientCreate]], doctor_id: int,
+                       result: BulkImportResult):
+    """Insert one validated chunk in its own transaction, skipping IDs that already exist."""
+    ids = [p.id for _, p in chunk]
+    existing = set((await db.scalars(select(PatientDB.id).where(PatientDB.id.in_(ids)))).all())
+    fresh = []
+    for row, patient in chunk:
+        if patient.id in existing:
+            result.errors.append(BulkRowError(row=row, id=patient.id, detail="Patient already exists!"))
+        else:
+            fresh.append((row, patient))
+    if not fresh:
+        return
+
+    try:
+        values = _with_bmi([p for _, p in fresh], doctor_id, await version_service.bump(db, doctor_id))
+        await db.execute(insert(PatientDB), values)
+        await counter_service.adjust_many(db, doctor_id, [v["verdict"] for v in values])
+        await search_index.index(db, [v["id"] for v in values])
+        await db.commit()
+        result.created += len(fresh)
+    except IntegrityError:
+        # a concurrent writer took one of the IDs; the whole chunk is rolled back
+        await db.rollback()
+        result.errors.extend(
+            BulkRowError(row=row, id=p.id, detail="Chunk rolled back: conflicting patient ID") for row, p in fresh
+        )
+
+async def bulk_create_patients(db: AsyncSession, rows: AsyncIterator[object], doctor_id: int) -> BulkImportResult:
+    """
+    Create patients from an iterator of raw rows.
+
+    Args:
+        db (AsyncSession): SQLAlchemy database session.
+        rows (AsyncIterator): Decoded rows, as yielded by `parse_rows`.
+        doctor_id (int): Doctor that owns the imported patients.
+
+    Returns:
+        BulkImportResult: Number of created and failed rows with per-row errors.
+    """
+    result = BulkImportResult(created=0, failed=0)
+    chunk: list[tuple[int, PatientCreate]] = []
+    seen: set[str] = set()
+    row = 0
+    async for raw in rows:
+        row += 1
+        raw_id = raw.get("id") if isinstance(raw, dict) else None
+        try:
+            if isinstance(raw, Exception):
+                raise raw
+            patient = PatientCreate.model_validate(raw)
+        except (ValidationError, ValueError) as exc:
+            result.errors.append(BulkRowError(row=row, id=str(raw_id) if raw_id else None, detail=_error_detail(exc)))
+            continue
+        if patient.id in seen:
+            result.errors.append(BulkRowError(row=row, id=patient.id, detail="Duplicate patient ID in upload"))
+            continue
+        seen.add(patient.id)
+        chunk.append((row, patient))
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            await _flush_chunk(db, chunk, doctor_id, result)
+            chunk = []
+    if chunk:
+        await _flush_chunk(db, chunk, doctor_id, result)
+
+    result.failed = len(result.errors)
+    result.errors.sort(key=lambda e: e.row)
+    if result.created:
+        await cache.invalidate_doctor(doctor_id)
+        doctor = await db.get(DoctorDB, doctor_id)
+        if doctor:
+            outbox_service.enqueue(db, IMPORT_SUMMARY_TASK, doctor.email, result.created, result.failed)
+            await db.commit()
+            outbox_service.notify()
+    return result
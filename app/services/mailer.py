@@ -0,0 +1,157 @@
+"""
+Email transports used by the Celery tasks.
+
+SMTPTransport keeps one authenticated SMTP connection open between messages
+and reconnects when the server dropped it. SMTPConnectionPool hands those
+connections out per worker process (threads pool workers share it), so the
+TLS handshake and login are paid once per connection instead of once per
+email. ConsoleTransport prints messages instead of sending them and is meant
+for local runs and benchmarks; `SMTP_TRANSPORT` selects between the two.
+"""
+import os
+import queue
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from email.message import Message
+from app.core.config import settings
+
+class SMTPTransport:
+    """One persistent SMTP connection with reconnect-on-failure."""
+
+    def __init__(self, host: str, port: int, user: str = "", password: str = "",
+                 starttls: bool = True, timeout: float = 10, idle_timeout: float = 60):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._smtp = None
+        self._last_used = 0.0
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            smtp.starttls()
+        if self.user:
+            smtp.login(self.user, self.password)
+        self._smtp = smtp
+
+    def _is_alive(self) -> bool:
+        if self._smtp is None:
+            return False
+        if time.monotonic() - self._last_used < self.idle_timeout:
+            return True
+        # servers close idle sessions; probe before reusing an old one
+        try:
+            return self._smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def send(self, msg: Message):
+        """Send `msg`, reconnecting once if the connection turns out to be dead."""
+        if not self._is_alive():
+            self.close()
+            self._connect()
+        try:
+            self._smtp.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError):
+            self.close()
+            self._connect()
+            self._smtp.send_message(msg)
+        self._last_used = time.monotonic()
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+class ConsoleTransport:
+    """Transport that prints messages instead of sending them."""
+
+    def send(self, msg: Message):
+        print(f"[email] to={msg['To']} subject={msg['Subject']!r}\n{msg.get_payload()}")
+
+    def close(self):
+        pass
+
+def create_transport():
+    """Build a transport from the SMTP_* settings."""
+    if settings.SMTP_TRANSPORT == "console":
+        return ConsoleTransport()
+    return SMTPTransport(
+        settings.SMTP_HOST,
+        settings.SMTP_PORT,
+        settings.SMTP_USER,
+        settings.SMTP_PASS,
+        starttls=settings.SMTP_STARTTLS,
+        timeout=settings.SMTP_TIMEOUT,
+        idle_timeout=settings.SMTP_IDLE_TIMEOUT,
+    )
+
+class SMTPConnectionPool:
+    """Bounded pool of transports; connections are opened lazily and reused."""
+
+    def __init__(self, size: int, factory=create_transport):
+        self.factory = factory
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        self._slots.acquire()
+        try:
+            try:
+                transport = self._idle.get_nowait()
+            except queue.Empty:
+                transport = self.factory()
+            try:
+                yield transport
+            except Exception:
+                transport.close()
+                raise
+            self._idle.put(transport)
+        finally:
+            self._slots.release()
+
+    def send(self, msg: Message):
+        with self.connection() as transport:
+            transport.send(msg)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def get_mail_pool() -> SMTPConnectionPool:
+    """
+    Return this process's connection pool.
+
+    Sockets must not be shared across fork, so a prefork child that
+    inherited its parent's pool gets a fresh one.
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = SMTPConnectionPool(settings.SMTP_POOL_SIZE)
+            _pool_pid = os.getpid()
+        return _pool
+
+def close_mail_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.close()
+        _pool = None
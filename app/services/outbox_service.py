@@ -0,0 +1,168 @@
+"""
+Transactional outbox for Celery tasks.
+
+`enqueue` adds an OutboxMessage to the caller's session, so the message is
+committed atomically with the change that produced it; no broker round trip
+happens on the request path. The relay started in the app lifespan claims
+pending messages in batches, publishes them over one broker connection and
+deletes them afterwards, giving at-least-once delivery: a message whose
+publish succeeded but whose delete did not is sent again after its claim
+expires. On PostgreSQL the claim skips rows locked by another relay, so two
+relays never claim the same message; on SQLite the single writer already
+serializes claims. A message still unpublished after OUTBOX_MAX_ATTEMPTS
+claims is marked failed (`failed_at`) and left for inspection.
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import and_, delete, or_, select, update # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession # type: ignore
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.database import AsyncWriteSessionLocal
+from app.models.outbox import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+_wakeup: Optional[asyncio.Event] = None
+_relay_task: Optional[asyncio.Task] = None
+
+def enqueue(db: AsyncSession, task, *args):
+    """
+    Stage a Celery task in the caller's transaction.
+
+    Args:
+        db (AsyncSession): Session whose commit will persist the message.
+        task: Registered Celery task, or its name; request-path modules pass
+              the name so importing them does not import Celery.
+        *args: JSON-serializable positional arguments of the task.
+    """
+    db.add(OutboxMessage(task=getattr(task, "name", task), payload=json.dumps(args), attempts=0))
+
+def notify():
+    """Wake the relay after a commit that enqueued messages."""
+    if _wakeup is not None:
+        _wakeup.set()
+
+def _supports_skip_locked(db: AsyncSession) -> bool:
+    return db.bind.dialect.name in ("postgresql", "mysql")
+
+async def _fail_exhausted(db: AsyncSession, now: datetime):
+    """Mark messages whose last allowed claim expired unpublished as failed."""
+    result = await db.execute(
+        update(OutboxMessage)
+        .where(
+            OutboxMessage.failed_at.is_(None),
+            OutboxMessage.attempts >= settings.OUTBOX_MAX_ATTEMPTS,
+            OutboxMessage.locked_until < now,
+        )
+        .values(failed_at=now)
+        .returning(OutboxMessage.id, OutboxMessage.task)
+    )
+    for message_id, task in result:
+        logger.error(
+            "Outbox message %s (%s) failed %s times, giving up", message_id, task, settings.OUTBOX_MAX_ATTEMPTS
+        )
+
+async def _claim_batch(limit: int) -> list:
+    """Claim up to `limit` pending messages for this relay and return them."""
+    now = datetime.utcnow()
+    async with AsyncWriteSessionLocal() as db:
+        await _fail_exhausted(db, now)
+        claimable = and_(
+            OutboxMessage.failed_at.is_(None),
+            OutboxMessage.attempts < settings.OUTBOX_MAX_ATTEMPTS,
+            or_(OutboxMessage.locked_until.is_(None), OutboxMessage.locked_until < now),
+        )
+        pending = select(OutboxMessage.id).where(claimable).order_by(OutboxMessage.id).limit(limit)
+        if _supports_skip_locked(db):
+            pending = pending.with_for_update(skip_locked=True)
+        result = await db.execute(
+            update(OutboxMessage)
+            # `claimable` again: re-checked on rows another relay claimed meanwhile
+            .where(OutboxMessage.id.in_(pending.scalar_subquery()), claimable)
+            .values(
+                locked_until=now + timedelta(seconds=settings.OUTBOX_CLAIM_TIMEOUT),
+                attempts=OutboxMessage.attempts + 1,
+            )
+            .returning(OutboxMessage.id, OutboxMessage.task, OutboxMessage.payload)
+        )
+        rows = result.all()
+        await db.commit()
+    return rows
+
+def _publish(rows: list) -> list:
+    """Publish claimed messages over a single broker connection; return the IDs sent."""
+    from app.core.celery import celery_app  # first publish, off the startup path
+
+    sent = []
+    with celery_app.producer_or_acquire() as producer:
+        for message_id, task, payload in rows:
+            try:
+                celery_app.send_task(task, args=json.loads(payload), producer=producer)
+                sent.append(message_id)
+            except Exception:
+                logger.exception("Outbox message %s (%s) could not be published", message_id, task)
+    return sent
+
+async def drain_once(limit: Optional[int] = None) -> int:
+    """
+    Publish one batch of pending messages.
+
+    Args:
+        limit (int, optional): Batch size, defaults to OUTBOX_BATCH_SIZE.
+
+    Returns:
+        int: Number of messages published and removed from the outbox.
+    """
+    rows = await _claim_batch(limit or settings.OUTBOX_BATCH_SIZE)
+    if not rows:
+        return 0
+    sent = await run_in_threadpool(_publish, rows)
+    if sent:
+        async with AsyncWriteSessionLocal() as db:
+            await db.execute(delete(OutboxMessage).where(OutboxMessage.id.in_(sent)))
+            await db.commit()
+    return len(sent)
+
+async def _relay_loop():
+    while True:
+        try:
+            while await drain_once() >= settings.OUTBOX_BATCH_SIZE:
+                pass
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Outbox relay failed, retrying in %ss", settings.OUTBOX_POLL_INTERVAL)
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=settings.OUTBOX_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
+
+def start_relay():
+    """Start the relay as a background task of the running event loop."""
+    global _wakeup, _relay_task
+    if _relay_task is None and settings.OUTBOX_RELAY_ENABLED:
+        _wakeup = asyncio.Event()
+        _relay_task = asyncio.create_task(_relay_loop())
+
+async def stop_relay():
+    """Stop the relay, flushing what is pending first."""
+    global _wakeup, _relay_task
+    if _relay_task is None:
+        return
+    _relay_task.cancel()
+    try:
+        await _relay_task
+    except asyncio.CancelledError:
+        pass
+    _relay_task = None
+    try:
+        while await drain_once() >= settings.OUTBOX_BATCH_SIZE:
+            pass
+    except Exception:
+        logger.exception("Outbox flush on shutdown failed; messages stay in the outbox")
+    _wakeup = None
@@ -1,89 +1,370 @@
+import base64
+import binascii
+import json
+import math
+from typing import AsyncIterator, Optional
 from fastapi import HTTPException
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session # type: ignore
+from fastapi.responses import Response
+from sqlalchemy import delete, insert, or_, select, text, tuple_, update # type: ignore
+from sqlalchemy.exc import IntegrityError # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession # type: ignore
+from app.core import cache, idempotency
+from app.core.database import AsyncSessionLocal
 from app.models.patient_models import Patient as PatientDB
 from app.models.doctor_models import Doctor as DoctorDB    # SQLAlchemy model
-from app.schemas.patients import PatientCreate, PatientUpdate
-from app.services.celery_task import send_patient_created_email
+from app.core.responses import ETAG_CACHE_CONTROL, RawJSONResponse, dumps, etag, etag_matches, not_modified
+from app.schemas.patients import PatientCreate, PatientUpdate, PatientUpsert, PatientResponse, serialize_patient
+from app.services import counter_service, outbox_service, search_index, version_service
 
-def view(db: Session,doctor_id:int)->list[PatientDB]:
-    """Return a list of all patients from the database.
+VALID_SORT_FIELDS = ["height", "weight", "bmi"]
+STREAM_BATCH_SIZE = 500
+UPSERT_ATTEMPTS = 3  # INSERT/UPDATE rounds before giving up on a row deleted under the upsert
+SEARCH_FIELDS = {"name", "city", "doctor_id"}  # columns held by the search index
+# Celery tasks are staged by name: importing app.services.celery_task loads Celery, kombu and smtplib
+PATIENT_CREATED_TASK = "app.services.celery_task.send_patient_created_email"
+
+def _encode_cursor(values: list) -> str:
+    """Encode the keyset values of the last row of a page into an opaque cursor."""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def _cursor_value_ok(value, python_type: type) -> bool:
+    """Whether a decoded cursor value can be bound against a column of `python_type`."""
+    if python_type is str:
+        return isinstance(value, str)
+    if isinstance(value, bool):  # an int to isinstance, never a valid key
+        return False
+    if python_type is int:
+        return isinstance(value, int)
+    return isinstance(value, (int, float)) and math.isfinite(value)
+
+def _decode_cursor(cursor: str, types: tuple) -> list:
+    """
+    Decode a cursor produced by `_encode_cursor`.
+
+    Args:
+        cursor (str): The opaque cursor.
+        types (tuple): Python type of each keyset value (str for the ID,
+                       float for the sort column, int for an offset).
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed or does not match the sort key.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if (
+        not isinstance(values, list)
+        or len(values) != len(types)
+        or not all(_cursor_value_ok(value, python_type) for value, python_type in zip(values, types))
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+def _validate_sort(sort_by: str, order: str):
+    """
+    Validate the sort field and order used by the sorted listings.
+
+    Raises:
+        HTTPException: 400 if invalid field or order is provided.
+    """
+    if sort_by not in VALID_SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Invalid field. Use one of {VALID_SORT_FIELDS}")
+    if order not in ["asc", "desc"]:
+        raise HTTPException(status_code=400, detail="Invalid order. Use asc or desc")
+
+def _sorted_query(doctor_id: int, columns: list, order: str):
+    """Build the doctor's patient select ordered by `columns` (the last one must be unique)."""
+    query = select(PatientDB).where(PatientDB.doctor_id == doctor_id)
+    return query.order_by(*[c.desc() if order == "desc" else c.asc() for c in columns])
+
+async def _get_patient(db: AsyncSession, patient_id: str, doctor_id: int)->Optional[PatientDB]:
+    """Load one of the doctor's patients, or None if it does not exist."""
+    result = await db.scalars(
+        select(PatientDB).where(PatientDB.id == patient_id, PatientDB.doctor_id == doctor_id)
+    )
+    return result.first()
+
+async def _keyset_page(db: AsyncSession, query, columns: list, order: str, limit: int, cursor: Optional[str])->dict:
+    """
+    Fetch one page of `query` using keyset pagination.
+
+    Rows after the cursor are selected with a row-value comparison on
+    `columns`, so the database seeks straight to the page instead of
+    scanning and discarding OFFSET rows.
+
+    Returns:
+        dict: `items` (list of PatientDB) and `next_cursor` (None on the last page).
+    """
+    if cursor:
+        values = _decode_cursor(cursor, tuple(c.type.python_type for c in columns))
+        key = tuple_(*columns) if len(columns) > 1 else columns[0]
+        bound = tuple_(*values) if len(columns) > 1 else values[0]
+        query = query.where(key < bound if order == "desc" else key > bound)
+
+    rows = (await db.scalars(query.limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor([getattr(rows[-1], c.key) for c in columns])
+    return {"items": rows, "next_cursor": next_cursor}
+
+def _dump_page(page: dict) -> str:
+    """Serialize a `_keyset_page` result in the PatientPage shape."""
+    return dumps({"items": [serialize_patient(p) for p in page["items"]], "next_cursor": page["next_cursor"]})
+
+def _versioned_response(body: str, tag: str) -> Response:
+    return RawJSONResponse(body, headers={"ETag": tag, "Cache-Control": ETAG_CACHE_CONTROL})
+
+async def view(db: AsyncSession,doctor_id:int, limit: int = 50, cursor: Optional[str] = None,
+               if_none_match: Optional[str] = None)->Response:
+    """Return one page of the doctor's patients ordered by ID.
+
+    The ETag is the doctor's row version, which every change to their
+    patients bumps; a matching If-None-Match is answered with a 304 after
+    that single primary-key lookup. Otherwise pages are served through the
+    read-through cache, keyed by the doctor's cache and row versions, page
+    size and cursor. The cached JSON is returned as-is so a hit costs no
+    validation or re-encoding.
 
     Args:
-        db (Session): SQLAlchemy database session.
+        db (AsyncSession): SQLAlchemy database session.
+        limit (int): Maximum number of patients in the page.
+        cursor (str, optional): `next_cursor` of the previous page.
+        if_none_match (str, optional): If-None-Match header of the request.
 
     Returns:
-        PatientDB: Patients record if found.
+        Response: PatientPage JSON with `items` and `next_cursor`, or 304.
     """
-    return db.query(PatientDB).filter(PatientDB.doctor_id == doctor_id).all()
+    row_version = await version_service.doctor_version(db, doctor_id) or 0
+    tag = etag(doctor_id, row_version)
+    if etag_matches(if_none_match, tag):
+        return not_modified(tag)
+
+    async def load():
+        query = _sorted_query(doctor_id, [PatientDB.id], "asc")
+        return _dump_page(await _keyset_page(db, query, [PatientDB.id], "asc", limit, cursor))
+
+    version = await cache.doctor_version(doctor_id)
+    key = cache.doctor_key(doctor_id, version, "view", row_version, limit, cursor or "")
+    return _versioned_response(await cache.get_or_load(key, load), tag)
 
-def view_patient(db: Session, patient_id: str,doctor_id:int)->PatientDB:
+async def view_patient(db: AsyncSession, patient_id: str,doctor_id:int,
+                       if_none_match: Optional[str] = None)->Response:
     
     """
     Retrieve a single patient's details by their unique ID.
 
+    The patient's row version is looked up first (by primary key): it is
+    the ETag, and a matching If-None-Match gets a 304 without loading the
+    row. Otherwise served through the read-through cache; misses are not
+    cached.
+
     Args:
         patient_id (str): Patient ID to look up (e.g., "P001").
-        db (Session): SQLAlchemy database session.
+        db (AsyncSession): SQLAlchemy database session.
+        if_none_match (str, optional): If-None-Match header of the request.
 
     Returns:
-        PatientDB: Patient record if found.
+        Response: PatientResponse JSON of the patient if found, or 304.
 
     Raises:
         HTTPException: 404 if patient is not found.
     """
-    patient = db.query(PatientDB).filter(PatientDB.id == patient_id, PatientDB.doctor_id == doctor_id).first()
-    if not patient:
+    row_version = await version_service.patient_version(db, patient_id, doctor_id)
+    if row_version is None:
         raise HTTPException(status_code=404, detail="Patient not found!")
-    return patient
+    tag = etag(doctor_id, row_version)
+    if etag_matches(if_none_match, tag):
+        return not_modified(tag)
+
+    async def load():
+        patient = await _get_patient(db, patient_id, doctor_id)
+        if not patient:
+            raise HTTPException(status_code=404, detail="Patient not found!")
+        return dumps(serialize_patient(patient))
+
+    version = await cache.doctor_version(doctor_id)
+    key = cache.doctor_key(doctor_id, version, "patient", patient_id, row_version)
+    return _versioned_response(await cache.get_or_load(key, load), tag)
 
-def sorted_patients(db: Session, sort_by: str, order: str,doctor_id:int)->list[PatientDB]:
+async def sorted_patients(db: AsyncSession, sort_by: str, order: str,doctor_id:int,
+                          limit: int = 50, cursor: Optional[str] = None)->str:
     """
-    Retrieve patients sorted by a specified field and order.
+    Retrieve one page of patients sorted by a specified field and order.
+
+    The page is keyed on (sort column, patient ID) so ties on the sort
+    column are broken deterministically between pages.
 
     Args:
         sort_by (str): Column to sort on ('weight', 'height', or 'bmi'). Defaults to 'weight'.
         order (str): Sort order ('asc' or 'desc'). Defaults to 'asc'.
-        db (Session): SQLAlchemy database session.
+        db (AsyncSession): SQLAlchemy database session.
+        limit (int): Maximum number of patients in the page.
+        cursor (str, optional): `next_cursor` of the previous page.
+
+    Returns:
+        str: PatientPage JSON with the sorted `items` and `next_cursor`.
+
+    Raises:
+        HTTPException: 400 if invalid field, order or cursor is provided.
+    """
+    _validate_sort(sort_by, order)
+    columns = [getattr(PatientDB, sort_by), PatientDB.id]
+    query = _sorted_query(doctor_id, columns, order)
+    return _dump_page(await _keyset_page(db, query, columns, order, limit, cursor))
+
+async def search_patients(db: AsyncSession, query: str, doctor_id: int,
+                          limit: int = 20, cursor: Optional[str] = None)->str:
+    """
+    Search the doctor's patients by name and city, best matches first.
+
+    Every word of `query` must prefix-match a word of the patient's name
+    or city. On SQLite the lookup runs on the doctor-scoped FTS5 index and
+    is ranked by bm25 with name matches weighing twice as much as city
+    matches; other
+    databases fall back to an unranked ILIKE over both columns. Results are
+    served through the read-through cache.
+
+    Args:
+        db (AsyncSession): SQLAlchemy database session.
+        query (str): Free-text search, e.g. "ali lah".
+        doctor_id (int): Doctor whose patients are searched.
+        limit (int): Maximum number of patients in the page.
+        cursor (str, optional): `next_cursor` of the previous page.
+
+    Returns:
+        str: PatientPage JSON with the ranked `items` and `next_cursor`.
+
+    Raises:
+        HTTPException: 400 if the cursor is invalid.
+    """
+    offset = _decode_cursor(cursor, (int,))[0] if cursor else 0
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not search_index.has_terms(query):
+        return _dump_page({"items": [], "next_cursor": None})
+
+    async def load():
+        if search_index.is_fts(db):
+            statement = select(PatientDB).from_statement(
+                text(
+                    "SELECT patients.* FROM patients_fts JOIN patients ON patients.rowid = patients_fts.rowid "
+                    "WHERE patients_fts MATCH :match AND patients.doctor_id = :doctor_id "
+                    "ORDER BY bm25(patients_fts, 2.0, 1.0), patients.id "
+                    "LIMIT :limit OFFSET :offset"
+                ).bindparams(
+                    match=search_index.match_expression(query, doctor_id),
+                    doctor_id=doctor_id, limit=limit + 1, offset=offset,
+                )
+            )
+        else:
+            pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            statement = (
+                select(PatientDB)
+                .where(
+                    PatientDB.doctor_id == doctor_id,
+                    or_(PatientDB.name.ilike(pattern, escape="\\"), PatientDB.city.ilike(pattern, escape="\\")),
+                )
+                .order_by(PatientDB.name, PatientDB.id)
+                .limit(limit + 1)
+                .offset(offset)
+            )
+        rows = (await db.scalars(statement)).all()
+        next_cursor = _encode_cursor([offset + limit]) if len(rows) > limit else None
+        return _dump_page({"items": rows[:limit], "next_cursor": next_cursor})
+
+    version = await cache.doctor_version(doctor_id)
+    key = cache.doctor_key(doctor_id, version, "search", query, limit, cursor or "")
+    return await cache.get_or_load(key, load)
+
+def stream_patients(doctor_id: int, sort_by: Optional[str] = None, order: str = "asc")->AsyncIterator[str]:
+    """
+    Stream all of the doctor's patients as NDJSON lines.
+
+    Rows are fetched in batches through `yield_per`, so memory stays flat
+    regardless of how many patients the doctor has. The generator owns its
+    own session because it keeps running after the request dependency
+    has been closed.
+
+    Args:
+        doctor_id (int): Doctor whose patients are streamed.
+        sort_by (str, optional): Column to sort on ('weight', 'height', or 'bmi').
+                                 Patients are ordered by ID when omitted.
+        order (str): Sort order ('asc' or 'desc').
 
     Returns:
-        list[PatientDB]: Sorted list of patients.
+        AsyncIterator[str]: One JSON-encoded PatientResponse per line.
 
     Raises:
         HTTPException: 400 if invalid field or order is provided.
     """
-    valid_fields = ["height", "weight", "bmi"]
-    if sort_by not in valid_fields:
-        raise HTTPException(status_code=400, detail=f"Invalid field. Use one of {valid_fields}")
-    if order not in ["asc", "desc"]:
-        raise HTTPException(status_code=400, detail="Invalid order. Use asc or desc")
+    if sort_by is not None:
+        _validate_sort(sort_by, order)
+        columns = [getattr(PatientDB, sort_by), PatientDB.id]
+    else:
+        columns = [PatientDB.id]
+
+    async def rows():
+        async with AsyncSessionLocal() as db:
+            query = _sorted_query(doctor_id, columns, order).execution_options(yield_per=STREAM_BATCH_SIZE)
+            result = await db.stream_scalars(query)
+            async for patient in result:
+                yield dumps(serialize_patient(patient)) + "\n"
+
+    return rows()
+
+def _dialect_insert(dialect: str):
+    """The insert() construct with ON CONFLICT support for `dialect`, None if it has none."""
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert
+
+async def _insert_if_absent(db: AsyncSession, values: dict, returning):
+    """
+    INSERT a patient unless its ID is taken (by any doctor).
 
-    column = getattr(PatientDB, sort_by)
-    query = db.query(PatientDB).filter(PatientDB.doctor_id == doctor_id)
-    query = query.order_by(column.desc() if order == "desc" else column.asc())
-    return query.all()
+    One statement where the dialect has ON CONFLICT DO NOTHING, else a
+    savepoint around a plain INSERT.
 
-def create_patient(db: Session, patient: PatientCreate,doctor_id:int)->dict:
+    Returns:
+        The `returning` value of the inserted row, None if the ID was taken.
+    """
+    dialect_insert = _dialect_insert(db.bind.dialect.name)
+    if dialect_insert is not None:
+        statement = (
+            dialect_insert(PatientDB).values(**values)
+            .on_conflict_do_nothing(index_elements=[PatientDB.id])
+            .returning(returning)
+        )
+        return (await db.scalars(statement)).first()
+    try:
+        async with db.begin_nested():
+            return (await db.scalars(insert(PatientDB).values(**values).returning(returning))).first()
+    except IntegrityError:
+        return None
+
+async def create_patient(db: AsyncSession, patient: PatientCreate,doctor_id:int)->dict:
     """
     Create a new patient record.
 
     Args:
         patient (Patient): Request body validated using Pydantic with
                            all required patient details.
-        db (Session): SQLAlchemy database session.
+        db (AsyncSession): SQLAlchemy database session.
 
     Returns:
         dict: Success message if creation is successful.
 
     Raises:
-        HTTPException: 400 if a patient with the same ID already exists.
+        HTTPException: 400 if a patient with the same ID already exists (for any doctor).
     """
-    # Check if patient already exists
-    existing = db.query(PatientDB).filter(PatientDB.id == patient.id, PatientDB.doctor_id == doctor_id).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Patient already exists!")
-
-    db_patient = PatientDB(
+    values = dict(
         id=patient.id,
         name=patient.name,
         city=patient.city,
@@ -93,19 +374,26 @@ def create_patient(db: Session, patient: PatientCreate,doctor_id:int)->dict:
         weight=patient.weight,
         bmi=patient.bmi,            # computed_field se direct
         verdict=patient.verdict,    # computed_field se direct
-        doctor_id = doctor_id
+        doctor_id = doctor_id,
+        version = await version_service.bump(db, doctor_id),
     )
-    db.add(db_patient)
-    db.commit()
-    db.refresh(db_patient)
-    doctor = db.query(DoctorDB).filter(DoctorDB.id == doctor_id).first()
-    print("Doctor email:", doctor.email)
-    print("Patient ID:", db_patient.id)
+    # the ID is a global key, so a duplicate (of any doctor) inserts nothing
+    created = await _insert_if_absent(db, values, PatientDB.id)
+    if created is None:
+        raise HTTPException(status_code=400, detail="Patient already exists!")
+
+    await counter_service.adjust(db, doctor_id, patient.verdict, 1)
+    await search_index.index(db, [patient.id])
+    doctor = await db.get(DoctorDB, doctor_id)
     if doctor:
-        send_patient_created_email.delay(doctor.email, db_patient.id)
+        # committed with the patient, published by the outbox relay
+        outbox_service.enqueue(db, PATIENT_CREATED_TASK, doctor.email, patient.id)
+    await db.commit()
+    outbox_service.notify()
+    await cache.invalidate_doctor(doctor_id)
     return {"message": "Patient created successfully"}
 
-def update_patient(db: Session, patient_id: str, patient: PatientUpdate,doctor_id:int)->dict:
+async def update_patient(db: AsyncSession, patient_id: str, patient: PatientUpdate,doctor_id:int)->dict:
     """
     Update an existing patient's details.
 
@@ -113,7 +401,7 @@ def update_patient(db: Session, patient_id: str, patient: PatientUpdate,doctor_i
         patient_id (str): ID of the patient to update.
         patient (PatientUpdate): Pydantic model containing fields to update
                                  (only provided fields will be modified).
-        db (Session): SQLAlchemy database session.
+        db (AsyncSession): SQLAlchemy database session.
 
     Returns:
         dict: Success message upon successful update.
@@ -121,12 +409,21 @@ def update_patient(db: Session, patient_id: str, patient: PatientUpdate,doctor_i
     Raises:
         HTTPException: 404 if patient is not found.
     """
-    db_patient = db.query(PatientDB).filter(PatientDB.id == patient_id, PatientDB.doctor_id ==doctor_id).first()
+    db_patient = await _get_patient(db, patient_id, doctor_id)
     if not db_patient:
         raise HTTPException(status_code=404, detail="Patient not found!")
+    old_doctor_id, old_verdict = db_patient.doctor_id, db_patient.verdict
+    changes = patient.model_dump(exclude_unset=True)
+    reindex = bool(SEARCH_FIELDS & changes.keys())
+    if reindex:
+        # FTS5 removes entries by their old values, so before anything is flushed
+        await search_index.unindex(db, [patient_id])
 
-    for field, value in patient.model_dump(exclude_unset=True).items():
+    for field, value in changes.items():
         setattr(db_patient, field, value)
+    db_patient.version = await version_service.bump(db, db_patient.doctor_id)
+    if db_patient.doctor_id != old_doctor_id:
+        await version_service.bump(db, old_doctor_id)
 
     # Recompute BMI/Verdit if weight or height changed
     if patient.height or patient.weight:
@@ -139,27 +436,161 @@ def update_patient(db: Session, patient_id: str, patient: PatientUpdate,doctor_i
             else "Obese"
         )
 
-    db.commit()
-    db.refresh(db_patient)
+    await db.flush()
+    await counter_service.move(db, old_doctor_id, old_verdict, db_patient.doctor_id, db_patient.verdict)
+    if reindex:
+        await search_index.index(db, [patient_id])
+    await db.commit()
+    await cache.invalidate_doctor(doctor_id)
+    if db_patient.doctor_id != doctor_id:
+        # patient moved to another doctor
+        await cache.invalidate_doctor(db_patient.doctor_id)
     return {"message": "Patient updated successfully"}
 
-def patient_delete(db: Session, patient_id: str,doctor_id:int)->JSONResponse:
+async def upsert_patient(db: AsyncSession, patient_id: str, patient: PatientUpsert, doctor_id: int,
+                         idempotency_key: Optional[str] = None)->Response:
+    """
+    Create or fully replace a patient.
+
+    The write starts with an INSERT ... ON CONFLICT DO NOTHING, so whether
+    the patient was created comes from the statement itself, not from an
+    earlier read a concurrent insert could have made stale. When the ID is
+    taken, the existing row is read FOR UPDATE (for the counters and the
+    search index) and updated. The counters and search index are adjusted in
+    the same transaction. Repeating the call converges to the same state;
+    with an Idempotency-Key a retry also gets the original response back.
+
+    Args:
+        patient_id (str): ID of the patient to create or replace.
+        patient (PatientUpsert): Full patient data.
+        doctor_id (int): Doctor that owns the patient.
+        idempotency_key (str, optional): Idempotency-Key header of the request.
+        db (AsyncSession): SQLAlchemy database session.
+
+    Returns:
+        Response: 201 with the created patient or 200 with the replaced one.
+
+    Raises:
+        HTTPException: 400 if the body ID differs from the path ID, 409 if the
+        ID belongs to another doctor's patient or keeps being deleted under
+        the call, 409/422 for Idempotency-Key misuse.
+    """
+    if patient.id is not None and patient.id != patient_id:
+        raise HTTPException(status_code=400, detail="Patient ID in the body does not match the path")
+
+    request_fingerprint = idempotency.fingerprint("PUT", patient_id, patient.model_dump_json())
+    if idempotency_key:
+        stored = await idempotency.begin(doctor_id, idempotency_key, request_fingerprint)
+        if stored is not None:
+            return RawJSONResponse(stored["body"], status_code=stored["status"], headers={"Idempotent-Replayed": "true"})
+
+    try:
+        fields = {**patient.model_dump(exclude={"id"}), "version": await version_service.bump(db, doctor_id)}
+        for _ in range(UPSERT_ATTEMPTS):
+            old = None
+            db_patient = await _insert_if_absent(db, {**fields, "id": patient_id, "doctor_id": doctor_id}, PatientDB)
+            if db_patient is not None:
+                break
+            old = (await db.execute(
+                select(PatientDB.doctor_id, PatientDB.verdict).where(PatientDB.id == patient_id).with_for_update()
+            )).first()
+            if old is None:
+                continue  # deleted since the INSERT: insert again
+            if old.doctor_id != doctor_id:
+                raise HTTPException(status_code=409, detail="Patient ID is already in use")
+            await search_index.unindex(db, [patient_id])
+            db_patient = (await db.scalars(
+                update(PatientDB).where(PatientDB.id == patient_id).values(**fields)
+                .returning(PatientDB).execution_options(populate_existing=True)
+            )).first()
+            break
+        else:
+            raise HTTPException(status_code=409, detail="Patient was modified concurrently, retry")
+
+        if old is None:
+            await counter_service.adjust(db, doctor_id, db_patient.verdict, 1)
+        else:
+            await counter_service.move(db, doctor_id, old.verdict, doctor_id, db_patient.verdict)
+        await search_index.index(db, [patient_id])
+        doctor = await db.get(DoctorDB, doctor_id) if old is None else None
+        if doctor:
+            outbox_service.enqueue(db, PATIENT_CREATED_TASK, doctor.email, patient_id)
+        # validated, not serialize_patient: SQLite's RETURNING skips REAL affinity (70.0 comes back as 70)
+        body = PatientResponse.model_validate(db_patient).model_dump_json()
+        await db.commit()
+    except BaseException:
+        if idempotency_key:
+            await idempotency.release(doctor_id, idempotency_key)
+        raise
+
+    outbox_service.notify()
+    await cache.invalidate_doctor(doctor_id)
+    status_code = 201 if old is None else 200
+    if idempotency_key:
+        await idempotency.complete(doctor_id, idempotency_key, request_fingerprint, status_code, body)
+    return RawJSONResponse(body, status_code=status_code)
+
+async def _delete_patients(db: AsyncSession, doctor_id: int, patient_ids: list) -> list:
+    """
+    Delete the doctor's patients among `patient_ids` with one DELETE ... RETURNING.
+
+    The returned rows carry what the counters and the search index need, so
+    nothing is loaded before the delete.
+
+    Returns:
+        list: IDs of the patients that were deleted.
+    """
+    result = await db.execute(
+        delete(PatientDB)
+        .where(PatientDB.doctor_id == doctor_id, PatientDB.id.in_(patient_ids))
+        .returning(PatientDB.id, PatientDB.verdict, *search_index.returning_columns(db))
+        .execution_options(synchronize_session=False)
+    )
+    rows = result.all()
+    if rows:
+        await version_service.bump(db, doctor_id)
+    await search_index.unindex_rows(db, doctor_id, [row[2:] for row in rows])
+    await counter_service.adjust_many(db, doctor_id, [row.verdict for row in rows], -1)
+    return [row.id for row in rows]
+
+async def patient_delete(db: AsyncSession, patient_id: str,doctor_id:int)->Response:
     """
     Delete a patient record by ID.
 
     Args:
         patient_id (str): ID of the patient to delete.
-        db (Session): SQLAlchemy database session.
+        db (AsyncSession): SQLAlchemy database session.
 
     Returns:
-        JSONResponse: 204 No Content on successful deletion.
+        Response: 204 No Content on successful deletion.
 
     Raises:
         HTTPException: 404 if patient is not found.
     """
-    db_patient = db.query(PatientDB).filter(PatientDB.id == patient_id,PatientDB.doctor_id == doctor_id).first()
-    if not db_patient:
+    if not await _delete_patients(db, doctor_id, [patient_id]):
         raise HTTPException(status_code=404, detail="Patient not found!")
-    db.delete(db_patient)
-    db.commit()
-    return JSONResponse(status_code=204)
+    await db.commit()
+    await cache.invalidate_doctor(doctor_id)
+    return Response(status_code=204)
+
+async def bulk_delete_patients(db: AsyncSession, patient_ids: list, doctor_id: int) -> dict:
+    """
+    Delete many of the doctor's patients in one statement.
+
+    IDs that do not exist or belong to another doctor are not deleted and
+    are reported back; the rest is deleted either way.
+
+    Args:
+        patient_ids (list): IDs of the patients to delete.
+        db (AsyncSession): SQLAlchemy database session.
+
+    Returns:
+        dict: `deleted` count and the `not_found` IDs.
+    """
+    requested = list(dict.fromkeys(patient_ids))
+    deleted = await _delete_patients(db, doctor_id, requested)
+    await db.commit()
+    if deleted:
+        await cache.invalidate_doctor(doctor_id)
+    deleted = set(deleted)
+    return {"deleted": len(deleted), "not_found": [pid for pid in requested if pid not in deleted]}
@@ -0,0 +1,137 @@
+"""
+Full-text index over patient names and cities.
+
+On SQLite the index is a contentless FTS5 table, `patients_fts`, whose rowid
+is the rowid of the patient in `patients`. Every word is indexed scoped to
+its doctor (`Ali` of doctor 7 becomes the term `d7xali`), so a query only
+walks the posting lists of one doctor's patients instead of intersecting a
+global word list with a global doctor list; its cost grows with the
+doctor's patient count, not with the size of the table.
+
+A contentless table stores no copy of the text and does not follow
+`patients` by itself: the patient write paths call `unindex` before a row
+changes or is deleted (FTS5 needs the old terms to remove them) and `index`
+after the new values are flushed. Set-based DELETE/UPDATE statements instead
+return `returning_columns` and hand the returned rows to `unindex_rows` /
+`remove_rows` / `add_rows`. `rebuild` regenerates the whole index,
+e.g. after a VACUUM, which may renumber the rowids of `patients`.
+
+Other databases have no FTS5; there search falls back to ILIKE, which a
+pg_trgm index makes fast on PostgreSQL.
+"""
+import re
+from typing import Iterable, Optional
+from sqlalchemy import DDL, Connection, bindparam, event, literal_column, text # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+from app.models.patient_models import Patient as PatientDB
+
+FTS_TABLE = "patients_fts"
+REBUILD_BATCH_SIZE = 10_000
+
+CREATE_FTS = DDL(
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "name, city, content='', tokenize='unicode61 remove_diacritics 2')"
+)
+
+# fresh databases built by create_all get the index with the table
+event.listen(PatientDB.__table__, "after_create", CREATE_FTS.execute_if(dialect="sqlite"))
+
+# letters and digits only: unicode61 splits on '_' and punctuation, so a
+# term containing them would lose its doctor scope after the first piece
+_WORD = re.compile(r"[^\W_]+", re.UNICODE)
+
+_ROWS = text(
+    "SELECT rowid, name, city, doctor_id FROM patients WHERE id IN :ids"
+).bindparams(bindparam("ids", expanding=True))
+_ADD = text(f"INSERT INTO {FTS_TABLE} (rowid, name, city) VALUES (:rowid, :name, :city)")
+_REMOVE = text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, name, city) VALUES ('delete', :rowid, :name, :city)")
+
+def is_fts(db) -> bool:
+    return db.bind.dialect.name == "sqlite"
+
+def returning_columns(db) -> tuple:
+    """Columns a DELETE/UPDATE of patients must RETURN for `*_rows`; none without FTS5."""
+    if not is_fts(db):
+        return ()
+    return (literal_column("rowid"), PatientDB.name, PatientDB.city)
+
+def _terms(doctor_id: Optional[int], value: Optional[str]) -> str:
+    if doctor_id is None or not value:
+        return ""
+    return " ".join(f"d{doctor_id}x{word.lower()}" for word in _WORD.findall(value))
+
+def _entries(rows) -> list:
+    return [
+        {"rowid": rowid, "name": _terms(doctor_id, name), "city": _terms(doctor_id, city)}
+        for rowid, name, city, doctor_id in rows
+    ]
+
+def _doctor_entries(doctor_id: int, rows) -> list:
+    return _entries((rowid, name, city, doctor_id) for rowid, name, city in rows)
+
+def has_terms(query: str) -> bool:
+    return bool(_WORD.search(query))
+
+def match_expression(query: str, doctor_id: int) -> str:
+    """
+    Build an FTS5 MATCH expression from free text.
+
+    Every word must match the start of a word in the name or city of one
+    of `doctor_id`'s patients (`lah` finds Lahore). User input is reduced to
+    quoted words, so FTS5 operators in it are never interpreted.
+    """
+    terms = " ".join(f'"d{int(doctor_id)}x{word.lower()}"*' for word in _WORD.findall(query))
+    return f"{{name city}} : ({terms})"
+
+async def index(db: AsyncSession, patient_ids: Iterable[str]):
+    """Add the current (flushed) rows of `patient_ids` to the index."""
+    ids = list(patient_ids)
+    if not ids or not is_fts(db):
+        return
+    entries = _entries(await db.execute(_ROWS, {"ids": ids}))
+    if entries:
+        await db.execute(_ADD, entries)
+
+async def unindex(db: AsyncSession, patient_ids: Iterable[str]):
+    """Remove `patient_ids` from the index; call before their rows change or go away."""
+    ids = list(patient_ids)
+    if not ids or not is_fts(db):
+        return
+    entries = _entries(await db.execute(_ROWS, {"ids": ids}))
+    if entries:
+        await db.execute(_REMOVE, entries)
+
+async def unindex_rows(db: AsyncSession, doctor_id: int, rows: list):
+    """Remove rows of `doctor_id` returned (`returning_columns`) by a DELETE or UPDATE."""
+    entries = _doctor_entries(doctor_id, rows)
+    if entries and is_fts(db):
+        await db.execute(_REMOVE, entries)
+
+def remove_rows(db: Session, doctor_id: int, rows: list):
+    """Synchronous `unindex_rows`, for jobs running outside the event loop."""
+    entries = _doctor_entries(doctor_id, rows)
+    if entries and is_fts(db):
+        db.execute(_REMOVE, entries)
+
+def add_rows(db: Session, doctor_id: int, rows: list):
+    """Index rows (`returning_columns`) that now belong to `doctor_id`."""
+    entries = _doctor_entries(doctor_id, rows)
+    if entries and is_fts(db):
+        db.execute(_ADD, entries)
+
+def rebuild(connection: Connection):
+    """Regenerate the whole index from `patients`; the caller commits."""
+    if connection.dialect.name != "sqlite":
+        return
+    connection.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('delete-all')"))
+    rows = connection.execute(
+        text("SELECT rowid, name, city, doctor_id FROM patients").execution_options(yield_per=REBUILD_BATCH_SIZE)
+    )
+    for batch in rows.partitions():
+        connection.execute(_ADD, _entries(batch))
+
+if __name__ == "__main__":
+    from app.core.database import engine
+    with engine.begin() as conn:
+        rebuild(conn)
@@ -0,0 +1,199 @@
+"""
+Patient statistics computed in SQL.
+
+Every aggregate runs in the database over the doctor's patients, using the
+(doctor_id, <column>, id) indexes where they exist, so no patient rows are
+shipped to the application. Results are cached per doctor through
+`app.core.cache` and dropped by the same version bump as every patient write.
+"""
+import math
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import case, func, select # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession # type: ignore
+from app.core import cache
+from app.models.patient_models import Patient as PatientDB
+from app.services import counter_service
+from app.schemas.stats import GroupedStats, GroupStats, Histogram, HistogramBin, NumericStats, StatsSummary
+
+PERCENTILES = [25, 50, 75, 90]
+NUMERIC_FIELDS = ["bmi", "age", "weight", "height"]
+GROUP_FIELDS = ["city", "gender", "verdict"]
+
+def _rounded(value) -> Optional[float]:
+    return None if value is None else round(float(value), 2)
+
+async def _percentiles(db: AsyncSession, doctor_id: int, column, count: int) -> dict:
+    """
+    Nearest-rank percentiles read from the sorted column.
+
+    One ORDER BY ... OFFSET rank query per percentile: the (doctor_id,
+    column) index avoids the sort, but each query still steps over `rank`
+    index entries, so the cost grows with the doctor's patient count.
+    """
+    values = {}
+    for p in PERCENTILES:
+        rank = max(math.ceil(p / 100 * count) - 1, 0)
+        value = await db.scalar(
+            select(column)
+            .where(PatientDB.doctor_id == doctor_id, column.is_not(None))
+            .order_by(column)
+            .offset(rank)
+            .limit(1)
+        )
+        if value is not None:
+            values[f"p{p}"] = round(float(value), 2)
+    return values
+
+async def _numeric(db: AsyncSession, doctor_id: int, column) -> NumericStats:
+    row = (await db.execute(
+        select(func.avg(column), func.min(column), func.max(column), func.count(column))
+        .where(PatientDB.doctor_id == doctor_id)
+    )).one()
+    return NumericStats(
+        mean=_rounded(row[0]),
+        min=_rounded(row[1]),
+        max=_rounded(row[2]),
+        percentiles=await _percentiles(db, doctor_id, column, row[3]) if row[3] else {},
+    )
+
+async def _counts(db: AsyncSession, doctor_id: int, column) -> dict:
+    result = await db.execute(
+        select(column, func.count()).where(PatientDB.doctor_id == doctor_id).group_by(column)
+    )
+    return {str(getattr(key, "value", key)): count for key, count in result}
+
+async def summary(db: AsyncSession, doctor_id: int) -> StatsSummary:
+    """
+    Overall statistics of the doctor's patients.
+
+    Args:
+        db (AsyncSession): SQLAlchemy database session.
+        doctor_id (int): Doctor whose patients are aggregated.
+
+    Returns:
+        StatsSummary: Count, verdict and gender distributions, BMI and age statistics.
+    """
+    async def load():
+        counters = await counter_service.doctor_counts(db, doctor_id)
+        return StatsSummary(
+            count=counters.patients if counters else 0,
+            verdicts=counter_service.verdict_counts(counters),
+            genders=await _counts(db, doctor_id, PatientDB.gender),
+            bmi=await _numeric(db, doctor_id, PatientDB.bmi),
+            age=await _numeric(db, doctor_id, PatientDB.age),
+        ).model_dump_json()
+
+    version = await cache.doctor_version(doctor_id)
+    key = cache.doctor_key(doctor_id, version, "stats", "summary")
+    return StatsSummary.model_validate_json(await cache.get_or_load(key, load))
+
+async def histogram(db: AsyncSession, doctor_id: int, field: str, bins: int,
+                    lower: Optional[float] = None, upper: Optional[float] = None) -> Histogram:
+    """
+    Fixed-width histogram of a numeric column, bucketed in SQL.
+
+    Args:
+        db (AsyncSession): SQLAlchemy database session.
+        doctor_id (int): Doctor whose patients are aggregated.
+        field (str): Column to bucket ('bmi', 'age', 'weight' or 'height').
+        bins (int): Number of buckets.
+        lower (float, optional): Lower bound, defaults to the column minimum.
+        upper (float, optional): Upper bound (inclusive), defaults to the column maximum.
+
+    Returns:
+        Histogram: One entry per bucket, empty buckets included.
+
+    Raises:
+        HTTPException: 400 if the field or the bounds are invalid.
+    """
+    if field not in NUMERIC_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Invalid field. Use one of {NUMERIC_FIELDS}")
+    if lower is not None and upper is not None and lower >= upper:
+        raise HTTPException(status_code=400, detail="min must be lower than max")
+
+    async def load():
+        column = getattr(PatientDB, field)
+        lo, hi = lower, upper
+        if lo is None or hi is None:
+            bounds = (await db.execute(
+                select(func.min(column), func.max(column)).where(PatientDB.doctor_id == doctor_id)
+            )).one()
+            lo = float(bounds[0]) if lo is None and bounds[0] is not None else lo
+            hi = float(bounds[1]) if hi is None and bounds[1] is not None else hi
+        if lo is None or hi is None or lo > hi:
+            return Histogram(field=field, bins=[]).model_dump_json()
+        if lo == hi:
+            # every value is the same: one zero-width bucket holding them all
+            count = await db.scalar(
+                select(func.count()).where(PatientDB.doctor_id == doctor_id, column == lo)
+            )
+            return Histogram(field=field, bins=[HistogramBin(lower=lo, upper=hi, count=count)]).model_dump_json()
+        width = (hi - lo) / bins
+
+        # floor, not CAST: CAST truncates on SQLite but rounds on PostgreSQL
+        bucket = case((column >= hi, bins - 1), else_=func.floor((column - lo) / width))
+        result = await db.execute(
+            select(bucket.label("bucket"), func.count())
+            .where(PatientDB.doctor_id == doctor_id, column >= lo, column <= hi)
+            .group_by("bucket")
+        )
+        counts = {int(index): count for index, count in result}
+        return Histogram(field=field, bins=[
+            HistogramBin(lower=round(lo + i * width, 4), upper=round(lo + (i + 1) * width, 4), count=counts.get(i, 0))
+            for i in range(bins)
+        ]).model_dump_json()
+
+    version = await cache.doctor_version(doctor_id)
+    key = cache.doctor_key(doctor_id, version, "stats", "histogram", field, bins, lower, upper)
+    return Histogram.model_validate_json(await cache.get_or_load(key, load))
+
+async def grouped(db: AsyncSession, doctor_id: int, by: str) -> GroupedStats:
+    """
+    Count and mean measurements per group.
+
+    Args:
+        db (AsyncSession): SQLAlchemy database session.
+        doctor_id (int): Doctor whose patients are aggregated.
+        by (str): Grouping column ('city', 'gender' or 'verdict').
+
+    Returns:
+        GroupedStats: One entry per group, largest first.
+
+    Raises:
+        HTTPException: 400 if the grouping column is invalid.
+    """
+    if by not in GROUP_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Invalid group. Use one of {GROUP_FIELDS}")
+
+    async def load():
+        column = getattr(PatientDB, by)
+        result = await db.execute(
+            select(
+                column,
+                func.count(),
+                func.avg(PatientDB.bmi),
+                func.avg(PatientDB.age),
+                func.avg(PatientDB.weight),
+                func.avg(PatientDB.height),
+            )
+            .where(PatientDB.doctor_id == doctor_id)
+            .group_by(column)
+            .order_by(func.count().desc())
+        )
+        groups = [
+            GroupStats(
+                key=None if key is None else str(getattr(key, "value", key)),
+                count=count,
+                mean_bmi=_rounded(bmi),
+                mean_age=_rounded(age),
+                mean_weight=_rounded(weight),
+                mean_height=_rounded(height),
+            )
+            for key, count, bmi, age, weight, height in result
+        ]
+        return GroupedStats(by=by, groups=groups).model_dump_json()
+
+    version = await cache.doctor_version(doctor_id)
+    key = cache.doctor_key(doctor_id, version, "stats", "groups", by)
+    return GroupedStats.model_validate_json(await cache.get_or_load(key, load))
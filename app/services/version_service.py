@@ -0,0 +1,50 @@
+"""
+Row versions for conditional GETs.
+
+Every write to a doctor's patients bumps `Doctor.version` in the same
+transaction, and each patient written takes the doctor's new version. So a
+patient's version changes whenever the patient does, and the doctor's
+version is the highest of them, moving on deletes too (which a plain
+MAX(patients.version) would miss). The GET endpoints derive their ETags
+from these numbers and answer If-None-Match with a primary-key lookup of
+one version instead of loading and serializing the rows.
+"""
+from typing import Optional
+from sqlalchemy import select, update # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+from app.models.doctor_models import Doctor as DoctorDB
+from app.models.patient_models import Patient as PatientDB
+
+def _bump_statement(doctor_id: int):
+    return (
+        update(DoctorDB)
+        .where(DoctorDB.id == doctor_id)
+        .values(version=DoctorDB.version + 1)
+        .returning(DoctorDB.version)
+        .execution_options(synchronize_session=False)
+    )
+
+async def bump(db: AsyncSession, doctor_id: int) -> int:
+    """
+    Increment a doctor's version.
+
+    Returns:
+        int: The new version, to store on the patients written in this
+        transaction (1 if the doctor is gone).
+    """
+    return (await db.scalar(_bump_statement(doctor_id))) or 1
+
+def bump_sync(db: Session, doctor_id: int) -> int:
+    """Synchronous `bump`."""
+    return db.scalar(_bump_statement(doctor_id)) or 1
+
+async def doctor_version(db: AsyncSession, doctor_id: int) -> Optional[int]:
+    """Current version of a doctor, None if the doctor does not exist."""
+    return await db.scalar(select(DoctorDB.version).where(DoctorDB.id == doctor_id))
+
+async def patient_version(db: AsyncSession, patient_id: str, doctor_id: int) -> Optional[int]:
+    """Current version of one of the doctor's patients, None if it does not exist."""
+    return await db.scalar(
+        select(PatientDB.version).where(PatientDB.id == patient_id, PatientDB.doctor_id == doctor_id)
+    )
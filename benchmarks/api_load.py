@@ -0,0 +1,214 @@
+"""
+API load test.
+
+Seeds a temporary SQLite database with `benchmarks.datagen`, then drives
+`app.main.app` in-process through httpx's ASGI transport (no server, no
+network) with a fixed number of concurrent clients per endpoint. Celery is
+stubbed: the outbox relay is disabled and the broker is in-memory, so
+writes only stage outbox rows. The read-through cache is off unless
+--redis is given.
+
+Reports p50/p95/p99 latency, throughput and errors per endpoint, and
+optionally writes them as JSON (with the git commit) so runs can be
+compared; --compare prints the change against an earlier JSON file.
+
+Usage:
+    python -m benchmarks.api_load --patients 100000 --doctors 50 --requests 500 --out run.json
+    python -m benchmarks.api_load --patients 100000 --doctors 50 --requests 500 --compare run.json
+"""
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+_tmp = tempfile.mkdtemp()
+_path = os.path.join(_tmp, "api_load.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_path}"
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("SMTP_USER", "")
+os.environ.setdefault("SMTP_PASS", "")
+os.environ["OUTBOX_RELAY_ENABLED"] = "false"
+
+ENDPOINTS = ["login", "view", "view_page", "sort", "patient", "search", "stats", "create"]
+
+def percentile(samples: list, p: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, max(0, round(p / 100 * len(samples)) - 1))]
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def build_requests(args, tokens: dict, patients_by_doctor: dict):
+    """Return endpoint -> factory producing (method, url, kwargs) for one request."""
+    from benchmarks import datagen
+
+    rng = random.Random(1)
+    new_ids = itertools.count()
+
+    def auth(doctor_id):
+        return {"Authorization": f"Bearer {tokens[doctor_id]}"}
+
+    def doctor():
+        return rng.choice(list(tokens))
+
+    def login():
+        doctor_id = rng.randint(1, args.doctors)
+        return "POST", "/auth/login", {"data": {"username": datagen.doctor_email(doctor_id),
+                                                "password": datagen.PASSWORD}}
+
+    def view():
+        return "GET", "/view", {"params": {"limit": 50}, "headers": auth(doctor())}
+
+    def view_page():
+        doctor_id = doctor()
+        ids = patients_by_doctor.get(doctor_id) or ["P0000000"]
+        cursor = base64.urlsafe_b64encode(json.dumps([rng.choice(ids)]).encode()).decode()
+        return "GET", "/view", {"params": {"limit": 50, "cursor": cursor}, "headers": auth(doctor_id)}
+
+    def sort():
+        return "GET", "/sort", {"params": {"sort_by": rng.choice(["weight", "height", "bmi"]),
+                                           "order": rng.choice(["asc", "desc"]), "limit": 50},
+                                "headers": auth(doctor())}
+
+    def patient():
+        doctor_id = doctor()
+        ids = patients_by_doctor.get(doctor_id) or ["P0000000"]
+        return "GET", f"/patient/{rng.choice(ids)}", {"headers": auth(doctor_id)}
+
+    def search():
+        return "GET", "/patients/search", {"params": {"q": rng.choice(["ali", "za", "khan lah", "usm"])},
+                                           "headers": auth(doctor())}
+
+    def stats():
+        return "GET", "/stats/summary", {"headers": auth(doctor())}
+
+    def create():
+        row = next(datagen.patient_rows(1, 1, rng))
+        body = dict(zip(["id", "name", "city", "age", "gender", "height", "weight"], row[:7]))
+        body["id"] = f"N{next(new_ids):07d}"
+        return "POST", "/create", {"json": body, "headers": auth(doctor())}
+
+    return {name: fn for name, fn in locals().items() if name in ENDPOINTS}
+
+async def run_endpoint(client, factory, requests: int, concurrency: int) -> dict:
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            method, url, kwargs = factory()
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+async def run(args) -> dict:
+    import httpx # type: ignore
+    from sqlalchemy import select # type: ignore
+    from app.core.celery import celery_app
+    from app.core.database import Base, SessionLocal, engine
+    from app.core.security import create_access_token, hash_password, shutdown_password_pool
+    from app.main import app
+    from app.models.patient_models import Patient
+    from benchmarks import datagen
+
+    celery_app.conf.broker_url = "memory://"
+    Base.metadata.create_all(bind=engine)
+    start = time.perf_counter()
+    datagen.seed(_path, args.doctors, args.patients, hash_password(datagen.PASSWORD))
+    print(f"seeded {args.doctors} doctors / {args.patients} patients in {time.perf_counter() - start:.1f}s")
+
+    tokens = {i: create_access_token({"sub": str(i)}) for i in range(1, args.doctors + 1)}
+    patients_by_doctor: dict = {}
+    with SessionLocal() as db:
+        for patient_id, doctor_id in db.execute(select(Patient.id, Patient.doctor_id)):
+            patients_by_doctor.setdefault(doctor_id, []).append(patient_id)
+    factories = build_requests(args, tokens, patients_by_doctor)
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name in args.endpoints:
+            requests = max(args.requests // 10, 1) if name == "login" else args.requests
+            results[name] = await run_endpoint(client, factories[name], requests, args.concurrency)
+            r = results[name]
+            print(f"{name:<10} {r['throughput_rps']:9.1f} req/s  p50 {r['p50_ms']:8.2f}  p95 {r['p95_ms']:8.2f}  "
+                  f"p99 {r['p99_ms']:8.2f} ms  errors {r['errors']}")
+    shutdown_password_pool()
+    return results
+
+def compare(current: dict, baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nchange vs {baseline_path} ({baseline['meta']['commit']}):")
+    for name, r in current["results"].items():
+        old = baseline["results"].get(name)
+        if not old:
+            continue
+        def delta(key):
+            return f"{(r[key] - old[key]) / old[key] * 100:+6.1f}%" if old[key] else "   n/a"
+        print(f"{name:<10} throughput {delta('throughput_rps')}  p50 {delta('p50_ms')}  "
+              f"p95 {delta('p95_ms')}  p99 {delta('p99_ms')}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=100_000)
+    parser.add_argument("--doctors", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint (login: a tenth)")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=ENDPOINTS)
+    parser.add_argument("--redis", help="enable the read-through cache against this Redis URL")
+    parser.add_argument("--out", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON file of an earlier run to compare against")
+    args = parser.parse_args()
+
+    if args.redis:
+        os.environ["REDIS_URL"] = args.redis
+    else:
+        os.environ["CACHE_ENABLED"] = "false"
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "results": asyncio.run(run(args)),
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"results written to {args.out}")
+    if args.compare:
+        compare(report, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Cold-start benchmark: how long a fresh process takes to serve requests.
+
+Seeds a temporary SQLite database stamped at the latest migration, then
+starts the app --runs times per STARTUP_MODE, each in a fresh interpreter,
+and reports the median of:
+
+- import: `import app.main`;
+- startup: the lifespan (create_all, or the Alembic head check in
+  production mode; plus the DB pool / bcrypt warm-up with STARTUP_WARM_UP);
+- first read: GET /doctor;
+- first login: POST /auth/login, bcrypt in the password pool;
+- ready: the sum, i.e. until the process has served both.
+
+--importtime also lists the packages that cost most to import (self time of
+`python -X importtime -c "import app.main"`, grouped by top-level package).
+
+Usage:
+    python -m benchmarks.cold_start --runs 5 --importtime
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+PACKAGE_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MODES = ("development", "production")
+STEPS = ("import", "startup", "first_read", "first_login")
+
+def child():
+    """Run in the fresh interpreter: time the steps and print them as JSON."""
+    timings = {}
+    start = time.perf_counter()
+    from app.main import app
+    timings["import"] = time.perf_counter() - start
+
+    import httpx
+    from benchmarks.datagen import PASSWORD, doctor_email
+
+    async def run():
+        async with app.router.lifespan_context(app):
+            timings["startup"] = time.perf_counter() - start - timings["import"]
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                began = time.perf_counter()
+                (await client.get("/doctor")).raise_for_status()
+                timings["first_read"] = time.perf_counter() - began
+                began = time.perf_counter()
+                response = await client.post("/auth/login", data={"username": doctor_email(1), "password": PASSWORD})
+                response.raise_for_status()
+                timings["first_login"] = time.perf_counter() - began
+
+    asyncio.run(run())
+    print(json.dumps(timings))
+
+def prepare(directory: str, doctors: int, patients: int) -> dict:
+    """Seed a database at the latest migration and return the environment of the runs."""
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{directory}/cold_start.db",
+        REDIS_URL=os.environ.get("REDIS_URL", "redis://localhost:1/0"),
+        SMTP_USER="",
+        SMTP_PASS="",
+        CACHE_ENABLED="false",
+        OUTBOX_RELAY_ENABLED="false",
+        PYTHONPATH=PACKAGE_ROOT,
+    )
+    os.environ.update(env)
+    from alembic import command
+    from alembic.config import Config
+    import app.main  # registers every model and the search index DDL on Base.metadata
+    from app.core.database import Base, engine
+    from app.core.security import pwd_context
+    from benchmarks.datagen import PASSWORD, seed
+
+    Base.metadata.create_all(bind=engine)
+    seed(f"{directory}/cold_start.db", doctors, patients, pwd_context.hash(PASSWORD))
+    command.stamp(Config(os.path.join(PACKAGE_ROOT, "alembic.ini")), "head")
+    engine.dispose()
+    return env
+
+def measure(env: dict, mode: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.cold_start", "--child"],
+        env=dict(env, STARTUP_MODE=mode), cwd=PACKAGE_ROOT, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def import_profile(env: dict, top: int) -> list:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=env, cwd=PACKAGE_ROOT, capture_output=True, text=True, check=True,
+    )
+    self_time = Counter()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, _, name = line[len("import time:"):].split("|")
+        self_time[name.strip().split(".")[0]] += int(own)
+    return self_time.most_common(top)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--doctors", type=int, default=50)
+    parser.add_argument("--patients", type=int, default=10_000)
+    parser.add_argument("--importtime", action="store_true", help="also list the slowest packages to import")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return
+
+    env = prepare(tempfile.mkdtemp(), args.doctors, args.patients)
+    print(f"{'mode':<12}" + "".join(f"{step:>13}" for step in (*STEPS, "ready")) + "   (median ms)")
+    for mode in MODES:
+        runs = [measure(env, mode) for _ in range(args.runs)]
+        medians = {step: statistics.median(run[step] for run in runs) * 1000 for step in STEPS}
+        ready = statistics.median(sum(run.values()) for run in runs) * 1000
+        print(f"{mode:<12}" + "".join(f"{medians[step]:13.1f}" for step in STEPS) + f"{ready:13.1f}")
+
+    if args.importtime:
+        print("\nimport app.main, self time by package:")
+        for package, micros in import_profile(env, 15):
+            print(f"  {package:<24}{micros / 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Synthetic data generator for the benchmarks.
+
+Seeds doctors and patients into an SQLite database whose schema was
+created from the models, using raw sqlite3 executemany for speed, then
+rebuilds the derived tables (doctor counters, search index) through the
+application code so the seeded database looks like one filled by the API.
+
+Every doctor gets the e-mail `doctor<N>@example.com` and the same password.
+
+Usage:
+    python -m benchmarks.datagen --patients 100000 --doctors 50 --out /tmp/seed.db
+"""
+import argparse
+import os
+import random
+import sqlite3
+
+FIRST = ["Ali", "Ahmed", "Ayesha", "Bilal", "Fatima", "Hamza", "Hassan", "Iqra", "Kamran", "Maryam",
+         "Nadia", "Omar", "Saad", "Sana", "Usman", "Zainab", "Zara", "Imran", "Rabia", "Tariq"]
+LAST = ["Khan", "Malik", "Qureshi", "Raza", "Sheikh", "Butt", "Chaudhry", "Javed", "Siddiqui", "Akhtar"]
+CITIES = ["Lahore", "Karachi", "Islamabad", "Multan", "Peshawar", "Quetta", "Faisalabad", "Sialkot"]
+GENDERS = ["male", "female", "other"]
+PASSWORD = "benchmark-password"
+
+def doctor_email(doctor_id: int) -> str:
+    return f"doctor{doctor_id}@example.com"
+
+def patient_rows(patients: int, doctors: int, rng: random.Random):
+    """Yield patient tuples in `patients` column order, BMI and verdict included."""
+    for i in range(patients):
+        height = round(rng.uniform(1.4, 2.0), 2)
+        weight = round(rng.uniform(40, 140), 1)
+        bmi = round(weight / height ** 2, 2)
+        verdict = "Underweight" if bmi < 18.5 else "Normal" if bmi < 28 else "Obese"
+        yield (f"P{i:07d}", f"{rng.choice(FIRST)} {rng.choice(LAST)}", rng.choice(CITIES), rng.randint(1, 119),
+               rng.choice(GENDERS), height, weight, bmi, verdict, rng.randint(1, doctors))
+
+def seed(database_path: str, doctors: int, patients: int, password_hash: str,
+         seed: int = 42, batch: int = 50_000):
+    """
+    Insert `doctors` doctors and `patients` patients spread randomly across them.
+
+    The schema must already exist (Base.metadata.create_all) and the
+    `engine` of app.core.database must point at `database_path`.
+    """
+    from app.core.database import SessionLocal, engine
+    from app.services import counter_service, search_index
+
+    rng = random.Random(seed)
+    conn = sqlite3.connect(database_path)
+    conn.executemany(
+        "INSERT INTO doctors (id, name, email, password) VALUES (?, ?, ?, ?)",
+        [(i, f"Doctor {chr(65 + i % 26)}", doctor_email(i), password_hash) for i in range(1, doctors + 1)],
+    )
+    insert = ("INSERT INTO patients (id, name, city, age, gender, height, weight, bmi, verdict, doctor_id) "
+              "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+    rows = []
+    for row in patient_rows(patients, doctors, rng):
+        rows.append(row)
+        if len(rows) == batch:
+            conn.executemany(insert, rows)
+            rows.clear()
+    if rows:
+        conn.executemany(insert, rows)
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+    with SessionLocal() as db:
+        counter_service.reconcile(db)
+    with engine.begin() as connection:
+        search_index.rebuild(connection)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=100_000)
+    parser.add_argument("--doctors", type=int, default=50)
+    parser.add_argument("--out", required=True, help="path of the SQLite file to create")
+    args = parser.parse_args()
+
+    if os.path.exists(args.out):
+        raise SystemExit(f"{args.out} already exists")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.abspath(args.out)}"
+    os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+    os.environ.setdefault("SMTP_USER", "")
+    os.environ.setdefault("SMTP_PASS", "")
+
+    from app.core.database import Base, engine
+    from app.core.security import hash_password
+    Base.metadata.create_all(bind=engine)
+    seed(args.out, args.doctors, args.patients, hash_password(PASSWORD))
+    print(f"seeded {args.doctors} doctors and {args.patients} patients into {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Outbox benchmark: request-path cost and relay throughput.
+
+Runs against a temporary SQLite database and, by default, an in-process
+fakeredis broker (pip install fakeredis); pass --broker redis://... to use a
+real one. --latency-ms adds a delay to every broker command to emulate a slow
+or remote Redis. Reports:
+
+- the per-request cost of publishing inline with `.delay()` (the old path)
+  versus staging an outbox row in the request transaction;
+- relay throughput (messages/s) for several batch sizes.
+
+Usage:
+    python -m benchmarks.outbox_relay --messages 2000 --latency-ms 1
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/outbox_bench.db"
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("SMTP_USER", "")
+os.environ.setdefault("SMTP_PASS", "")
+os.environ["OUTBOX_RELAY_ENABLED"] = "false"
+
+from app.core.celery import celery_app
+from app.core.database import AsyncWriteSessionLocal, Base, engine
+from app.services import outbox_service
+from app.services.celery_task import send_patient_created_email
+
+def use_fakeredis(latency: float):
+    """Point kombu's Redis transport at one shared in-process fakeredis server."""
+    try:
+        import fakeredis # type: ignore
+    except ImportError:
+        raise SystemExit("fakeredis is required for the default broker: pip install fakeredis")
+    import kombu.transport.redis as kombu_redis # type: ignore
+
+    server = fakeredis.FakeServer()
+
+    class SlowFakeRedis(fakeredis.FakeRedis):
+        def execute_command(self, *args, **kwargs):
+            if latency:
+                time.sleep(latency)
+            return super().execute_command(*args, **kwargs)
+
+    kombu_redis.Channel._create_client = lambda self, asynchronous=False: SlowFakeRedis(server=server)
+    celery_app.conf.broker_url = "redis://fakeredis:6379/0"
+
+def percentiles(samples: list) -> str:
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    return f"p50 {statistics.median(samples) * 1000:.3f} ms, p95 {p95 * 1000:.3f} ms"
+
+def bench_inline(count: int) -> list:
+    timings = []
+    for i in range(count):
+        start = time.perf_counter()
+        send_patient_created_email.delay("doctor@example.com", f"P{i:06d}")
+        timings.append(time.perf_counter() - start)
+    return timings
+
+async def bench_enqueue(count: int) -> list:
+    timings = []
+    for i in range(count):
+        start = time.perf_counter()
+        async with AsyncWriteSessionLocal() as db:
+            outbox_service.enqueue(db, send_patient_created_email, "doctor@example.com", f"P{i:06d}")
+            await db.commit()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+async def bench_relay(count: int, batch: int) -> float:
+    async with AsyncWriteSessionLocal() as db:
+        for i in range(count):
+            outbox_service.enqueue(db, send_patient_created_email, "doctor@example.com", f"P{i:06d}")
+        await db.commit()
+    start = time.perf_counter()
+    sent = 0
+    while sent < count:
+        sent += await outbox_service.drain_once(batch)
+    return count / (time.perf_counter() - start)
+
+async def run(args):
+    Base.metadata.create_all(bind=engine)
+    print(f"inline .delay():        {percentiles(bench_inline(args.messages))}")
+    print(f"outbox enqueue+commit:  {percentiles(await bench_enqueue(args.messages))}  (includes the commit)")
+    await outbox_service.drain_once(args.messages)  # empty the outbox
+    for batch in (1, 10, 100, 500):
+        print(f"relay batch {batch:>3}: {await bench_relay(args.messages, batch):9.1f} msg/s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--broker", default="fakeredis", help="'fakeredis' or a broker URL")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay per fakeredis command")
+    args = parser.parse_args()
+
+    if args.broker == "fakeredis":
+        use_fakeredis(args.latency_ms / 1000)
+    else:
+        celery_app.conf.broker_url = args.broker
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
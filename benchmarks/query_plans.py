@@ -0,0 +1,137 @@
+"""
+Query plan benchmark for the patient listing indexes.
+
+Seeds a temporary SQLite database with doctors and patients, then prints
+the EXPLAIN QUERY PLAN and the median latency of the queries issued by
+`patient_service` (listing, sorted listing, keyset page, single patient)
+and by `/auth/login`, first without and then with the indexes declared
+on the models (see the 5d2c8e41f9a7 migration).
+
+Usage:
+    python -m benchmarks.query_plans --patients 1000000 --doctors 100
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+# Settings() requires these; the benchmark never touches the configured database
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("SMTP_USER", "")
+os.environ.setdefault("SMTP_PASS", "")
+
+from sqlalchemy import select, tuple_ # type: ignore
+from sqlalchemy.dialects import sqlite # type: ignore
+from sqlalchemy.schema import CreateIndex, CreateTable # type: ignore
+from app.models.doctor_models import Doctor
+from app.models.patient_models import Patient
+
+CITIES = ["Lahore", "Karachi", "Islamabad", "Multan", "Peshawar", "Quetta"]
+GENDERS = ["male", "female", "other"]
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}))
+
+def create_schema(conn: sqlite3.Connection):
+    """Create the doctors and patients tables without any secondary index."""
+    for table in (Doctor.__table__, Patient.__table__):
+        conn.execute(str(CreateTable(table).compile(dialect=sqlite.dialect())))
+
+def create_indexes(conn: sqlite3.Connection):
+    """Create every index declared on the Doctor and Patient models."""
+    for table in (Doctor.__table__, Patient.__table__):
+        for index in table.indexes:
+            conn.execute(str(CreateIndex(index).compile(dialect=sqlite.dialect())))
+    conn.execute("ANALYZE")
+
+def seed(conn: sqlite3.Connection, doctors: int, patients: int, batch: int = 50_000):
+    """Insert `doctors` doctors and `patients` patients spread randomly across them."""
+    rng = random.Random(42)
+    conn.executemany(
+        "INSERT INTO doctors (id, name, email, password) VALUES (?, ?, ?, ?)",
+        [(i, f"Doctor {i}", f"doctor{i}@example.com", "x") for i in range(1, doctors + 1)],
+    )
+    insert = (
+        "INSERT INTO patients (id, name, city, age, gender, height, weight, bmi, verdict, doctor_id)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+    )
+    rows = []
+    for i in range(patients):
+        height = round(rng.uniform(1.4, 2.0), 2)
+        weight = round(rng.uniform(40, 140), 1)
+        bmi = round(weight / height ** 2, 2)
+        verdict = "Underweight" if bmi < 18.5 else "Normal" if bmi < 28 else "Obese"
+        rows.append((f"P{i:07d}", "Patient", rng.choice(CITIES), rng.randint(1, 119),
+                     rng.choice(GENDERS), height, weight, bmi, verdict, rng.randint(1, doctors)))
+        if len(rows) == batch:
+            conn.executemany(insert, rows)
+            rows.clear()
+    if rows:
+        conn.executemany(insert, rows)
+    conn.commit()
+
+def queries(doctor_id: int, page: int) -> dict:
+    """The statements issued by the service layer for one doctor."""
+    def listing(column, *keys):
+        columns = [column, Patient.id] if column is not Patient.id else [Patient.id]
+        stmt = select(Patient).where(Patient.doctor_id == doctor_id).order_by(*columns)
+        if keys:
+            stmt = stmt.where(tuple_(*columns) > tuple_(*keys) if len(keys) > 1 else Patient.id > keys[0])
+        return _sql(stmt.limit(page + 1))
+
+    return {
+        "view (first page)": listing(Patient.id),
+        "view (keyset page)": listing(Patient.id, "P0500000"),
+        "sort weight (first page)": listing(Patient.weight),
+        "sort bmi (keyset page)": listing(Patient.bmi, 25.0, "P0500000"),
+        "view_patient": _sql(select(Patient).where(Patient.id == "P0000042", Patient.doctor_id == doctor_id)),
+        "sort weight (full, pre-pagination)": _sql(
+            select(Patient).where(Patient.doctor_id == doctor_id).order_by(Patient.weight)
+        ),
+        "login email lookup": _sql(select(Doctor).where(Doctor.email == f"doctor{doctor_id}@example.com")),
+    }
+
+def measure(conn: sqlite3.Connection, sql: str, repeat: int) -> float:
+    """Median wall time of `sql` in milliseconds, rows fully fetched."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def report(conn: sqlite3.Connection, title: str, statements: dict, repeat: int):
+    print(f"\n=== {title} ===")
+    for name, sql in statements.items():
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+        print(f"\n{name}: {measure(conn, sql, repeat):.3f} ms")
+        for step in plan:
+            print(f"    {step}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=1_000_000)
+    parser.add_argument("--doctors", type=int, default=100)
+    parser.add_argument("--page", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "bench.db"))
+        create_schema(conn)
+        start = time.perf_counter()
+        seed(conn, args.doctors, args.patients)
+        print(f"seeded {args.patients} patients / {args.doctors} doctors in {time.perf_counter() - start:.1f}s")
+
+        statements = queries(doctor_id=1, page=args.page)
+        report(conn, "before: primary keys only", statements, args.repeat)
+        create_indexes(conn)
+        report(conn, "after: model indexes", statements, args.repeat)
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Patient search benchmark.
+
+Seeds a temporary SQLite database (schema from the models, so including the
+FTS5 index), builds the index and reports the median and p95 latency of
+`patient_service.search_patients` for a few query shapes: full words,
+short prefixes, two words, and a miss. The cache is disabled so every call
+hits the index.
+
+Usage:
+    python -m benchmarks.search --patients 1000000 --doctors 100
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp()
+_path = os.path.join(_tmp, "search_bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_path}"
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("SMTP_USER", "")
+os.environ.setdefault("SMTP_PASS", "")
+os.environ["CACHE_ENABLED"] = "false"
+
+from app.core.database import AsyncSessionLocal, Base, engine
+from app.services import patient_service, search_index
+
+FIRST = ["Ali", "Ahmed", "Ayesha", "Bilal", "Fatima", "Hamza", "Hassan", "Iqra", "Kamran", "Maryam",
+         "Nadia", "Omar", "Saad", "Sana", "Usman", "Zainab", "Zara", "Imran", "Rabia", "Tariq"]
+LAST = ["Khan", "Malik", "Qureshi", "Raza", "Sheikh", "Butt", "Chaudhry", "Javed", "Siddiqui", "Akhtar"]
+CITIES = ["Lahore", "Karachi", "Islamabad", "Multan", "Peshawar", "Quetta", "Faisalabad", "Sialkot"]
+QUERIES = ["ali", "za", "hamza khan", "usm lah", "nobody"]
+
+def seed(doctors: int, patients: int, batch: int = 50_000):
+    rng = random.Random(42)
+    conn = sqlite3.connect(_path)
+    conn.executemany(
+        "INSERT INTO doctors (id, name, email, password) VALUES (?, ?, ?, ?)",
+        [(i, f"Doctor {i}", f"doctor{i}@example.com", "x") for i in range(1, doctors + 1)],
+    )
+    rows = []
+    for i in range(patients):
+        rows.append((f"P{i:07d}", f"{rng.choice(FIRST)} {rng.choice(LAST)}", rng.choice(CITIES),
+                     30, "male", 1.75, 70.0, 22.86, "Normal", rng.randint(1, doctors)))
+        if len(rows) == batch:
+            conn.executemany("INSERT INTO patients (id, name, city, age, gender, height, weight, bmi, verdict, doctor_id) "
+                             "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            rows.clear()
+    if rows:
+        conn.executemany("INSERT INTO patients (id, name, city, age, gender, height, weight, bmi, verdict, doctor_id) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+async def bench(doctors: int, repeat: int):
+    rng = random.Random(7)
+    async with AsyncSessionLocal() as db:
+        for query in QUERIES:
+            samples = []
+            for _ in range(repeat):
+                doctor_id = rng.randint(1, doctors)
+                start = time.perf_counter()
+                await patient_service.search_patients(db, query, doctor_id, limit=20)
+                samples.append(time.perf_counter() - start)
+            samples.sort()
+            p95 = samples[int(len(samples) * 0.95) - 1]
+            print(f"q={query!r:<13} p50 {statistics.median(samples) * 1000:6.2f} ms   p95 {p95 * 1000:6.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=1_000_000)
+    parser.add_argument("--doctors", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    start = time.perf_counter()
+    seed(args.doctors, args.patients)
+    with engine.begin() as conn:
+        search_index.rebuild(conn)
+    print(f"seeded {args.patients} patients and built the index in {time.perf_counter() - start:.1f}s")
+    asyncio.run(bench(args.doctors, args.repeat))
+
+if __name__ == "__main__":
+    main()
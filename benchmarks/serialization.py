@@ -0,0 +1,96 @@
+"""
+Serialization benchmark: one page of N patients, before and after the fast path.
+
+No database is needed; the patients are transient ORM objects. Compares:
+
+- before: the old response path, PatientResponse recomputing bmi/verdict
+  from height/weight, validated by the response_model, then encoded by the
+  stdlib json module (what FastAPI's default JSONResponse does);
+- pydantic: the current PatientPage validated from attributes and dumped
+  with pydantic-core's own JSON encoder;
+- fast path: `serialize_patient` reading the stored columns and orjson.
+
+Usage:
+    python -m benchmarks.serialization --patients 10000 --repeat 20
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("SMTP_USER", "")
+os.environ.setdefault("SMTP_PASS", "")
+
+from typing import List, Optional
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from app.core.responses import dumps
+import app.models.doctor_models  # resolves the Patient.doctor relationship
+from app.models.patient_models import Patient as PatientDB
+from app.schemas.patients import PatientBase, PatientPage, serialize_patient
+
+class LegacyPatientResponse(PatientBase):
+    """PatientResponse as it was: bmi/verdict are computed fields."""
+    doctor_id: int
+
+    class Config:
+        from_attributes = True
+
+class LegacyPatientPage(BaseModel):
+    items: List[LegacyPatientResponse]
+    next_cursor: Optional[str] = None
+
+def make_patients(count: int) -> list:
+    rng = random.Random(42)
+    patients = []
+    for i in range(count):
+        height = round(rng.uniform(1.45, 2.0), 2)
+        weight = round(rng.uniform(40, 130), 1)
+        bmi = round(weight / (height * height), 2)
+        patients.append(PatientDB(
+            id=f"P{i:07d}", name="Patient", city="Lahore", age=rng.randint(1, 99),
+            gender=rng.choice(["male", "female"]), height=height, weight=weight, bmi=bmi,
+            verdict="Underweight" if bmi < 18.5 else "Normal" if bmi < 28 else "Obese",
+            doctor_id=1,
+        ))
+    return patients
+
+def before(patients: list) -> bytes:
+    page = LegacyPatientPage.model_validate({"items": patients, "next_cursor": None}, from_attributes=True)
+    return json.dumps(jsonable_encoder(page), ensure_ascii=False, separators=(",", ":")).encode()
+
+def pydantic_dump(patients: list) -> bytes:
+    page = PatientPage.model_validate({"items": patients, "next_cursor": None}, from_attributes=True)
+    return page.model_dump_json().encode()
+
+def fast_path(patients: list) -> bytes:
+    return dumps({"items": [serialize_patient(p) for p in patients], "next_cursor": None}).encode()
+
+def timed(fn, patients: list, repeat: int) -> float:
+    fn(patients)  # warm up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(patients)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    patients = make_patients(args.patients)
+    assert json.loads(before(patients)) == json.loads(fast_path(patients)), "fast path changed the payload"
+    baseline = timed(before, patients, args.repeat)
+    for name, fn in (("before", before), ("pydantic", pydantic_dump), ("fast path", fast_path)):
+        elapsed = baseline if fn is before else timed(fn, patients, args.repeat)
+        print(f"{name:<10} {elapsed * 1000:8.2f} ms  {baseline / elapsed:5.1f}x")
+
+if __name__ == "__main__":
+    main()
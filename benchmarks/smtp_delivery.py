@@ -0,0 +1,98 @@
+"""
+SMTP delivery benchmark: one connection per email vs the pooled transport.
+
+Starts a local aiosmtpd server (pip install aiosmtpd) as a stand-in for the
+real provider and sends the same messages twice: first the way the task used
+to (connect, send, quit for every email), then through SMTPConnectionPool.
+An optional per-command latency emulates the round trips to a remote server.
+
+Usage:
+    python -m benchmarks.smtp_delivery --messages 500 --latency-ms 20
+"""
+import argparse
+import os
+import smtplib
+import socket
+import time
+from email.mime.text import MIMEText
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("SMTP_USER", "")
+os.environ.setdefault("SMTP_PASS", "")
+
+from app.services.mailer import SMTPConnectionPool, SMTPTransport
+
+def start_server(latency: float):
+    try:
+        from aiosmtpd.controller import Controller # type: ignore
+        from aiosmtpd.smtp import SMTP # type: ignore
+    except ImportError:
+        raise SystemExit("aiosmtpd is required: pip install aiosmtpd")
+    import asyncio
+
+    class Sink:
+        received = 0
+
+        async def handle_DATA(self, server, session, envelope):
+            Sink.received += 1
+            return "250 OK"
+
+    class SlowSMTP(SMTP):
+        async def push(self, status):
+            if latency:
+                await asyncio.sleep(latency)
+            return await super().push(status)
+
+    class SlowController(Controller):
+        def factory(self):
+            return SlowSMTP(self.handler)
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    controller = SlowController(Sink(), hostname="127.0.0.1", port=port)
+    controller.start()
+    return controller, Sink
+
+def message(i: int) -> MIMEText:
+    msg = MIMEText(f"A new patient (ID: P{i:06d}) was created.")
+    msg["Subject"] = "New Patient Created"
+    msg["From"] = "bench@example.com"
+    msg["To"] = "doctor@example.com"
+    return msg
+
+def per_message(host: str, port: int, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        with smtplib.SMTP(host, port) as smtp:
+            smtp.send_message(message(i))
+    return time.perf_counter() - start
+
+def pooled(host: str, port: int, count: int) -> float:
+    pool = SMTPConnectionPool(1, lambda: SMTPTransport(host, port, starttls=False))
+    start = time.perf_counter()
+    for i in range(count):
+        pool.send(message(i))
+    elapsed = time.perf_counter() - start
+    pool.close()
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay added to every server reply")
+    args = parser.parse_args()
+
+    controller, sink = start_server(args.latency_ms / 1000)
+    host, port = controller.hostname, controller.port
+    try:
+        for name, run in (("connect per email", per_message), ("pooled connection", pooled)):
+            elapsed = run(host, port, args.messages)
+            print(f"{name:>18}: {args.messages / elapsed:8.1f} msg/s  ({elapsed:.2f}s)")
+    finally:
+        controller.stop()
+    print(f"server received {sink.received} messages")
+
+if __name__ == "__main__":
+    main()